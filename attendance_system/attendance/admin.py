@@ -1,8 +1,23 @@
 from django.contrib import admin
-from .models import Attendance
+from .models import Attendance, AttendanceSummary, FaceEmbedding
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
     list_display = ('student', 'section', 'date', 'time_checked_in', 'status')
     list_filter = ('status', 'date')
     search_fields = ('student__first_name', 'student__last_name', 'section__course__name')
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ('section', 'week_number', 'present', 'late', 'absent', 'updated_at')
+    list_filter = ('week_number',)
+    list_select_related = ('section__course',)
+    search_fields = ('section__course__code', 'section__course__name')
+
+@admin.register(FaceEmbedding)
+class FaceEmbeddingAdmin(admin.ModelAdmin):
+    list_display = ('student', 'extractor', 'dim', 'updated_at')
+    list_filter = ('extractor',)
+    list_select_related = ('student',)
+    search_fields = ('student__matric_id', 'student__first_name', 'student__last_name')
+    exclude = ('vector',)
@@ -0,0 +1,66 @@
+"""Helpers shared by the attendance benchmark commands.
+
+Benchmarks build a throwaway course, section and set of students whose
+identifiers start with a fixed prefix so they can be removed afterwards.
+"""
+from datetime import time
+from django.utils.timezone import now
+from courses.models import Course, Section, Enrollment
+from courses.seats import reconcile_seats
+from users.models import User
+
+BENCH_PREFIX = "BENCH"
+
+
+def create_bench_section(num_students, label="1"):
+    """Create a section with ``num_students`` enrolled students and 14 sessions."""
+    code = f"{BENCH_PREFIX}{label}"[:10]
+    course = Course.objects.create(code=code, name=f"Benchmark {label}")
+    section = Section.objects.create(
+        course=course,
+        section_type="Lecture",
+        section_number=1,
+        start_date=now().date(),
+        class_time=time(9, 0),
+        max_students=num_students,
+    )
+    # ✅ The 14 class sessions are generated by the Section post_save signal
+
+    users = [
+        User(
+            matric_id=f"B{label}{i:06d}"[:12],
+            email=f"bench{label}.{i}@university.com",
+            personal_email=f"bench{label}.{i}@example.com",
+            first_name="Bench",
+            last_name=str(i),
+            role="Student",
+            first_login=False,
+        )
+        for i in range(num_students)
+    ]
+    for user in users:
+        user.set_unusable_password()
+    User.objects.bulk_create(users, batch_size=1000)
+    students = list(User.objects.filter(matric_id__startswith=f"B{label}", role="Student").order_by("id"))
+    Enrollment.objects.bulk_create(
+        [Enrollment(student=student, section=section) for student in students],
+        batch_size=1000,
+    )
+    reconcile_seats([section.id])  # bulk_create skips the per-row seat reservation
+    section.refresh_from_db()
+    return section, students
+
+
+def cleanup_bench_data(label="1"):
+    """Remove everything created by :func:`create_bench_section`."""
+    Course.objects.filter(code=f"{BENCH_PREFIX}{label}"[:10]).delete()
+    User.objects.filter(matric_id__startswith=f"B{label}", email__startswith="bench").delete()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
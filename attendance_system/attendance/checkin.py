@@ -0,0 +1,248 @@
+"""Buffered QR check-in ingestion.
+
+At the start of a large lecture every student scans within the same minute.
+Instead of one ``get_or_create`` per scan (which races on the
+``('student', 'section', 'week_number')`` unique constraint), scans are pushed
+into a queue and written by a background flusher with one
+``bulk_create(ignore_conflicts=True)`` per flush window.
+
+The student is told their scan was received as soon as it is queued, so the
+queue must survive the worker. The default :class:`DatabaseCheckInQueue`
+appends each scan to the ``PendingCheckIn`` table; a flush drains and writes
+a batch in one transaction, so a worker that crashes, is killed or recycled
+loses nothing and the next flush (in any worker, or ``manage.py
+flush_checkins``) picks the rows up. :class:`LocalCheckInQueue` keeps scans
+in process memory and is only flushed by the flusher thread and an
+``atexit`` hook: scans acknowledged shortly before a crash or ``SIGKILL``
+are lost, so use it for benchmarks and development only.
+"""
+import atexit
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+from users.models import User
+from . import events
+from .models import Attendance, PendingCheckIn
+from .summary import lock_summaries, existing_statuses, apply_status_changes
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "QUEUE_BACKEND": "attendance.checkin.DatabaseCheckInQueue",
+    "MAX_PENDING": 5000,      # Bounded buffer size (LocalCheckInQueue only)
+    "BATCH_SIZE": 500,        # Rows per INSERT statement
+    "FLUSH_INTERVAL": 1.0,    # Seconds between background flushes
+}
+
+
+def get_checkin_setting(name):
+    """Read a value from ``settings.ATTENDANCE_CHECKIN`` falling back to the defaults."""
+    return getattr(settings, "ATTENDANCE_CHECKIN", {}).get(name, DEFAULTS[name])
+
+
+class CheckInQueueFull(Exception):
+    """Raised when the check-in queue cannot accept more scans."""
+
+
+class LocalCheckInQueue:
+    """In-process stand-in for an external queue (Redis list, SQS, ...); not durable.
+
+    Any replacement only needs ``put``, ``drain`` and ``qsize``. ``drain`` is
+    called inside the transaction that writes the batch.
+    """
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            raise CheckInQueueFull()
+
+    def drain(self, limit):
+        """Remove and return up to ``limit`` queued items."""
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class DatabaseCheckInQueue:
+    """Durable queue: scans are appended to ``PendingCheckIn`` and deleted by the flush that writes them."""
+
+    def __init__(self, maxsize=None):
+        self._queued = 0  # Scans queued by this process since its last drain (wakes the flusher early)
+
+    def put(self, item):
+        student_id, section_id, week_number, date, time_checked_in, status = item
+        PendingCheckIn.objects.create(
+            student_id=student_id, section_id=section_id, week_number=week_number,
+            date=date, time_checked_in=time_checked_in, status=status,
+        )
+        self._queued += 1
+
+    def drain(self, limit):
+        """Claim up to ``limit`` pending scans; they stay queued if the surrounding transaction rolls back."""
+        pending = list(
+            PendingCheckIn.objects.select_for_update(skip_locked=True).order_by("id").values_list(
+                "id", "student_id", "section_id", "week_number", "date", "time_checked_in", "status"
+            )[:limit]
+        )
+        PendingCheckIn.objects.filter(id__in=[row[0] for row in pending]).delete()
+        self._queued = 0
+        return [row[1:] for row in pending]
+
+    def qsize(self):
+        return self._queued
+
+
+class CheckInBuffer:
+    """Accepts scans immediately and writes them to the database in batches."""
+
+    def __init__(self, backend=None, batch_size=None, flush_interval=None):
+        self.queue = backend or import_string(get_checkin_setting("QUEUE_BACKEND"))(
+            get_checkin_setting("MAX_PENDING")
+        )
+        self.batch_size = batch_size or get_checkin_setting("BATCH_SIZE")
+        self.flush_interval = flush_interval or get_checkin_setting("FLUSH_INTERVAL")
+        self._flush_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def submit(self, student_id, section_id, week_number, date, time_checked_in, status="Present"):
+        """Queue a check-in. Falls back to a direct insert when the buffer is full."""
+        row = (student_id, section_id, int(week_number), date, time_checked_in, status)
+        try:
+            self.queue.put(row)
+        except CheckInQueueFull:
+            # ✅ Backpressure: write this scan synchronously instead of dropping it
+            self._write([row])
+            return
+
+        self._ensure_flusher()
+        if self.queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write everything currently queued. Returns the number of rows submitted."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                # ✅ Drain and write together: a failed write leaves a durable queue untouched
+                with transaction.atomic():
+                    rows = self.queue.drain(self.batch_size)
+                    if rows:
+                        self._insert(rows)
+                if not rows:
+                    break
+                self._publish(rows)
+                written += len(rows)
+        return written
+
+    def write(self, rows):
+        """Write already-batched rows now, bypassing the queue. Returns how many were new."""
+        return self._write(rows)
+
+    def _write(self, rows):
+        inserted = self._insert(rows)
+        self._publish(rows)
+        return inserted
+
+    def _insert(self, rows):
+        pairs = {(section_id, week_number) for _, section_id, week_number, *_ in rows}
+        with transaction.atomic():
+            lock_summaries(pairs)
+            seen = set(existing_statuses(pairs, {row[0] for row in rows}))
+            self._bulk_insert(rows)
+
+            # ✅ Only rows that were actually inserted count towards the summary
+            changes = []
+            for student_id, section_id, week_number, _, _, status in rows:
+                if (student_id, section_id, week_number) not in seen:
+                    seen.add((student_id, section_id, week_number))
+                    changes.append((section_id, week_number, None, status))
+            apply_status_changes(changes)
+        return len(changes)
+
+    def _bulk_insert(self, rows):
+        Attendance.objects.bulk_create(
+            [
+                Attendance(
+                    student_id=student_id,
+                    section_id=section_id,
+                    week_number=week_number,
+                    date=date,
+                    time_checked_in=time_checked_in,
+                    status=status,
+                )
+                for student_id, section_id, week_number, date, time_checked_in, status in rows
+            ],
+            ignore_conflicts=True,  # ✅ Duplicate scans are dropped by the unique constraint
+        )
+
+    def _publish(self, rows):
+        """Push the batch to lecturers watching the live board (one name lookup per batch)."""
+        watched = [row for row in rows if events.has_subscribers(row[1], row[2])]
+        if not watched:
+            return
+        names = {
+            user["id"]: user
+            for user in User.objects.filter(id__in={row[0] for row in watched}).values(
+                "id", "matric_id", "first_name", "last_name"
+            )
+        }
+        for student_id, section_id, week_number, _, time_checked_in, status in watched:
+            student = names.get(student_id, {})
+            events.publish(section_id, week_number, {
+                "type": "checkin",
+                "student_id": student_id,
+                "matric_id": student.get("matric_id"),
+                "name": f"{student.get('first_name', '')} {student.get('last_name', '')}".strip(),
+                "time": time_checked_in.strftime("%H:%M:%S"),
+                "status": status,
+            })
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="checkin-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered check-ins")
+            finally:
+                close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_checkin_buffer():
+    """Return the process-wide check-in buffer."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = CheckInBuffer()
+                atexit.register(_buffer.flush)
+    return _buffer
@@ -0,0 +1,93 @@
+"""Publish/subscribe fan-out for live attendance events.
+
+Check-ins and face recognition window changes are published once per
+section/week channel and pushed to every lecturer page subscribed to it
+through the Server-Sent Events stream in ``attendance.views``. Publishing
+happens from synchronous code (views, the check-in flusher thread) while
+subscribers live on the ASGI event loop, so events are handed over with
+``call_soon_threadsafe``.
+
+The backend is chosen with ``settings.ATTENDANCE_EVENTS_BACKEND``. The
+default broker only fans out within one process; a multi-process deployment
+can swap in a Redis pub/sub implementation of the same interface
+(``publish``, ``subscribe``, ``unsubscribe``, ``has_subscribers``).
+"""
+import asyncio
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def channel_name(section_id, week_number):
+    return f"section:{section_id}:week:{week_number}"
+
+
+class InProcessBroker:
+    """Fans events out to asyncio queues registered in this process."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Register a subscriber on the running event loop and return its queue."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def has_subscribers(self, channel):
+        return bool(self._subscribers.get(channel))
+
+    def publish(self, channel, event):
+        """Deliver ``event`` to every subscriber of ``channel``. Safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # ✅ The subscriber's loop has already shut down
+                self.unsubscribe(channel, (loop, queue))
+
+
+def _offer(queue, event):
+    """Drop events for subscribers that are too slow to keep up."""
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide event broker."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(
+                    getattr(settings, "ATTENDANCE_EVENTS_BACKEND", "attendance.events.InProcessBroker")
+                )()
+    return _broker
+
+
+def publish(section_id, week_number, event):
+    get_broker().publish(channel_name(section_id, week_number), event)
+
+
+def has_subscribers(section_id, week_number):
+    return get_broker().has_subscribers(channel_name(section_id, week_number))
@@ -0,0 +1,215 @@
+"""Streaming attendance exports (CSV, gzip-compressed CSV and XLSX).
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` over ``values_list``
+tuples and written out as they arrive, so memory use does not depend on how
+many attendance rows an export covers. The pivoted layout relies on the rows
+being ordered by section and student, so each output line can be emitted as
+soon as the next student starts.
+"""
+import csv
+import re
+import tempfile
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+from .models import Attendance
+
+CHUNK_SIZE = 2000
+WEEKS = range(1, 15)
+
+ROW_HEADER = ["Course", "Section", "Matric ID", "First Name", "Last Name", "Week", "Date", "Time Checked In", "Status"]
+PIVOT_HEADER = ["Course", "Section", "Matric ID", "First Name", "Last Name"] + [f"Week {week}" for week in WEEKS]
+
+
+def export_rows(records, chunk_size=CHUNK_SIZE):
+    """One output row per attendance record."""
+    yield ROW_HEADER
+    for course, section_type, section_number, matric_id, first_name, last_name, week, day, checked_in, status in (
+        records.order_by("section_id", "week_number", "student_id").values_list(
+            "section__course__code", "section__section_type", "section__section_number",
+            "student__matric_id", "student__first_name", "student__last_name",
+            "week_number", "date", "time_checked_in", "status",
+        ).iterator(chunk_size=chunk_size)
+    ):
+        yield [
+            course, f"{section_type} {section_number}", matric_id, first_name, last_name,
+            week, day.isoformat(), checked_in.strftime("%H:%M:%S") if checked_in else "", status,
+        ]
+
+
+def export_pivot(records, chunk_size=CHUNK_SIZE):
+    """One output row per student per section with a column for each week."""
+    yield PIVOT_HEADER
+    current_key, current_row, weeks = None, None, {}
+    for section_id, student_id, course, section_type, section_number, matric_id, first_name, last_name, week, status in (
+        records.order_by("section_id", "student_id", "week_number").values_list(
+            "section_id", "student_id",
+            "section__course__code", "section__section_type", "section__section_number",
+            "student__matric_id", "student__first_name", "student__last_name",
+            "week_number", "status",
+        ).iterator(chunk_size=chunk_size)
+    ):
+        if (section_id, student_id) != current_key:
+            if current_row:
+                yield current_row + [weeks.get(week, "") for week in WEEKS]
+            current_key = (section_id, student_id)
+            current_row = [course, f"{section_type} {section_number}", matric_id, first_name, last_name]
+            weeks = {}
+        weeks[week] = status
+    if current_row:
+        yield current_row + [weeks.get(week, "") for week in WEEKS]
+
+
+class _Echo:
+    """File-like object that hands back what ``csv.writer`` writes to it."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheet apps evaluate text cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """Quote text that a spreadsheet would run as a formula (a name like ``=HYPERLINK(...)``)."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row]).encode("utf-8")
+
+
+def stream_gzip(chunks, flush_every=64 * 1024):
+    """Gzip a byte stream on the fly, emitting compressed blocks as they fill up."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    pending = 0
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        pending += len(chunk)
+        if compressed:
+            yield compressed
+        if pending >= flush_every:
+            flushed = compressor.flush(zlib.Z_SYNC_FLUSH)
+            if flushed:
+                yield flushed
+            pending = 0
+    yield compressor.flush()
+
+
+def _column_name(index):
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+# Characters XML 1.0 does not allow even when escaped; Excel refuses a workbook containing one
+XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def _xlsx_cell(reference, value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    return f'<c r="{reference}" t="inlineStr"><is><t>{escape(XML_INVALID.sub("", str(value)))}</t></is></c>'
+
+
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Attendance" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def stream_xlsx(rows, read_size=64 * 1024):
+    """Write a single-sheet XLSX workbook and stream it back.
+
+    A zip archive can only be finalized once all rows are written, so the
+    workbook is spooled to a temporary file (in memory while small, on disk
+    afterwards) and then streamed in fixed-size blocks.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        with zipfile.ZipFile(spool, "w", zipfile.ZIP_DEFLATED) as workbook:
+            for name, content in XLSX_PARTS.items():
+                workbook.writestr(name, content)
+            with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                for row_number, row in enumerate(rows, start=1):
+                    cells = "".join(
+                        _xlsx_cell(f"{_column_name(column)}{row_number}", value)
+                        for column, value in enumerate(row)
+                    )
+                    sheet.write(f'<row r="{row_number}">{cells}</row>'.encode("utf-8"))
+                sheet.write(b"</sheetData></worksheet>")
+
+        spool.seek(0)
+        while True:
+            block = spool.read(read_size)
+            if not block:
+                break
+            yield block
+
+
+def build_export(records, layout="rows", file_format="csv", compress=False):
+    """Return ``(chunks, content_type, extension)`` for an attendance export."""
+    rows = export_pivot(records) if layout == "pivot" else export_rows(records)
+    if file_format == "xlsx":
+        return stream_xlsx(rows), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"
+    chunks = stream_csv(rows)
+    if compress:
+        return stream_gzip(chunks), "application/gzip", "csv.gz"
+    return chunks, "text/csv", "csv"
+
+
+def scoped_records(user=None, section_ids=None, date_from=None, date_to=None):
+    """Attendance records an export may include, optionally narrowed to sections and a date range."""
+    records = Attendance.objects.all()
+    if user is not None and user.role == "Lecturer":
+        records = records.filter(section__lecturer=user)
+    if section_ids:
+        records = records.filter(section_id__in=section_ids)
+    if date_from:
+        records = records.filter(date__gte=date_from)
+    if date_to:
+        records = records.filter(date__lte=date_to)
+    return records
@@ -0,0 +1,253 @@
+"""Face recognition for the per-week recognition window.
+
+While a lecturer has the window open (:class:`~attendance.models.FaceRecognitionStatus`),
+camera frames are posted to ``face_recognition_frame``. Every face in the
+frame is turned into an embedding by the configured extractor and matched
+against the section's *gallery*: the embeddings of all enrolled students,
+loaded with one query into a single contiguous ``(students, dim)`` float32
+matrix and kept in process memory for ``GALLERY_TTL`` seconds. Because the
+vectors are L2-normalized, one matrix product gives the cosine similarity of
+every face against every student, and one ``argmax`` picks the best student
+per face. Matches above the threshold are written in one bulk insert through
+the check-in write path, so the summary counts and the live board update the
+same way as for QR check-ins.
+
+Extractors are pluggable (``FACE_RECOGNITION['EXTRACTOR']``). An extractor
+has a ``name``, a ``dim``, a default ``threshold`` and ``embed(image)``,
+which returns one row per face found in the image.
+
+NumPy is imported on first use, so a deployment without it only loses this
+feature (the endpoint answers 503) instead of failing to load the URLconf.
+"""
+import hashlib
+import io
+import threading
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+from courses.models import ClassSession
+from .checkin import get_checkin_buffer
+from .models import FaceEmbedding, FaceRecognitionStatus
+
+DEFAULTS = {
+    "EXTRACTOR": "attendance.face.FaceRecognitionExtractor",
+    "THRESHOLD": None,        # Minimum cosine similarity (None = the extractor's default)
+    "GALLERY_TTL": 60,        # Seconds a section's embedding matrix stays in process memory
+}
+
+Gallery = namedtuple("Gallery", ["student_ids", "matrix"])
+Match = namedtuple("Match", ["student_id", "score"])
+RecognitionResult = namedtuple("RecognitionResult", ["faces", "matches", "recorded"])
+
+
+def get_face_setting(name):
+    """Read a value from ``settings.FACE_RECOGNITION`` falling back to the defaults."""
+    return getattr(settings, "FACE_RECOGNITION", {}).get(name, DEFAULTS[name])
+
+
+class FaceRecognitionClosed(Exception):
+    """Raised when a frame arrives while the week's recognition window is not open."""
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImproperlyConfigured("NumPy is required for face recognition attendance.")
+    return numpy
+
+
+def normalize(vectors):
+    """Return ``vectors`` as a C-contiguous float32 matrix with unit-length rows."""
+    np = _numpy()
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.ascontiguousarray(vectors / np.maximum(norms, 1e-12))
+
+
+class DeterministicExtractor:
+    """CPU stand-in for tests and benchmarks; no image decoding or model needed.
+
+    A "frame" is UTF-8 text with one face label (e.g. a matric ID) per line or
+    separated by commas. Each label always maps to the same random unit
+    vector, so registering ``b"S0000001"`` and later posting a frame that
+    contains ``S0000001`` yields a match with similarity 1.0, while unrelated
+    labels score close to 0.
+    """
+
+    name = "deterministic"
+    threshold = 0.8
+
+    def __init__(self, dim=128):
+        self.dim = dim
+
+    def vector(self, label):
+        np = _numpy()
+        seed = int.from_bytes(hashlib.sha256(label.encode()).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+
+    def embed(self, image):
+        np = _numpy()
+        try:
+            text = image.decode() if isinstance(image, bytes) else image
+        except UnicodeDecodeError:
+            raise ValueError("Frame is not a list of face labels.")
+        labels = [label.strip() for label in text.replace(",", "\n").splitlines() if label.strip()]
+        if not labels:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return normalize([self.vector(label) for label in labels])
+
+
+class FaceRecognitionExtractor:
+    """128-d dlib embeddings through the ``face_recognition`` package."""
+
+    name = "face_recognition"
+    dim = 128
+    threshold = 0.82  # ≈ the library's 0.6 euclidean tolerance for unit vectors
+
+    def __init__(self):
+        try:
+            import face_recognition
+        except ImportError:
+            raise ImproperlyConfigured("The face_recognition package is required for face recognition attendance.")
+        self.face_recognition = face_recognition
+
+    def embed(self, image):
+        np = _numpy()
+        try:
+            pixels = self.face_recognition.load_image_file(io.BytesIO(image))
+        except Exception:
+            raise ValueError("Frame is not a readable image.")
+        encodings = self.face_recognition.face_encodings(pixels)
+        if not encodings:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return normalize(encodings)
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_extractor():
+    """Return the process-wide extractor configured in ``FACE_RECOGNITION['EXTRACTOR']``."""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = import_string(get_face_setting("EXTRACTOR"))()
+    return _extractor
+
+
+def get_threshold(extractor):
+    threshold = get_face_setting("THRESHOLD")
+    return extractor.threshold if threshold is None else threshold
+
+
+_galleries = {}
+_galleries_lock = threading.Lock()
+
+
+def build_gallery(section_id, extractor):
+    """Load the section's enrolled embeddings as one contiguous matrix (one query)."""
+    np = _numpy()
+    rows = list(
+        FaceEmbedding.objects.filter(
+            student__enrollment__section_id=section_id, extractor=extractor.name, dim=extractor.dim
+        ).order_by("student_id").values_list("student_id", "vector")
+    )
+    if not rows:
+        return Gallery(np.empty(0, dtype=np.int64), np.empty((0, extractor.dim), dtype=np.float32))
+    student_ids, vectors = zip(*rows)
+    matrix = np.frombuffer(b"".join(bytes(vector) for vector in vectors), dtype=np.float32)
+    return Gallery(np.array(student_ids, dtype=np.int64), matrix.reshape(len(rows), extractor.dim))
+
+
+def load_gallery(section_id, extractor=None):
+    """Cached :func:`build_gallery`; rebuilt after ``GALLERY_TTL`` seconds."""
+    extractor = extractor or get_extractor()
+    key = (section_id, extractor.name, extractor.dim)
+    cached = _galleries.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    gallery = build_gallery(section_id, extractor)
+    with _galleries_lock:
+        _galleries[key] = (time.monotonic() + get_face_setting("GALLERY_TTL"), gallery)
+    return gallery
+
+
+def invalidate_galleries():
+    """Drop every cached gallery in this process (other processes expire by TTL)."""
+    with _galleries_lock:
+        _galleries.clear()
+
+
+@receiver(setting_changed)
+def reset_face_recognition(setting, **kwargs):
+    """Pick up a changed ``FACE_RECOGNITION`` setting (e.g. ``override_settings`` in tests)."""
+    global _extractor
+    if setting == "FACE_RECOGNITION":
+        _extractor = None
+        invalidate_galleries()
+
+
+def match(gallery, probes, threshold):
+    """Match every probe against the gallery at once.
+
+    Returns one :class:`Match` per student whose best face scored at least
+    ``threshold``, highest score first. A student seen twice in a frame is
+    counted once.
+    """
+    np = _numpy()
+    if not len(gallery.student_ids) or not len(probes):
+        return []
+    scores = probes @ gallery.matrix.T                      # (faces, students) cosine similarities
+    best = scores.argmax(axis=1)
+    best_scores = scores[np.arange(len(probes)), best]
+
+    order = np.argsort(-best_scores)
+    order = order[best_scores[order] >= threshold]
+    _, first = np.unique(best[order], return_index=True)    # Keep each student's highest-scoring face
+    order = order[np.sort(first)]
+    return [Match(int(gallery.student_ids[best[i]]), float(best_scores[i])) for i in order]
+
+
+def register_face(student, image, extractor=None):
+    """Store the embedding of the single face in ``image`` for ``student``."""
+    extractor = extractor or get_extractor()
+    vectors = extractor.embed(image)
+    if len(vectors) != 1:
+        raise ValueError(f"Expected exactly one face, found {len(vectors)}.")
+    embedding, _ = FaceEmbedding.objects.update_or_create(
+        student=student,
+        defaults={"extractor": extractor.name, "dim": extractor.dim, "vector": vectors[0].tobytes()},
+    )
+    invalidate_galleries()
+    return embedding
+
+
+def recognize_frame(section, week_number, image, extractor=None, at=None):
+    """Match the faces in one frame and record attendance for the recognized students."""
+    status = FaceRecognitionStatus.objects.filter(section=section, week_number=week_number).first()
+    if status is None or not status.is_active(at):
+        raise FaceRecognitionClosed("Face recognition is not enabled for this week.")
+
+    extractor = extractor or get_extractor()
+    probes = extractor.embed(image)
+    matches = match(load_gallery(section.id, extractor), probes, get_threshold(extractor))
+    if not matches:
+        return RecognitionResult(len(probes), [], 0)
+
+    checked_in = at or now()
+    session_date = ClassSession.objects.filter(
+        section=section, week_number=week_number
+    ).values_list("date", flat=True).first() or checked_in.date()
+    recorded = get_checkin_buffer().write([
+        (m.student_id, section.id, int(week_number), session_date, checked_in.time(), "Present") for m in matches
+    ])
+    return RecognitionResult(len(probes), matches, recorded)
@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, IntegrityError
+from django.utils.timezone import now
+from attendance.benchmarking import create_bench_section, cleanup_bench_data, percentile
+from attendance.checkin import CheckInBuffer
+from attendance.models import Attendance
+
+
+class Command(BaseCommand):
+    help = 'Simulate a class-start QR check-in burst and report p50/p99 latency and rows/sec'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=400, help='Number of students scanning')
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent request threads')
+        parser.add_argument('--legacy', action='store_true', help='Also run the per-scan get_or_create path')
+
+    def handle(self, *args, **kwargs):
+        students_count = kwargs['students']
+        workers = kwargs['workers']
+
+        cleanup_bench_data()
+        section, students = create_bench_section(students_count)
+        session = section.sessions.get(week_number=1)
+
+        try:
+            buffer = CheckInBuffer()
+
+            def buffered_scan(student):
+                started = time.perf_counter()
+                buffer.submit(student.id, section.id, 1, session.date, now().time())
+                return time.perf_counter() - started
+
+            self._report('buffered', buffered_scan, students, workers, flush=buffer.flush)
+            Attendance.objects.filter(section=section).delete()
+
+            if kwargs['legacy']:
+                def legacy_scan(student):
+                    started = time.perf_counter()
+                    try:
+                        Attendance.objects.get_or_create(
+                            student=student, section=section, date=session.date, week_number=1,
+                            defaults={"time_checked_in": now().time(), "status": "Present"},
+                        )
+                    except IntegrityError:
+                        pass
+                    finally:
+                        close_old_connections()
+                    return time.perf_counter() - started
+
+                self._report('get_or_create', legacy_scan, students, workers)
+        finally:
+            cleanup_bench_data()
+
+    def _report(self, label, scan, students, workers, flush=None):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(scan, students))
+        if flush:
+            flush()
+        elapsed = time.perf_counter() - started
+
+        rows = Attendance.objects.filter(section__course__code__startswith='BENCH').count()
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {len(students)} scans, {rows} rows written, "
+            f"p50={percentile(latencies, 50) * 1000:.2f}ms "
+            f"p99={percentile(latencies, 99) * 1000:.2f}ms "
+            f"{rows / elapsed:.0f} rows/sec"
+        ))
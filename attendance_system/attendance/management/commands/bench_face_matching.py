@@ -0,0 +1,99 @@
+import random
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from attendance.benchmarking import create_bench_section, cleanup_bench_data, percentile
+from attendance.face import DeterministicExtractor, build_gallery, match, recognize_frame
+from attendance.models import Attendance, FaceEmbedding, FaceRecognitionStatus
+
+
+def _comma_separated(value):
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-section face matching (gallery load, ms/frame) with the deterministic extractor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=_comma_separated, default=[50, 200, 1000], help='Section sizes, e.g. 50,200,1000')
+        parser.add_argument('--faces', type=_comma_separated, default=[1, 5, 20], help='Faces per frame, e.g. 1,5,20')
+        parser.add_argument('--frames', type=int, default=50, help='Frames matched per size/faces combination')
+        parser.add_argument('--dim', type=int, default=128, help='Embedding dimension')
+        parser.add_argument('--naive', action='store_true', help='Also time a per-face, per-student Python loop')
+
+    def handle(self, *args, **kwargs):
+        extractor = DeterministicExtractor(kwargs['dim'])
+        rng = random.Random(0)
+
+        for size in kwargs['sizes']:
+            label = f"F{size}"
+            cleanup_bench_data(label)
+            section, students = create_bench_section(size, label)
+            try:
+                FaceEmbedding.objects.bulk_create([
+                    FaceEmbedding(
+                        student=student, extractor=extractor.name, dim=extractor.dim,
+                        vector=extractor.embed(student.matric_id)[0].tobytes(),
+                    )
+                    for student in students
+                ], batch_size=1000)
+
+                started = time.perf_counter()
+                gallery = build_gallery(section.id, extractor)
+                load_ms = (time.perf_counter() - started) * 1000
+                self.stdout.write(f"{size} students: gallery {gallery.matrix.shape} loaded in {load_ms:.1f}ms")
+
+                for faces in kwargs['faces']:
+                    self._bench(extractor, gallery, students, faces, kwargs['frames'], kwargs['naive'], rng)
+
+                self._end_to_end(section, extractor, students, max(kwargs['faces']), rng)
+            finally:
+                cleanup_bench_data(label)
+
+    def _frames(self, extractor, students, faces, count, rng):
+        """Frames of known students plus one stranger, as (expected student IDs, probes)."""
+        frames = []
+        for _ in range(count):
+            known = rng.sample(students, min(faces - 1, len(students))) if faces > 1 else [rng.choice(students)]
+            labels = [student.matric_id for student in known] + (["stranger"] if faces > 1 else [])
+            frames.append(({student.id for student in known}, extractor.embed("\n".join(labels))))
+        return frames
+
+    def _bench(self, extractor, gallery, students, faces, count, naive, rng):
+        frames = self._frames(extractor, students, faces, count, rng)
+        latencies, correct = [], 0
+        for expected, probes in frames:
+            started = time.perf_counter()
+            matches = match(gallery, probes, extractor.threshold)
+            latencies.append(time.perf_counter() - started)
+            correct += len(expected & {m.student_id for m in matches}) == len(expected) == len(matches)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"  {faces} face(s)/frame: p50={percentile(latencies, 50) * 1000:.3f}ms "
+            f"p99={percentile(latencies, 99) * 1000:.3f}ms "
+            f"{faces * len(frames) / sum(latencies):.0f} faces/sec, {correct}/{len(frames)} frames matched exactly"
+        ))
+
+        if naive:
+            rows = [(int(student_id), vector) for student_id, vector in zip(gallery.student_ids, gallery.matrix)]
+            started = time.perf_counter()
+            for _, probes in frames:
+                for probe in probes:
+                    max(rows, key=lambda row: float(np.dot(probe, row[1])))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"    naive loop: {elapsed / len(frames) * 1000:.3f}ms/frame")
+
+    def _end_to_end(self, section, extractor, students, faces, rng):
+        """One frame through recognize_frame, including the bulk attendance insert."""
+        FaceRecognitionStatus.objects.update_or_create(
+            section=section, week_number=1, defaults={"is_enabled": True, "enabled_at": now()}
+        )
+        labels = [student.matric_id for student in rng.sample(students, min(faces, len(students)))]
+        started = time.perf_counter()
+        result = recognize_frame(section, 1, "\n".join(labels).encode(), extractor=extractor)
+        elapsed = (time.perf_counter() - started) * 1000
+        rows = Attendance.objects.filter(section=section, week_number=1).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"  recognize_frame: {result.faces} face(s), {result.recorded} recorded ({rows} rows) in {elapsed:.1f}ms"
+        ))
@@ -0,0 +1,48 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from attendance.benchmarking import create_bench_section, cleanup_bench_data
+from attendance.models import Attendance
+from attendance.services import mark_attendance_bulk
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-student update_or_create loop with the bulk upsert used by manual attendance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 2000], help='Section sizes to test')
+
+    def handle(self, *args, **kwargs):
+        for size in kwargs['sizes']:
+            cleanup_bench_data()
+            section, students = create_bench_section(size)
+            statuses = {student.id: ('Present' if i % 3 else 'Late') for i, student in enumerate(students)}
+
+            try:
+                def legacy():
+                    for student in students:
+                        Attendance.objects.update_or_create(
+                            student=student, section=section, week_number=1,
+                            defaults={"status": statuses[student.id], "date": now().date()}
+                        )
+
+                def bulk():
+                    mark_attendance_bulk(section, 1, statuses)
+
+                for label, run in (('update_or_create loop', legacy), ('bulk upsert', bulk)):
+                    # ✅ Measure both the insert and the update case
+                    for phase in ('insert', 'update'):
+                        if phase == 'insert':
+                            Attendance.objects.filter(section=section).delete()
+                        with CaptureQueriesContext(connection) as queries:
+                            started = time.perf_counter()
+                            run()
+                            elapsed = time.perf_counter() - started
+                        self.stdout.write(
+                            f"{size:>5} students | {label:<21} | {phase:<6} | "
+                            f"{elapsed * 1000:9.1f} ms | {len(queries):>5} queries"
+                        )
+            finally:
+                cleanup_bench_data()
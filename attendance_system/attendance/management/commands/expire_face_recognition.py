@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from attendance.models import FaceRecognitionStatus
+
+
+class Command(BaseCommand):
+    help = 'Close face recognition windows that have passed their configured duration'
+
+    def handle(self, *args, **kwargs):
+        # ✅ One bulk UPDATE; reads already treat these windows as closed
+        expired = FaceRecognitionStatus.objects.expired().update(is_enabled=False, enabled_at=None)
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} face recognition window(s)"))
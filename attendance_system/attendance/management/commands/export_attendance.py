@@ -0,0 +1,40 @@
+import sys
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from attendance.exports import build_export, scoped_records
+
+
+class Command(BaseCommand):
+    help = 'Stream an attendance export (CSV, gzipped CSV or XLSX) to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', type=int, nargs='*', help='Section IDs to include (default: all)')
+        parser.add_argument('--from', dest='date_from', type=date.fromisoformat, help='First date (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', type=date.fromisoformat, help='Last date (YYYY-MM-DD)')
+        parser.add_argument('--pivot', action='store_true', help='One row per student with a column per week')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv', help='Output format')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the CSV output')
+        parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['format'] == 'xlsx' and kwargs['gzip']:
+            raise CommandError("--gzip only applies to CSV output")
+        if kwargs['format'] == 'xlsx' and not kwargs['output']:
+            raise CommandError("XLSX output needs --output")
+
+        records = scoped_records(None, kwargs['section'], kwargs['date_from'], kwargs['date_to'])
+        chunks, _, _ = build_export(
+            records,
+            layout='pivot' if kwargs['pivot'] else 'rows',
+            file_format=kwargs['format'],
+            compress=kwargs['gzip'],
+        )
+
+        if kwargs['output']:
+            with open(kwargs['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Attendance exported to {kwargs['output']}"))
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from attendance.checkin import get_checkin_buffer
+
+
+class Command(BaseCommand):
+    help = 'Write queued QR check-ins now (e.g. scans left behind by a worker that stopped before flushing)'
+
+    def handle(self, *args, **kwargs):
+        written = get_checkin_buffer().flush()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {written} queued check-in(s)"))
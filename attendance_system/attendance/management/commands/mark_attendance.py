@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ValidationError
+from courses.models import Section
+from users.models import User
+from attendance.services import mark_attendance_bulk
+
+
+class Command(BaseCommand):
+    help = 'Mark attendance for a whole section and week in one transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('section_id', type=int, help='ID of the section')
+        parser.add_argument('week_number', type=int, help='Week number to mark')
+        parser.add_argument('--present', nargs='*', default=[], help='Matric IDs to mark Present')
+        parser.add_argument('--late', nargs='*', default=[], help='Matric IDs to mark Late')
+        parser.add_argument('--absent', nargs='*', default=[], help='Matric IDs to mark Absent')
+        parser.add_argument('--default', default='Absent', help='Status for enrolled students not listed')
+
+    def handle(self, *args, **kwargs):
+        try:
+            section = Section.objects.get(id=kwargs['section_id'])
+        except Section.DoesNotExist:
+            raise CommandError(f"Section {kwargs['section_id']} does not exist")
+
+        by_status = {'Present': kwargs['present'], 'Late': kwargs['late'], 'Absent': kwargs['absent']}
+        matric_ids = [matric_id for ids in by_status.values() for matric_id in ids]
+        student_ids = dict(User.objects.filter(matric_id__in=matric_ids).values_list('matric_id', 'id'))
+
+        unknown = set(matric_ids) - set(student_ids)
+        if unknown:
+            raise CommandError(f"Unknown matric IDs: {', '.join(sorted(unknown))}")
+
+        statuses = {
+            student_ids[matric_id]: status
+            for status, ids in by_status.items()
+            for matric_id in ids
+        }
+
+        try:
+            updated = mark_attendance_bulk(section, kwargs['week_number'], statuses, default_status=kwargs['default'])
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked attendance for {updated} students in {section} (Week {kwargs['week_number']})"
+        ))
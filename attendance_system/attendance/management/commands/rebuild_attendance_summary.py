@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from attendance.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-section/week attendance summary table from the attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', type=int, nargs='*', help='Only rebuild these section IDs')
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_summaries(kwargs['section'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} attendance summary row(s)"))
@@ -0,0 +1,36 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from attendance.face import register_face
+from users.models import User
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png'}
+
+
+class Command(BaseCommand):
+    help = 'Store face embeddings from a directory of photos named <matric_id>.jpg/.png'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory with one photo per student')
+
+    def handle(self, *args, **kwargs):
+        directory = Path(kwargs['directory'])
+        if not directory.is_dir():
+            raise CommandError(f"{directory} is not a directory.")
+
+        photos = {path.stem.upper(): path for path in directory.iterdir() if path.suffix.lower() in IMAGE_SUFFIXES}
+        students = User.objects.filter(role='Student', matric_id__in=photos).in_bulk(field_name='matric_id')
+
+        registered = 0
+        for matric_id, path in sorted(photos.items()):
+            student = students.get(matric_id)
+            if student is None:
+                self.stderr.write(f"{path.name}: no student with matric ID {matric_id}")
+                continue
+            try:
+                register_face(student, path.read_bytes())
+            except ValueError as e:
+                self.stderr.write(f"{path.name}: {e}")
+                continue
+            registered += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Registered {registered} of {len(photos)} face(s)."))
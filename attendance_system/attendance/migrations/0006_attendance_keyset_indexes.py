@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_alter_facerecognitionstatus_week_number'),
+        ('courses', '0012_alter_classsession_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', '-date', '-id'], name='attendance_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['section', '-date', '-id'], name='attendance_section_date_idx'),
+        ),
+    ]
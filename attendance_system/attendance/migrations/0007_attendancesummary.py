@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_keyset_indexes'),
+        ('courses', '0012_alter_classsession_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_number', models.IntegerField()),
+                ('present', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='courses.section')),
+            ],
+            options={
+                'unique_together': {('section', 'week_number')},
+            },
+        ),
+    ]
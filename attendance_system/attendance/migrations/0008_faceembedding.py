@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_attendancesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('extractor', models.CharField(max_length=100)),
+                ('dim', models.PositiveSmallIntegerField()),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(limit_choices_to={'role': 'Student'}, on_delete=django.db.models.deletion.CASCADE, related_name='face_embedding', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_faceembedding'),
+        ('courses', '0018_waitlist_paired_section'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingCheckIn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_number', models.IntegerField()),
+                ('date', models.DateField()),
+                ('time_checked_in', models.TimeField()),
+                ('status', models.CharField(default='Present', max_length=10)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='courses.section')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.conf import settings
 from users.models import User
 from courses.models import Section
 from django.utils.timezone import now
@@ -22,10 +23,63 @@ class Attendance(models.Model):
 
     class Meta:
         unique_together = ('student', 'section', 'week_number')  # ✅ Prevent duplicate records per week
+        indexes = [
+            # ✅ Keyset pagination of attendance records, newest first
+            models.Index(fields=['student', '-date', '-id'], name='attendance_student_date_idx'),
+            models.Index(fields=['section', '-date', '-id'], name='attendance_section_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.first_name} - {self.section} (Week {self.week_number}, {self.date})"
 
+class AttendanceSummary(models.Model):
+    """Denormalized Present/Late/Absent counts per section per week.
+
+    Kept up to date by the attendance write paths (see ``attendance/summary.py``)
+    and recomputable with ``manage.py rebuild_attendance_summary``.
+    """
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="attendance_summaries")
+    week_number = models.IntegerField()
+    present = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=now)
+
+    class Meta:
+        unique_together = ('section', 'week_number')
+
+    @property
+    def total(self):
+        return self.present + self.late + self.absent
+
+    def __str__(self):
+        return f"{self.section} (Week {self.week_number}): {self.present} present, {self.late} late, {self.absent} absent"
+
+class PendingCheckIn(models.Model):
+    """Accepted QR scan waiting to be written as an :class:`Attendance` row (see ``attendance/checkin.py``).
+
+    A plain append with no unique constraint, so concurrent scans never race;
+    the flusher moves them into ``Attendance`` in batches.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE)
+    section = models.ForeignKey(Section, on_delete=models.CASCADE)
+    week_number = models.IntegerField()
+    date = models.DateField()
+    time_checked_in = models.TimeField()
+    status = models.CharField(max_length=10, default='Present')
+
+    def __str__(self):
+        return f"Pending check-in of {self.student_id} for section {self.section_id} (Week {self.week_number})"
+
+def get_face_recognition_window():
+    """How long a face recognition window stays open after a lecturer enables it."""
+    return timedelta(seconds=getattr(settings, "FACE_RECOGNITION_WINDOW_SECONDS", 60))
+
+class FaceRecognitionStatusQuerySet(models.QuerySet):
+    def expired(self, at=None):
+        """Rows still flagged as enabled whose window has already closed."""
+        return self.filter(is_enabled=True, enabled_at__lt=(at or now()) - get_face_recognition_window())
+
 class FaceRecognitionStatus(models.Model):
     """Tracks the Face Recognition status for each section per week"""
     section = models.ForeignKey(Section, on_delete=models.CASCADE)
@@ -33,16 +87,32 @@ class FaceRecognitionStatus(models.Model):
     is_enabled = models.BooleanField(default=False)
     enabled_at = models.DateTimeField(null=True, blank=True)
 
+    objects = FaceRecognitionStatusQuerySet.as_manager()
+
     class Meta:
         unique_together = ('section', 'week_number')  # ✅ Ensure one entry per week
 
-    def auto_disable(self):
-        """Automatically disable Face Recognition if more than 1 minute has passed"""
-        if self.is_enabled and self.enabled_at:
-            if now() - self.enabled_at > timedelta(minutes=1):  
-                self.is_enabled = False
-                self.enabled_at = None
-                self.save()
+    def is_active(self, at=None):
+        """Whether the window is open, computed at read time (no write needed to expire it)"""
+        return bool(
+            self.is_enabled and self.enabled_at
+            and (at or now()) - self.enabled_at <= get_face_recognition_window()
+        )
+
+    def __str__(self):
+        return f"Face Recognition {'Enabled' if self.is_active() else 'Disabled'} - {self.section} (Week {self.week_number})"
+
+class FaceEmbedding(models.Model):
+    """A student's face embedding used by the recognition window (see ``attendance/face.py``).
+
+    ``vector`` holds ``dim`` L2-normalized float32 values. Embeddings from
+    different extractors are not comparable, so the extractor is recorded too.
+    """
+    student = models.OneToOneField(User, on_delete=models.CASCADE, related_name="face_embedding", limit_choices_to={'role': 'Student'})
+    extractor = models.CharField(max_length=100)
+    dim = models.PositiveSmallIntegerField()
+    vector = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Face Recognition {'Enabled' if self.is_enabled else 'Disabled'} - {self.section} (Week {self.week_number})"
+        return f"Face embedding - {self.student.matric_id} ({self.extractor}, {self.dim}d)"
@@ -0,0 +1,52 @@
+"""Keyset (cursor) pagination on ``(date, id)`` for attendance listings.
+
+Unlike OFFSET pagination, each page is a bounded index range scan, so the
+cost of a page does not grow with how far into the data the reader is.
+"""
+from datetime import date
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(record):
+    return f"{record.date.isoformat()}.{record.id}"
+
+
+def decode_cursor(cursor):
+    """Return ``(date, id)`` or ``None`` for a missing or malformed cursor."""
+    try:
+        day, record_id = cursor.split(".")
+        return date.fromisoformat(day), int(record_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_id(value):
+    """A plain ASCII decimal query parameter as ``int``, otherwise ``None``.
+
+    ``str.isdigit`` is not enough: it accepts characters such as "²" that ``int`` rejects.
+    """
+    value = (value or "").strip()
+    return int(value) if value.isascii() and value.isdecimal() else None
+
+
+def get_page_size(value):
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def paginate_by_date(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Return ``(records, next_cursor)`` for the page after ``cursor``, newest first."""
+    position = decode_cursor(cursor)
+    if position:
+        day, record_id = position
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, id__lt=record_id))
+
+    # ✅ Fetch one extra row to know whether another page exists
+    records = list(queryset.order_by("-date", "-id")[:page_size + 1])
+    next_cursor = encode_cursor(records[page_size - 1]) if len(records) > page_size else None
+    return records[:page_size], next_cursor
@@ -0,0 +1,53 @@
+"""Attendance write paths shared by views, management commands and JSON endpoints."""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.timezone import now
+from courses.roster import get_roster
+from .models import Attendance
+from .summary import lock_summaries, existing_statuses, apply_status_changes
+
+VALID_STATUSES = {choice for choice, _ in Attendance.STATUS_CHOICES}
+
+
+def mark_attendance_bulk(section, week_number, statuses, default_status="Absent", date=None):
+    """Mark attendance for every student enrolled in ``section`` in one statement.
+
+    ``statuses`` maps student IDs to a status; enrolled students missing from it
+    get ``default_status``. Rows are inserted or updated with a single
+    ``INSERT ... ON CONFLICT DO UPDATE`` inside one transaction. Returns the
+    number of rows written.
+    """
+    statuses = {int(student_id): status for student_id, status in statuses.items()}
+    invalid = {
+        str(status) for status in [*statuses.values(), default_status]
+        if not isinstance(status, str) or status not in VALID_STATUSES
+    }
+    if invalid:
+        raise ValidationError(f"Invalid attendance status: {', '.join(sorted(invalid))}.")
+
+    date = date or now().date()
+    rows = [
+        Attendance(
+            student_id=student_id,
+            section_id=section.id,
+            week_number=int(week_number),
+            date=date,
+            status=statuses.get(student_id, default_status),
+        )
+        for student_id in get_roster(section.id)
+    ]
+
+    with transaction.atomic():
+        lock_summaries([(section.id, int(week_number))])
+        previous = existing_statuses([(section.id, int(week_number))])
+        Attendance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["student", "section", "week_number"],
+            update_fields=["status", "date"],
+        )
+        apply_status_changes(
+            (row.section_id, row.week_number, previous.get((row.student_id, row.section_id, row.week_number)), row.status)
+            for row in rows
+        )
+    return len(rows)
@@ -0,0 +1,105 @@
+"""Incremental maintenance of :class:`attendance.models.AttendanceSummary`.
+
+Write paths describe what they changed as ``(section_id, week_number,
+old_status, new_status)`` tuples (``old_status`` is ``None`` for new rows) and
+:func:`apply_status_changes` turns them into one ``F()`` update per touched
+section/week, inside the caller's transaction.
+"""
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils.timezone import now
+from .models import Attendance, AttendanceSummary
+
+STATUS_FIELDS = {"Present": "present", "Late": "late", "Absent": "absent"}
+
+
+def lock_summaries(section_week_pairs):
+    """Create (if needed) and row-lock the summary rows a write is about to touch.
+
+    Must be called inside a transaction before reading the existing statuses;
+    concurrent writers to the same section/week are serialized so their deltas
+    are computed against a consistent view.
+    """
+    section_week_pairs = set(section_week_pairs)
+    if not section_week_pairs:
+        return
+    AttendanceSummary.objects.bulk_create(
+        [AttendanceSummary(section_id=section_id, week_number=week_number) for section_id, week_number in section_week_pairs],
+        ignore_conflicts=True,
+    )
+    condition = Q()
+    for section_id, week_number in section_week_pairs:
+        condition |= Q(section_id=section_id, week_number=week_number)
+    # ✅ Lock in a stable order to avoid deadlocks between concurrent flushes
+    list(AttendanceSummary.objects.filter(condition).order_by("section_id", "week_number").select_for_update())
+
+
+def existing_statuses(section_week_pairs, student_ids=None):
+    """Map ``(student_id, section_id, week_number)`` to the stored status.
+
+    ``student_ids`` narrows the lookup to the students being written.
+    """
+    if not section_week_pairs:
+        return {}
+    condition = Q()
+    for section_id, week_number in set(section_week_pairs):
+        condition |= Q(section_id=section_id, week_number=week_number)
+    records = Attendance.objects.filter(condition)
+    if student_ids is not None:
+        records = records.filter(student_id__in=set(student_ids))
+    return {
+        (student_id, section_id, week_number): status
+        for student_id, section_id, week_number, status in records.values_list(
+            "student_id", "section_id", "week_number", "status"
+        )
+    }
+
+
+def apply_status_changes(changes):
+    """Apply ``(section_id, week_number, old_status, new_status)`` changes to the summary table."""
+    deltas = defaultdict(Counter)
+    for section_id, week_number, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        if old_status:
+            deltas[(section_id, week_number)][STATUS_FIELDS[old_status]] -= 1
+        if new_status:
+            deltas[(section_id, week_number)][STATUS_FIELDS[new_status]] += 1
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        lock_summaries(deltas)
+        timestamp = now()
+        for (section_id, week_number), delta in deltas.items():
+            AttendanceSummary.objects.filter(section_id=section_id, week_number=week_number).update(
+                updated_at=timestamp,
+                **{field: F(field) + amount for field, amount in delta.items() if amount},
+            )
+
+
+def rebuild_summaries(section_ids=None):
+    """Recompute summaries from the attendance table with a single GROUP BY. Returns the row count."""
+    records = Attendance.objects.all()
+    summaries = AttendanceSummary.objects.all()
+    if section_ids:
+        records = records.filter(section_id__in=section_ids)
+        summaries = summaries.filter(section_id__in=section_ids)
+
+    timestamp = now()
+    rows = [
+        AttendanceSummary(updated_at=timestamp, **row)
+        for row in records.values("section_id", "week_number").annotate(
+            present=Count("id", filter=Q(status="Present")),
+            late=Count("id", filter=Q(status="Late")),
+            absent=Count("id", filter=Q(status="Absent")),
+        ).order_by()
+    ]
+
+    with transaction.atomic():
+        summaries.delete()
+        AttendanceSummary.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
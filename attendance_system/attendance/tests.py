@@ -1,3 +1,321 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import subprocess
+import sys
+import zipfile
+from xml.etree import ElementTree
+from datetime import date, time
+from unittest.mock import patch
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from courses.models import Course, Section, Enrollment
+from courses.roster import clear_rosters
+from users.models import User
+from .checkin import CheckInBuffer, LocalCheckInQueue
+from .face import register_face
+from .models import Attendance, AttendanceSummary, FaceRecognitionStatus, PendingCheckIn
+from .services import mark_attendance_bulk
+from .summary import rebuild_summaries
+from .tokens import make_token, verify_token, InvalidQRToken
 
-# Create your tests here.
+
+class QRTokenTests(SimpleTestCase):
+    def test_round_trip(self):
+        token = make_token(3, 2, date(2026, 10, 12), timestamp=1_000_000)
+        self.assertEqual(verify_token(token, timestamp=1_000_000)[:3], (3, 2, date(2026, 10, 12)))
+
+    def test_tampered_token_is_rejected(self):
+        token = make_token(3, 2, date(2026, 10, 12), timestamp=1_000_000)
+        _, rest = token.split(".", 1)
+        with self.assertRaises(InvalidQRToken):
+            verify_token(f"4.{rest}", timestamp=1_000_000)
+
+    def test_non_ascii_signature_is_rejected(self):
+        with self.assertRaises(InvalidQRToken):
+            verify_token("1.1.1.1.é")
+
+    def test_expired_token_is_rejected(self):
+        token = make_token(3, 2, date(2026, 10, 12), timestamp=1_000_000)
+        with self.assertRaises(InvalidQRToken):
+            verify_token(token, timestamp=1_000_000 + 3600)
+
+
+def make_user(matric_id, role):
+    user = User(matric_id=matric_id, email=f"{matric_id}@university.com", personal_email=f"{matric_id}@example.com",
+                role=role, first_login=False)
+    user.set_unusable_password()  # Tests log in with force_login; hashing would only slow them down
+    user.save()
+    return user
+
+
+class SectionTestCase(TestCase):
+    """A lecturer's section with one enrolled student."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lecturer = make_user("L0000001", "Lecturer")
+        cls.student = make_user("S0000001", "Student")
+        course = Course.objects.create(code="CS101", name="Intro")
+        cls.section = Section.objects.create(
+            course=course, section_type="Lecture", section_number=1, lecturer=cls.lecturer,
+            start_date=date(2026, 10, 12), class_time=time(9, 0), max_students=30,
+        )
+        Enrollment.objects.create(student=cls.student, section=cls.section)
+
+    def setUp(self):
+        clear_rosters()
+        self.client.force_login(self.lecturer)
+
+
+class BulkAttendanceApiTests(SectionTestCase):
+    def post(self, payload):
+        return self.client.post(
+            reverse("bulk_attendance_api", args=[self.section.id, 1]), payload, content_type="application/json"
+        )
+
+    def test_marks_every_enrolled_student(self):
+        response = self.post({"statuses": {str(self.student.id): "Late"}})
+        self.assertEqual(response.json(), {"updated": 1})
+        self.assertEqual(Attendance.objects.get(student=self.student, week_number=1).status, "Late")
+
+    def test_malformed_payloads_are_rejected(self):
+        for payload in (
+            {"statuses": {str(self.student.id): 5}},
+            {"statuses": {str(self.student.id): ["Present"]}},
+            {"default": ["Absent"]},
+            {"statuses": ["Present"]},
+            {"statuses": {"abc": "Present"}},
+            {"default": "Excused"},
+            ["Present"],
+        ):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post(payload).status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+
+class LiveBoardTests(SectionTestCase):
+    def test_stream_is_refused_outside_asgi(self):
+        response = self.client.get(reverse("attendance_stream", args=[self.section.id, 1]))
+        self.assertEqual(response.status_code, 503)
+
+    def test_qr_page_polls_the_snapshot_outside_asgi(self):
+        response = self.client.get(reverse("generate_qr_attendance", args=[self.section.id, 1]))
+        self.assertNotContains(response, "EventSource(")
+        self.assertContains(response, reverse("attendance_snapshot", args=[self.section.id, 1]))
+
+    def test_snapshot_lists_checked_in_students(self):
+        Attendance.objects.create(
+            student=self.student, section=self.section, week_number=1, date=date(2026, 10, 12),
+            time_checked_in=time(9, 5), status="Present",
+        )
+        response = self.client.get(reverse("attendance_snapshot", args=[self.section.id, 1]))
+        self.assertEqual([row["student_id"] for row in response.json()["checked_in"]], [self.student.id])
+
+    async def test_stream_starts_with_the_snapshot_under_asgi(self):
+        await self.async_client.aforce_login(self.lecturer)
+        response = await self.async_client.get(reverse("attendance_stream", args=[self.section.id, 1]))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        first = await anext(aiter(response.streaming_content))
+        self.assertTrue(first.startswith(b'data: {"type": "snapshot"'))
+        await response.streaming_content.aclose()
+
+
+class AttendanceFilterTests(SectionTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for week in (1, 2):
+            Attendance.objects.create(
+                student=cls.student, section=cls.section, week_number=week, date=date(2026, 10, 5 + 7 * week),
+                status="Present",
+            )
+
+    def test_week_filter(self):
+        response = self.client.get(reverse("attendance_records"), {"week": "2", "format": "json"})
+        self.assertEqual([record["week"] for record in response.json()["records"]], [2])
+
+    def test_non_decimal_digits_are_ignored(self):
+        for value in ("²", "١", "-1", " "):
+            with self.subTest(value=value):
+                response = self.client.get(reverse("attendance_records"), {"week": value, "section": value})
+                self.assertEqual(response.status_code, 200)
+                response = self.client.get(reverse("export_attendance"), {"section": value})
+                self.assertEqual(response.status_code, 200)
+                b"".join(response.streaming_content)
+
+
+class ExportTests(SectionTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        User.objects.filter(pk=cls.student.pk).update(first_name="=HYPERLINK(\"http://x\")", last_name="Tan\x07")
+        Attendance.objects.create(
+            student=cls.student, section=cls.section, week_number=1, date=date(2026, 10, 12),
+            time_checked_in=time(9, 5), status="Present",
+        )
+        Attendance.objects.create(
+            student=cls.student, section=cls.section, week_number=2, date=date(2026, 10, 19), status="Late",
+        )
+
+    def export(self, **params):
+        response = self.client.get(reverse("export_attendance"), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv_rows(self):
+        rows = list(csv.reader(io.StringIO(self.export().decode("utf-8"))))
+        self.assertEqual(rows[0][:3], ["Course", "Section", "Matric ID"])
+        self.assertEqual(rows[1], [
+            "CS101", "Lecture 1", "S0000001", "'=HYPERLINK(\"http://x\")", "Tan\x07", "1", "2026-10-12", "09:05:00",
+            "Present",
+        ])
+        self.assertEqual([row[5] for row in rows[1:]], ["1", "2"])
+
+    def test_gzipped_pivot(self):
+        rows = list(csv.reader(io.StringIO(gzip.decompress(self.export(layout="pivot", gzip="1")).decode("utf-8"))))
+        self.assertEqual(rows[0][-1], "Week 14")
+        self.assertEqual(rows[1][3], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(rows[1][5:8], ["Present", "Late", ""])
+        self.assertEqual(len(rows), 2)
+
+    def test_xlsx_is_well_formed(self):
+        with zipfile.ZipFile(io.BytesIO(self.export(format="xlsx"))) as workbook:
+            sheet = ElementTree.fromstring(workbook.read("xl/worksheets/sheet1.xml"))
+        namespace = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+        rows = [[cell.findtext(".//s:t", namespaces=namespace) or cell.findtext("s:v", namespaces=namespace)
+                 for cell in row] for row in sheet.iterfind(".//s:row", namespace)]
+        self.assertEqual(len(rows), 3)
+        # Inline strings are never evaluated, so only the control character is dropped
+        self.assertEqual(rows[1][3:6], ["=HYPERLINK(\"http://x\")", "Tan", "1"])
+
+
+@override_settings(FACE_RECOGNITION={"EXTRACTOR": "attendance.face.DeterministicExtractor"})
+class FaceRecognitionFrameTests(SectionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("face_recognition_frame", args=[self.section.id, 1])
+
+    def open_window(self):
+        FaceRecognitionStatus.objects.create(section=self.section, week_number=1, is_enabled=True, enabled_at=now())
+
+    def post_frame(self, frame):
+        return self.client.post(self.url, frame, content_type="application/octet-stream")
+
+    def test_recognized_students_are_checked_in_once(self):
+        register_face(self.student, b"S0000001")
+        self.open_window()
+        response = self.post_frame(b"S0000001\nstranger\nS0000001")
+        self.assertEqual(response.json()["faces"], 3)
+        self.assertEqual(response.json()["recorded"], 1)
+        self.assertEqual(Attendance.objects.get(student=self.student, week_number=1).status, "Present")
+        self.assertEqual(self.post_frame(b"S0000001").json()["recorded"], 0)
+
+    def test_frames_are_refused_while_the_window_is_closed(self):
+        self.assertEqual(self.post_frame(b"S0000001").status_code, 409)
+
+    def test_multipart_frame(self):
+        register_face(self.student, b"S0000001")
+        self.open_window()
+        response = self.client.post(self.url, {"frame": SimpleUploadedFile("frame.txt", b"S0000001")})
+        self.assertEqual(response.json()["recorded"], 1)
+
+    def test_multipart_post_without_a_frame_is_rejected(self):
+        self.open_window()
+        self.assertEqual(self.client.post(self.url, {"other": "value"}).status_code, 400)
+
+    def test_missing_numpy_disables_only_face_recognition(self):
+        self.open_window()
+        with patch.dict(sys.modules, {"numpy": None}):
+            response = self.post_frame(b"S0000001")
+        self.assertEqual(response.status_code, 503)
+
+
+class FaceModuleImportTests(SimpleTestCase):
+    def test_urlconf_loads_without_numpy(self):
+        script = (
+            "import sys; sys.modules['numpy'] = None\n"
+            "import django; django.setup()\n"
+            "from django.urls import resolve; resolve('/attendance/records/')\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class CheckInBufferTests(SectionTestCase):
+    def setUp(self):
+        super().setUp()
+        flusher = patch("attendance.checkin.CheckInBuffer._ensure_flusher")  # Flushed explicitly here
+        flusher.start()
+        self.addCleanup(flusher.stop)
+
+    def submit(self, buffer, student):
+        buffer.submit(student.id, self.section.id, 1, date(2026, 10, 12), time(9, 5))
+
+    def present(self):
+        return AttendanceSummary.objects.get(section=self.section, week_number=1).present
+
+    def test_queued_scans_survive_the_worker(self):
+        self.submit(CheckInBuffer(), self.student)
+        self.assertEqual(PendingCheckIn.objects.count(), 1)
+        self.assertEqual(CheckInBuffer().flush(), 1)  # e.g. another worker or manage.py flush_checkins
+        self.assertEqual(Attendance.objects.get(student=self.student).status, "Present")
+        self.assertFalse(PendingCheckIn.objects.exists())
+
+    def test_duplicate_scans_are_written_and_counted_once(self):
+        buffer = CheckInBuffer()
+        self.submit(buffer, self.student)
+        self.submit(buffer, self.student)
+        buffer.flush()
+        self.assertEqual(Attendance.objects.filter(student=self.student).count(), 1)
+        self.assertEqual(self.present(), 1)
+
+    def test_full_local_queue_writes_synchronously(self):
+        other = make_user("S0000002", "Student")
+        buffer = CheckInBuffer(backend=LocalCheckInQueue(1))
+        self.submit(buffer, self.student)
+        self.submit(buffer, other)
+        self.assertEqual(list(Attendance.objects.values_list("student_id", flat=True)), [other.id])
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.present(), 2)
+
+    def test_take_attendance_queues_the_scan_of_enrolled_students_only(self):
+        token = make_token(self.section.id, 1, date(2026, 10, 12))
+        outsider = make_user("S0000002", "Student")
+        for student in (self.student, outsider):
+            self.client.force_login(student)
+            response = self.client.get(reverse("take_attendance"), {"t": token})
+            self.assertRedirects(response, reverse("student_schedule"), fetch_redirect_response=False)
+        self.assertEqual(list(PendingCheckIn.objects.values_list("student_id", flat=True)), [self.student.id])
+        CheckInBuffer().flush()
+        self.assertEqual(self.present(), 1)
+
+
+class SummaryTests(SectionTestCase):
+    def counts(self):
+        return sorted(AttendanceSummary.objects.values_list("section_id", "week_number", "present", "late", "absent"))
+
+    @patch("attendance.checkin.CheckInBuffer._ensure_flusher")
+    def test_incremental_counts_match_a_rebuild(self, _):
+        late, absent = make_user("S0000002", "Student"), make_user("S0000003", "Student")
+        Enrollment.objects.bulk_create([Enrollment(student=late, section=self.section),
+                                        Enrollment(student=absent, section=self.section)])
+        clear_rosters()
+
+        mark_attendance_bulk(self.section, 1, {self.student.id: "Present", late.id: "Late"})
+        mark_attendance_bulk(self.section, 2, {})
+        mark_attendance_bulk(self.section, 1, {self.student.id: "Late", late.id: "Present"})  # Status changes
+        buffer = CheckInBuffer()
+        for student in (absent, absent, late):  # Scans insert new rows; the duplicate is dropped
+            buffer.submit(student.id, self.section.id, 3, date(2026, 10, 26), time(9, 5))
+        buffer.flush()
+        mark_attendance_bulk(self.section, 3, {absent.id: "Present", late.id: "Late"})  # Upserts over the scans
+
+        incremental = self.counts()
+        self.assertEqual(incremental, [
+            (self.section.id, 1, 1, 1, 1), (self.section.id, 2, 0, 0, 3), (self.section.id, 3, 1, 1, 1),
+        ])
+        self.assertEqual(rebuild_summaries([self.section.id]), 3)
+        self.assertEqual(self.counts(), incremental)
@@ -0,0 +1,83 @@
+"""Signed, rotating QR check-in tokens.
+
+A token carries everything ``take_attendance`` needs to know about the
+session being checked into (section, week, session date and expiry) and is
+signed with an HMAC derived from ``SECRET_KEY``. Verification is done in
+memory with a constant-time comparison, so the check-in hot path does not
+need to query ``Section`` or ``ClassSession``.
+
+Format: ``<section>.<week>.<date ordinal>.<expiry>.<signature>`` where the
+numbers are base36 and the signature is a truncated, base64url-encoded
+HMAC-SHA256.
+"""
+import base64
+import hashlib
+import hmac
+import time
+from collections import namedtuple
+from datetime import date
+from django.conf import settings
+from django.utils.encoding import force_bytes
+
+QRToken = namedtuple("QRToken", ["section_id", "week_number", "session_date", "expires"])
+
+SIGNATURE_BYTES = 12
+
+
+class InvalidQRToken(Exception):
+    """Raised when a QR token is malformed, tampered with or expired."""
+
+
+def get_rotation_seconds():
+    """How often the lecturer's page rotates the QR code."""
+    return getattr(settings, "ATTENDANCE_QR_ROTATION_SECONDS", 30)
+
+
+def _base36(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    if number == 0:
+        return "0"
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+    return encoded
+
+
+def _sign(payload):
+    key = hashlib.sha256(force_bytes("attendance.qr-token" + settings.SECRET_KEY)).digest()
+    digest = hmac.new(key, force_bytes(payload), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def make_token(section_id, week_number, session_date, timestamp=None):
+    """Create the token for the current rotation window.
+
+    Tokens are stable within a window and stay valid for one extra window, so
+    a scan taken just before the code rotates is still accepted.
+    """
+    rotation = get_rotation_seconds()
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    expires = (timestamp // rotation + 2) * rotation
+    payload = ".".join(_base36(value) for value in (
+        int(section_id), int(week_number), session_date.toordinal(), expires
+    ))
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_token(token, timestamp=None):
+    """Return the :class:`QRToken` carried by ``token`` or raise :class:`InvalidQRToken`."""
+    try:
+        payload, signature = token.rsplit(".", 1)
+        section_id, week_number, ordinal, expires = (int(part, 36) for part in payload.split("."))
+    except (AttributeError, ValueError):
+        raise InvalidQRToken("Malformed QR token.")
+
+    if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        raise InvalidQRToken("QR token signature mismatch.")
+
+    timestamp = timestamp if timestamp is not None else time.time()
+    if timestamp >= expires:
+        raise InvalidQRToken("QR code has expired.")
+
+    return QRToken(section_id, week_number, date.fromordinal(ordinal), expires)
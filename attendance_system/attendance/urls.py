@@ -2,16 +2,23 @@ from django.urls import path
 from .views import (
     take_attendance, attendance_records,
     lecturer_attendance_dashboard, weekly_attendance_view, toggle_face_recognition_weekly,
-    generate_qr_attendance, manual_attendance
+    generate_qr_attendance, qr_token_view, manual_attendance,
+    bulk_attendance_api, attendance_stream, attendance_snapshot, export_attendance, face_recognition_frame
 )
 
 urlpatterns = [
     path("take/", take_attendance, name="take_attendance"),  
     path("records/", attendance_records, name="attendance_records"),  
+    path("export/", export_attendance, name="export_attendance"),
 
     path("lecturer-dashboard/", lecturer_attendance_dashboard, name="lecturer_attendance_dashboard"),
     path("weekly-attendance/<int:section_id>/", weekly_attendance_view, name="weekly_attendance_view"),
     path("toggle-face-weekly/<int:section_id>/<int:week_number>/", toggle_face_recognition_weekly, name="toggle_face_recognition_weekly"),
+    path("face-frame/<int:section_id>/<int:week_number>/", face_recognition_frame, name="face_recognition_frame"),
     path("generate-qr/<int:section_id>/<int:week_number>/", generate_qr_attendance, name="generate_qr_attendance"),
+    path("qr-token/<int:section_id>/<int:week_number>/", qr_token_view, name="qr_token"),
+    path("stream/<int:section_id>/<int:week_number>/", attendance_stream, name="attendance_stream"),
+    path("snapshot/<int:section_id>/<int:week_number>/", attendance_snapshot, name="attendance_snapshot"),
     path("manual-attendance/<int:section_id>/<int:week_number>/", manual_attendance, name="manual_attendance"),
+    path("api/bulk-attendance/<int:section_id>/<int:week_number>/", bulk_attendance_api, name="bulk_attendance_api"),
 ]
@@ -1,14 +1,30 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from courses.models import Section, Enrollment, ClassSession
+from courses.models import Section, ClassSession
+from courses.roster import get_roster, is_enrolled
+from courses.ical import feed_url
 from users.models import User
-from .models import Attendance, FaceRecognitionStatus
+from .models import Attendance, AttendanceSummary, FaceRecognitionStatus
+from . import events
+from .checkin import get_checkin_buffer
+from .services import mark_attendance_bulk, VALID_STATUSES
+from .pagination import paginate_by_date, get_page_size, parse_id
+from .exports import build_export, scoped_records
+from .face import recognize_frame, FaceRecognitionClosed
+from .tokens import make_token, verify_token, get_rotation_seconds, InvalidQRToken
 from django.utils.timezone import now
-import qrcode
-import io
-import base64
-from django.http import JsonResponse
+from django.urls import reverse
+from django.core.exceptions import ValidationError, ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse, Http404
+from django.core.handlers.asgi import ASGIRequest
+from datetime import date
+import asyncio
+import json
+import time
+
+SSE_HEARTBEAT_SECONDS = 15
 
 @login_required(login_url="/users/login/")
 def take_attendance(request):
@@ -17,55 +33,99 @@ def take_attendance(request):
         return render(request, "access_denied.html")
 
     student = request.user
-    section_id = request.GET.get("section_id")
-    week_number = request.GET.get("week")
 
-    # ✅ Validate input
-    if not section_id or not week_number:
-        messages.error(request, "Invalid QR Code data.")
+    # ✅ Validate the signed QR token (no database access needed)
+    try:
+        qr_token = verify_token(request.GET.get("t", ""))
+    except InvalidQRToken as e:
+        messages.error(request, f"Invalid QR Code: {e}")
         return redirect("student_schedule")
 
-    # ✅ Ensure section exists
-    section = get_object_or_404(Section, id=section_id)
-    
     # ✅ Ensure student is enrolled
-    if not Enrollment.objects.filter(student=student, section=section).exists():
+    if not is_enrolled(student.id, qr_token.section_id):
         messages.error(request, "You are not enrolled in this section.")
         return redirect("student_schedule")
 
-    # ✅ Check if `ClassSession` exists
-    class_session = ClassSession.objects.filter(section=section, week_number=week_number).first()
-    if not class_session:
-        messages.error(request, f"No scheduled class for {section} in Week {week_number}.")
-        return redirect("student_schedule")
-
-    # ✅ Record attendance
-    attendance, created = Attendance.objects.get_or_create(
-        student=student,
-        section=section,
-        date=class_session.date,  # Use correct session date
-        week_number=week_number,
-        defaults={"time_checked_in": now().time(), "status": "Present"},
+    # ✅ Queue the check-in; it is written with the rest of the burst in one batch
+    get_checkin_buffer().submit(
+        student_id=student.id,
+        section_id=qr_token.section_id,
+        week_number=qr_token.week_number,
+        date=qr_token.session_date,  # Session date is carried by the token
+        time_checked_in=now().time(),
     )
-
-    if not created:
-        messages.info(request, f"Attendance already recorded for {section} - Week {week_number}.")
-    else:
-        messages.success(request, f"You have successfully checked in for {section} - Week {week_number}.")
+    messages.success(request, f"Your check-in for Week {qr_token.week_number} has been received.")
 
     return redirect("student_schedule")
 
 @login_required(login_url="/users/login/")
 def attendance_records(request):
-    """Displays attendance records for lecturers or students."""
+    """Displays attendance records for lecturers or students, one keyset page at a time."""
     if request.user.role == "Lecturer":
         records = Attendance.objects.filter(section__lecturer=request.user)
+        sections = request.user.section_set.select_related("course")
     elif request.user.role == "Student":
         records = Attendance.objects.filter(student=request.user)
+        sections = Section.objects.filter(enrollment__student=request.user).select_related("course")
     else:
         return render(request, "access_denied.html")
 
-    return render(request, "attendance/attendance_records.html", {"records": records})
+    # ✅ Optional filters
+    filters = {
+        "section": request.GET.get("section", ""),
+        "week": request.GET.get("week", ""),
+        "status": request.GET.get("status", ""),
+        "student": request.GET.get("student", "").strip(),
+    }
+    section_id, week = parse_id(filters["section"]), parse_id(filters["week"])
+    if section_id is not None:
+        records = records.filter(section_id=section_id)
+    if week is not None:
+        records = records.filter(week_number=week)
+    if filters["status"] in VALID_STATUSES:
+        records = records.filter(status=filters["status"])
+    if filters["student"] and request.user.role == "Lecturer":
+        records = records.filter(student__matric_id__iexact=filters["student"])
+
+    # ✅ Fetch related rows in the same query and only the columns that are shown
+    records = records.select_related("student", "section__course").only(
+        "date", "week_number", "time_checked_in", "status",
+        "student__matric_id", "student__first_name", "student__last_name",
+        "section__section_type", "section__section_number", "section__course__name",
+    )
+    page, next_cursor = paginate_by_date(
+        records, request.GET.get("cursor"), get_page_size(request.GET.get("limit"))
+    )
+
+    if request.GET.get("format") == "json" or request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse({
+            "records": [
+                {
+                    "id": record.id,
+                    "student": record.student.matric_id,
+                    "student_name": f"{record.student.first_name} {record.student.last_name}",
+                    "course": record.section.course.name,
+                    "section": f"{record.section.section_type} {record.section.section_number}",
+                    "week": record.week_number,
+                    "date": record.date,
+                    "time_checked_in": record.time_checked_in,
+                    "status": record.status,
+                }
+                for record in page
+            ],
+            "next_cursor": next_cursor,
+        })
+
+    next_query = request.GET.copy()
+    next_query["cursor"] = next_cursor or ""
+
+    return render(request, "attendance/attendance_records.html", {
+        "records": page,
+        "sections": sections,
+        "filters": filters,
+        "statuses": Attendance.STATUS_CHOICES,
+        "next_page": next_query.urlencode() if next_cursor else None,
+    })
 
 @login_required(login_url="/users/login/")
 def lecturer_attendance_dashboard(request):
@@ -76,7 +136,8 @@ def lecturer_attendance_dashboard(request):
     sections = request.user.section_set.all()
 
     return render(request, "attendance/lecturer_dashboard.html", {
-        "sections": sections
+        "sections": sections,
+        "calendar_url": feed_url(request, request.user),
     })
 
 @login_required(login_url="/users/login/")
@@ -86,14 +147,26 @@ def weekly_attendance_view(request, section_id):
 
     weeks = range(1, 15)  # Assuming 14 weeks
 
+    # ✅ One query for every week; status is computed from enabled_at without writing
+    current_time = now()
+    statuses = {
+        fr_status.week_number: fr_status
+        for fr_status in FaceRecognitionStatus.objects.filter(section=section, week_number__in=weeks)
+    }
+
+    # ✅ Per-week counts come from the small summary table, not the attendance rows
+    summaries = {
+        summary.week_number: summary
+        for summary in AttendanceSummary.objects.filter(section=section)
+    }
+
     face_recognition_status = {}
     for week in weeks:
-        fr_status, _ = FaceRecognitionStatus.objects.get_or_create(section=section, week_number=week)
-        fr_status.auto_disable()
-
+        fr_status = statuses.get(week)
+        enabled = fr_status is not None and fr_status.is_active(current_time)
         face_recognition_status[week] = {
-            "enabled": fr_status.is_enabled,
-            "enabled_at": fr_status.enabled_at.strftime('%Y-%m-%d %H:%M:%S') if fr_status.enabled_at else None
+            "enabled": enabled,
+            "enabled_at": fr_status.enabled_at.strftime('%Y-%m-%d %H:%M:%S') if enabled else None
         }
 
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -103,6 +176,7 @@ def weekly_attendance_view(request, section_id):
         "section": section,
         "weeks": weeks,
         "face_recognition_status": face_recognition_status,
+        "summaries": summaries,
     })
 
 @login_required(login_url="/users/login/")
@@ -110,11 +184,10 @@ def toggle_face_recognition_weekly(request, section_id, week_number):
     """Enable or disable face recognition for a specific section & week"""
     section = get_object_or_404(Section, id=section_id, lecturer=request.user)
 
+    # ✅ Rows are only created when a lecturer actually toggles a week
     face_recognition, _ = FaceRecognitionStatus.objects.get_or_create(section=section, week_number=week_number)
 
-    face_recognition.auto_disable()
-
-    if face_recognition.is_enabled:
+    if face_recognition.is_active():
         face_recognition.is_enabled = False
         face_recognition.enabled_at = None
         status = "disabled"
@@ -125,53 +198,244 @@ def toggle_face_recognition_weekly(request, section_id, week_number):
 
     face_recognition.save()
 
+    # ✅ Push the change to lecturer pages watching this week live
+    events.publish(section.id, week_number, {
+        "type": "face_recognition",
+        "enabled": face_recognition.is_enabled,
+        "enabled_at": face_recognition.enabled_at.isoformat() if face_recognition.enabled_at else None,
+    })
+
     return JsonResponse({
         "status": status,
         "timestamp": face_recognition.enabled_at.strftime('%Y-%m-%d %H:%M:%S') if face_recognition.enabled_at else None
     })
 
 @login_required(login_url="/users/login/")
-def generate_qr_attendance(request, section_id, week_number):
-    """Generates a QR code for students to check in for a specific section and week."""
+def face_recognition_frame(request, section_id, week_number):
+    """Recognize the faces in one camera frame and check the matched students in.
+
+    The frame is sent as the ``frame`` file of a multipart POST or as the raw body.
+    """
     section = get_object_or_404(Section, id=section_id, lecturer=request.user)
 
-    # ✅ Get the base URL of your Django app
-    base_url = request.build_absolute_uri('/')[:-1]  # Removes the trailing slash
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required."}, status=405)
 
-    # ✅ Generate the QR Code Data (Actual Check-in URL)
-    qr_data = f"{base_url}/attendance/take/?section_id={section.id}&week={week_number}&timestamp={now().timestamp()}"
+    if request.content_type in ("multipart/form-data", "application/x-www-form-urlencoded"):
+        # ✅ The body stream is already consumed by form parsing; only the file part can be read
+        frame = request.FILES.get("frame")
+        image = frame.read() if frame else b""
+    else:
+        image = request.body
+    if not image:
+        return JsonResponse({"error": "No frame received."}, status=400)
+
+    try:
+        result = recognize_frame(section, week_number, image)
+    except FaceRecognitionClosed as e:
+        return JsonResponse({"error": str(e)}, status=409)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except ImproperlyConfigured as e:
+        return JsonResponse({"error": str(e)}, status=503)
 
-    # ✅ Create QR Code
-    qr = qrcode.make(qr_data)
-    buffer = io.BytesIO()
-    qr.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    return JsonResponse({
+        "faces": result.faces,
+        "matches": [{"student_id": m.student_id, "score": round(m.score, 4)} for m in result.matches],
+        "recorded": result.recorded,
+    })
+
+def _qr_token_payload(request, section, week_number):
+    """Build a fresh signed QR token and the check-in URL it encodes."""
+    class_session = get_object_or_404(ClassSession, section=section, week_number=week_number)
+    token = make_token(section.id, week_number, class_session.date)
+    rotation = get_rotation_seconds()
+    return {
+        "token": token,
+        "url": request.build_absolute_uri(f"{reverse('take_attendance')}?t={token}"),
+        "refresh_in": rotation - int(time.time()) % rotation,
+    }
+
+@login_required(login_url="/users/login/")
+def generate_qr_attendance(request, section_id, week_number):
+    """Shows a rotating QR code for students to check in for a specific section and week."""
+    section = get_object_or_404(Section, id=section_id, lecturer=request.user)
 
     return render(request, "attendance/generate_qr.html", {
         "section": section,
         "week_number": week_number,
-        "qr_base64": qr_base64,  # ✅ Pass QR Code as Base64 to the template
-        "qr_data": qr_data,  # ✅ Pass the URL for debugging
+        "qr": _qr_token_payload(request, section, week_number),  # ✅ Drawn in the browser
+        "live_stream": _is_asgi(request),
     })
 
+@login_required(login_url="/users/login/")
+def qr_token_view(request, section_id, week_number):
+    """Returns only the current QR token so the lecturer page can redraw the code locally."""
+    section = get_object_or_404(Section, id=section_id, lecturer=request.user)
+    return JsonResponse(_qr_token_payload(request, section, week_number))
+
+def _is_asgi(request):
+    """Whether the request is served by an ASGI server (needed for open-ended streams)."""
+    return isinstance(request, ASGIRequest)
+
+def _sse(event):
+    """Encode an event as a Server-Sent Events message."""
+    return f"data: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+async def _attendance_snapshot(section_id, week_number):
+    """Everyone checked in so far and the face recognition state, as one event."""
+    checked_in = [
+        {
+            "student_id": row["student_id"],
+            "matric_id": row["student__matric_id"],
+            "name": f"{row['student__first_name']} {row['student__last_name']}",
+            "time": row["time_checked_in"].strftime("%H:%M:%S") if row["time_checked_in"] else None,
+            "status": row["status"],
+        }
+        async for row in Attendance.objects.filter(
+            section_id=section_id, week_number=week_number, status__in=["Present", "Late"]
+        ).values(
+            "student_id", "student__matric_id", "student__first_name", "student__last_name",
+            "time_checked_in", "status",
+        )
+    ]
+    fr_status = await FaceRecognitionStatus.objects.filter(section_id=section_id, week_number=week_number).afirst()
+    return {
+        "type": "snapshot",
+        "checked_in": checked_in,
+        "face_recognition": {
+            "enabled": bool(fr_status and fr_status.is_active()),
+            "enabled_at": fr_status.enabled_at.isoformat() if fr_status and fr_status.is_active() else None,
+        },
+    }
+
+async def _attendance_event_stream(section_id, week_number):
+    broker = events.get_broker()
+    channel = events.channel_name(section_id, week_number)
+    subscriber = broker.subscribe(channel)  # ✅ Subscribe before the snapshot so nothing is missed
+    _, queue = subscriber
+    try:
+        yield _sse(await _attendance_snapshot(section_id, week_number))
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"  # Keeps proxies from closing an idle stream
+                continue
+            yield _sse(event)
+    finally:
+        broker.unsubscribe(channel, subscriber)
+
+@login_required(login_url="/users/login/")
+async def attendance_stream(request, section_id, week_number):
+    """Streams live check-ins and face recognition changes for a section and week.
+
+    Requires an ASGI server (see ``attendance_system/asgi.py``); every watching
+    lecturer shares the same published events instead of polling the database.
+    Under WSGI it answers 503 and pages poll ``attendance_snapshot`` instead.
+    """
+    user = await request.auser()
+    if not await Section.objects.filter(id=section_id, lecturer_id=user.id).aexists():
+        raise Http404("Section not found.")
+
+    if not _is_asgi(request):
+        # ✅ A WSGI worker would buffer the endless stream and never respond; pages poll instead
+        return JsonResponse({"error": "Live updates require an ASGI server."}, status=503)
+
+    return StreamingHttpResponse(
+        _attendance_event_stream(section_id, week_number),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@login_required(login_url="/users/login/")
+async def attendance_snapshot(request, section_id, week_number):
+    """The live board's current state as JSON, polled by pages when streaming is unavailable."""
+    user = await request.auser()
+    if not await Section.objects.filter(id=section_id, lecturer_id=user.id).aexists():
+        raise Http404("Section not found.")
+    return JsonResponse(await _attendance_snapshot(section_id, week_number))
+
 @login_required(login_url="/users/login/")
 def manual_attendance(request, section_id, week_number):
     """Manually mark attendance for students in a specific section and week."""
     section = get_object_or_404(Section, id=section_id, lecturer=request.user)
-    students = User.objects.filter(enrollment__section=section, role="Student")  # ✅ Get enrolled students
 
     if request.method == "POST":
-        for student in students:
-            status = request.POST.get(f"status_{student.id}", "Absent")  # Default is absent
-            Attendance.objects.update_or_create(
-                student=student, section=section, week_number=week_number,
-                defaults={"status": status, "date": now().date()}
-            )
+        statuses = {
+            student_id: request.POST[f"status_{student_id}"]
+            for student_id in get_roster(section.id)  # ✅ Enrolled student IDs from the roster cache
+            if f"status_{student_id}" in request.POST
+        }
+        try:
+            mark_attendance_bulk(section, week_number, statuses)  # Missing students default to absent
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return redirect("manual_attendance", section_id=section.id, week_number=week_number)
         messages.success(request, f"Attendance updated for Week {week_number} - {section}.")
         return redirect("weekly_attendance_view", section_id=section.id)
 
+    students = User.objects.filter(enrollment__section=section, role="Student")  # ✅ Get enrolled students
+
     return render(request, "attendance/manual_attendance.html", {
         "section": section,
         "week_number": week_number,
         "students": students  # ✅ Pass students to the template
     })
+
+@login_required(login_url="/users/login/")
+def bulk_attendance_api(request, section_id, week_number):
+    """JSON endpoint to mark a whole section's attendance in one request.
+
+    Expects ``{"statuses": {"<student_id>": "Present", ...}, "default": "Absent"}``.
+    """
+    section = get_object_or_404(Section, id=section_id, lecturer=request.user)
+
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required."}, status=405)
+
+    try:
+        payload = json.loads(request.body or "{}")
+        statuses, default = payload.get("statuses", {}), payload.get("default", "Absent")
+        if not isinstance(statuses, dict) or not isinstance(default, str):
+            raise ValueError()
+        updated = mark_attendance_bulk(section, week_number, statuses, default_status=default)
+    except (ValueError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON payload."}, status=400)
+    except ValidationError as e:
+        return JsonResponse({"error": e.messages[0]}, status=400)
+
+    return JsonResponse({"updated": updated})
+
+@login_required(login_url="/users/login/")
+def export_attendance(request):
+    """Streams attendance as CSV (optionally gzipped) or XLSX for lecturers and admins.
+
+    Query parameters: ``section`` (repeatable), ``from``/``to`` (YYYY-MM-DD),
+    ``layout=rows|pivot``, ``format=csv|xlsx`` and ``gzip=1``.
+    """
+    if request.user.role not in ["Lecturer", "Admin", "Superadmin"]:
+        return render(request, "access_denied.html")
+
+    try:
+        date_from = date.fromisoformat(request.GET["from"]) if request.GET.get("from") else None
+        date_to = date.fromisoformat(request.GET["to"]) if request.GET.get("to") else None
+    except ValueError:
+        return JsonResponse({"error": "Dates must be in YYYY-MM-DD format."}, status=400)
+
+    section_ids = [section_id for section_id in map(parse_id, request.GET.getlist("section")) if section_id is not None]
+    records = scoped_records(request.user, section_ids, date_from, date_to)
+
+    layout = "pivot" if request.GET.get("layout") == "pivot" else "rows"
+    file_format = "xlsx" if request.GET.get("format") == "xlsx" else "csv"
+    chunks, content_type, extension = build_export(
+        records, layout=layout, file_format=file_format, compress=request.GET.get("gzip") == "1"
+    )
+
+    filename = f"attendance-{layout}-{now():%Y%m%d}.{extension}"
+    return StreamingHttpResponse(
+        chunks,
+        content_type=content_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -3,6 +3,11 @@ ASGI config for attendance_system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live attendance board (``attendance/stream/<section>/<week>/``) streams
+Server-Sent Events and must be served through this application, e.g.
+``uvicorn attendance_system.asgi:application``; WSGI servers cannot hold the
+stream open.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -23,6 +23,17 @@ EMAIL_HOST_USER = 'zephyrlitooooooo0@gmail.com'  # Replace with your email
 EMAIL_HOST_PASSWORD = 'edbd wcek pire ycwk'  # Replace with your email password
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Emails are queued in the outbox and sent by `manage.py send_outbox` (see users/outbox.py)
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'RATE_LIMIT': 10,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 60,
+    'MAX_BACKOFF': 3600,
+    'POLL_INTERVAL': 5,
+    'LEASE': 300,
+}
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -49,6 +60,20 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'attendance_system.urls'
 
+# Sessions and request.user come from the database by default. With a cache
+# shared by every worker process (Redis/Memcached as 'default'), set
+# SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db' and
+# AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend'] to serve
+# both from the cache (see users/backends.py and the bench_request_queries
+# command). Do not enable them on the per-process locmem cache: a logout or
+# password change would only be evicted from the worker that handled it.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_CACHE_ALIAS = 'default'
+
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = 300
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -123,6 +148,81 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Caches
+# The roster cache can point at FileBasedCache or RedisCache in production.
+# Rosters are checked against Section.roster_version, which each worker
+# re-reads every ROSTER_VERSION_TTL seconds, so enrollment changes made by
+# another worker are seen within that time even with a per-process cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'roster': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'roster',
+    },
+}
+ROSTER_CACHE_ALIAS = 'roster'
+ROSTER_CACHE_TIMEOUT = 3600
+ROSTER_VERSION_TTL = 5
+
+# Per-student weekly schedules (see courses/student_schedule.py)
+SCHEDULE_CACHE_ALIAS = 'default'
+SCHEDULE_CACHE_TIMEOUT = 3600
+
+# Course catalog pages (see courses/catalog.py)
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 300
+
+# Autocomplete endpoints behind the admin form widgets (see users/autocomplete.py)
+AUTOCOMPLETE_CACHE_ALIAS = 'default'
+AUTOCOMPLETE_CACHE_TIMEOUT = 30
+AUTOCOMPLETE_LIMIT = 20
+
+# Enrollment carts (see courses/cart.py). 'courses.cart.CacheCart' keeps
+# carts only in the cache: enable it only with a dedicated alias on a cache
+# shared by every worker that does not evict early (e.g. its own Redis
+# database), never LocMemCache (check courses.W001).
+ENROLLMENT_CART_BACKEND = 'courses.cart.DatabaseCart'
+CART_CACHE_ALIAS = 'default'
+CART_TIMEOUT = 7 * 24 * 3600
+CART_SECTION_CACHE_TIMEOUT = 300
+
+# QR check-in ingestion (see attendance/checkin.py). LocalCheckInQueue is
+# faster but loses acknowledged scans when a worker dies before flushing.
+ATTENDANCE_CHECKIN = {
+    'QUEUE_BACKEND': 'attendance.checkin.DatabaseCheckInQueue',
+    'MAX_PENDING': 5000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+# Seconds between QR token rotations on the lecturer's page (see attendance/tokens.py)
+ATTENDANCE_QR_ROTATION_SECONDS = 30
+
+# How long a face recognition window stays open once enabled
+FACE_RECOGNITION_WINDOW_SECONDS = 60
+
+# Face matching during the window (see attendance/face.py). THRESHOLD is the
+# minimum cosine similarity; None uses the extractor's default.
+FACE_RECOGNITION = {
+    'EXTRACTOR': 'attendance.face.FaceRecognitionExtractor',
+    'THRESHOLD': None,
+    'GALLERY_TTL': 60,
+}
+
+# Registration-rush mode: finalize requests wait in a fair queue, at most
+# MAX_CONCURRENT at a time, and give up after QUEUE_TIMEOUT seconds
+REGISTRATION_RUSH = {
+    'ENABLED': False,
+    'MAX_CONCURRENT': 20,
+    'QUEUE_TIMEOUT': 30,
+}
+
+# Teaching day used by the time-slot solver (see courses/solver.py), in hours
+SCHEDULING_DAY_START = 8
+SCHEDULING_DAY_END = 21
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -1,3 +1,55 @@
-from django.contrib import admin
+from datetime import date
+from django.contrib import admin, messages
+from django.db.models import Q
+from django.template.response import TemplateResponse
+from .models import Section, Waitlist
+from .registration import promote_waitlist
+from .solver import assign_timeslots
 
-# Register your models here.
+@admin.register(Section)
+class SectionAdmin(admin.ModelAdmin):
+    list_display = ('course', 'section_type', 'section_number', 'lecturer', 'start_date', 'class_time', 'duration', 'seats_taken', 'max_students')
+    list_filter = ('section_type', 'start_date')
+    list_select_related = ('course', 'lecturer')
+    search_fields = ('course__code', 'course__name')
+    readonly_fields = Section.ATOMIC_FIELDS  # ✅ Section.save never writes them from a form
+    actions = ['assign_time_slots', 'promote_waitlists']
+
+    @admin.action(description="Fill free seats in the selected sections from their waitlists")
+    def promote_waitlists(self, request, queryset):
+        """E.g. after raising ``max_students``; drops only promote automatically."""
+        promoted = sum(len(promote_waitlist(section_id)) for section_id in queryset.values_list('id', flat=True))
+        self.message_user(request, f"Enrolled {promoted} students from the waitlist.", messages.SUCCESS)
+
+    @admin.action(description="Assign time slots to the selected unscheduled sections")
+    def assign_time_slots(self, request, queryset):
+        """Ask for the semester start date, then run the slot solver on the selection."""
+        if 'apply' in request.POST:
+            try:
+                semester_start = date.fromisoformat(request.POST.get('semester_start', ''))
+            except ValueError:
+                self.message_user(request, "Please enter the semester start date as YYYY-MM-DD.", messages.ERROR)
+                return None
+            solution, scheduled = assign_timeslots(queryset.select_related('course'), semester_start)
+            self.message_user(request, (
+                f"Scheduled {len(scheduled)} sections ({solution.student_clashes} expected student clashes). "
+                f"{len(solution.hard_conflicts)} sections could not be placed without double-booking a lecturer."
+            ), messages.WARNING if solution.hard_conflicts else messages.SUCCESS)
+            return None
+
+        return TemplateResponse(request, 'admin/courses/assign_time_slots.html', {
+            **self.admin_site.each_context(request),
+            'title': "Assign time slots",
+            'sections': queryset.filter(Q(start_date__isnull=True) | Q(class_time__isnull=True)),
+            'queryset': queryset,
+            'action_checkbox_name': admin.helpers.ACTION_CHECKBOX_NAME,
+            'opts': self.model._meta,
+        })
+
+
+@admin.register(Waitlist)
+class WaitlistAdmin(admin.ModelAdmin):
+    list_display = ('section', 'student', 'paired_section', 'position', 'created_at')
+    list_select_related = ('section__course', 'student')
+    search_fields = ('student__matric_id', 'section__course__code')
+    raw_id_fields = ('student', 'section', 'paired_section')
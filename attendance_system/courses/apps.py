@@ -6,4 +6,5 @@ class CoursesConfig(AppConfig):
     name = 'courses'
 
     def ready(self):
-        import courses.signals  # ✅ Import the signals
\ No newline at end of file
+        import courses.signals  # ✅ Import the signals
+        import courses.checks
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""Course and section lookups for the autocomplete widgets (see users/autocomplete.py)."""
+from django.db.models import F
+from users.autocomplete import get_limit
+from .catalog import search_courses
+from .models import Course, Section
+
+
+def course_results(query):
+    """Up to ``AUTOCOMPLETE_LIMIT`` courses matching ``query`` (full-text prefix search)."""
+    courses = search_courses(Course.objects.all(), query).values_list("id", "code", "name")[:get_limit()]
+    return [{"id": course_id, "text": f"{code} - {name}"} for course_id, code, name in courses]
+
+
+def section_results(query, open_only=False):
+    """Sections of the courses matching ``query``; ``open_only`` leaves out full sections."""
+    course_ids = list(search_courses(Course.objects.all(), query).values_list("id", flat=True)[:get_limit()])
+    sections = Section.objects.filter(course_id__in=course_ids).select_related("course")
+    if open_only:
+        sections = sections.filter(seats_taken__lt=F("max_students"))
+    sections = sections.order_by("course__code", "section_type", "section_number")[:get_limit()]
+    return [{"id": section.id, "text": f"{section} ({section.seats_left} seats left)"} for section in sections]
@@ -0,0 +1,237 @@
+"""Enrollment cart storage backends.
+
+While students browse sections, their selections live in a cart. The
+backend is chosen with ``settings.ENROLLMENT_CART_BACKEND``:
+
+* :class:`DatabaseCart` (default) stores selections directly as
+  ``EnrollmentCart`` rows. Each click updates one column of one row, so
+  concurrent clicks never overwrite each other.
+* :class:`CacheCart` keeps each student's selections as a small dict in the
+  cache and builds cart items from cached section data, so browsing and
+  clicking sections write nothing to the database. The cart is written to
+  ``EnrollmentCart`` rows only inside the finalize transaction (see
+  ``courses/registration.py``). The cache is the only copy of the cart, so
+  ``CART_CACHE_ALIAS`` must be a cache shared by every worker that does not
+  evict entries early (a dedicated Redis database, not LocMemCache; see
+  ``courses/checks.py``). Updates take a short per-student lock in that cache
+  and raise :class:`CartBusy` if they cannot get it.
+
+Both expose ``items``, ``get``, ``select``, ``remove``, ``persist`` and
+``after_finalize``.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from .models import Section, EnrollmentCart
+
+CART_KEY = "cart:student:{}"
+SECTION_KEY = "cart:section:{}"
+LOCK_KEY = "cart:lock:{}"
+LOCK_TIMEOUT = 5  # Seconds; a crashed holder's lock expires after this
+LOCK_WAIT = 2 * LOCK_TIMEOUT  # Long enough for a crashed holder's lock to expire
+
+
+def get_cart_cache():
+    return caches[getattr(settings, "CART_CACHE_ALIAS", "default")]
+
+
+def cached_sections(section_ids):
+    """Sections (with their course) by ID, read through a short-lived cache.
+
+    ``seats_taken`` is read live (one primary-key query) so seat counts in
+    the cart are never stale.
+    """
+    section_ids = {section_id for section_id in section_ids if section_id}
+    if not section_ids:
+        return {}
+    cache = get_cart_cache()
+    found = cache.get_many([SECTION_KEY.format(section_id) for section_id in section_ids])
+    sections = {section.id: section for section in found.values()}
+    missing = section_ids - set(sections)
+    if missing:
+        loaded = {section.id: section for section in Section.objects.filter(id__in=missing).select_related("course")}
+        cache.set_many(
+            {SECTION_KEY.format(section_id): section for section_id, section in loaded.items()},
+            timeout=getattr(settings, "CART_SECTION_CACHE_TIMEOUT", 300),
+        )
+        sections.update(loaded)
+    seats = dict(Section.objects.filter(id__in=sections).values_list("id", "seats_taken"))
+    for section_id, section in sections.items():
+        section.seats_taken = seats.get(section_id, section.seats_taken)
+    return {section_id: section for section_id, section in sections.items() if section_id in seats}  # Deleted ones drop out
+
+
+def invalidate_cached_sections(*section_ids):
+    get_cart_cache().delete_many([SECTION_KEY.format(section_id) for section_id in section_ids if section_id])
+
+
+class CartBusy(Exception):
+    """Raised when a student's cache cart stayed locked by other requests for ``LOCK_WAIT`` seconds."""
+
+
+class CartItem:
+    """One course in a cache-backed cart (mirrors the ``EnrollmentCart`` attributes templates use)."""
+
+    def __init__(self, course, lecture_section=None, tutorial_section=None):
+        self.course = course
+        self.lecture_section = lecture_section
+        self.tutorial_section = tutorial_section
+        self.id = None  # Never stored as a row
+
+    @property
+    def course_id(self):
+        return self.course.id
+
+    @property
+    def lecture_section_id(self):
+        return self.lecture_section.id if self.lecture_section else None
+
+    @property
+    def tutorial_section_id(self):
+        return self.tutorial_section.id if self.tutorial_section else None
+
+
+class DatabaseCart:
+    """Cart stored as ``EnrollmentCart`` rows."""
+
+    def __init__(self, student):
+        self.student = student
+
+    def items(self):
+        return list(
+            EnrollmentCart.objects.filter(student=self.student)
+            .select_related("course", "lecture_section__course", "tutorial_section__course")
+            .order_by("id")
+        )
+
+    def get(self, course):
+        """The cart item for ``course`` (unsaved and empty if the course is not in the cart)."""
+        item = EnrollmentCart.objects.filter(student=self.student, course=course).select_related(
+            "lecture_section__course", "tutorial_section__course"
+        ).first()
+        return item or EnrollmentCart(student=self.student, course=course)
+
+    def select(self, course, section):
+        field = "lecture_section" if section.section_type == "Lecture" else "tutorial_section"
+        EnrollmentCart.objects.update_or_create(student=self.student, course=course, defaults={field: section})
+
+    def remove(self, course_id):
+        return EnrollmentCart.objects.filter(student=self.student, course_id=course_id).delete()[0] > 0
+
+    def persist(self):
+        """Rows already live in the database."""
+
+    def after_finalize(self):
+        """Finalize already removed the enrolled courses' rows."""
+
+
+class CacheCart:
+    """Cart kept in the cache as ``{course_id: [lecture_id, tutorial_id]}``."""
+
+    def __init__(self, student):
+        self.student = student
+        self.cache = get_cart_cache()
+        self.key = CART_KEY.format(student.pk)
+
+    def _load(self):
+        selections = self.cache.get(self.key)
+        if selections is None:
+            # ✅ Pick up carts saved as rows (before switching backends, or a waitlisted finalize)
+            selections = {
+                course_id: [lecture_id, tutorial_id]
+                for course_id, lecture_id, tutorial_id in EnrollmentCart.objects.filter(student=self.student)
+                .values_list("course_id", "lecture_section_id", "tutorial_section_id")
+            }
+            self._save(selections)
+        return selections
+
+    def _save(self, selections):
+        self.cache.set(self.key, selections, timeout=getattr(settings, "CART_TIMEOUT", 7 * 24 * 3600))
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-modify-write of this student's cart (``cache.add`` is atomic on shared caches)."""
+        lock_key = LOCK_KEY.format(self.student.pk)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while not self.cache.add(lock_key, token, timeout=LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                raise CartBusy(f"Cart of student {self.student.pk} is busy.")
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            # ✅ A holder that overran LOCK_TIMEOUT must not release the lock someone else took since
+            if self.cache.get(lock_key) == token:
+                self.cache.delete(lock_key)
+
+    def items(self):
+        selections = self._load()
+        sections = cached_sections(section_id for pair in selections.values() for section_id in pair)
+        items = []
+        for lecture_id, tutorial_id in selections.values():
+            lecture, tutorial = sections.get(lecture_id), sections.get(tutorial_id)
+            if lecture or tutorial:  # Sections deleted meanwhile drop out of the cart
+                items.append(CartItem((lecture or tutorial).course, lecture, tutorial))
+        return items
+
+    def get(self, course):
+        lecture_id, tutorial_id = self._load().get(course.id, (None, None))
+        sections = cached_sections([lecture_id, tutorial_id])
+        return CartItem(course, sections.get(lecture_id), sections.get(tutorial_id))
+
+    def select(self, course, section):
+        with self._locked():
+            selections = self._load()
+            lecture_id, tutorial_id = selections.get(course.id, (None, None))
+            if section.section_type == "Lecture":
+                lecture_id = section.id
+            else:
+                tutorial_id = section.id
+            selections[course.id] = [lecture_id, tutorial_id]
+            self._save(selections)
+
+    def remove(self, course_id):
+        with self._locked():
+            selections = self._load()
+            removed = selections.pop(course_id, None) is not None
+            self._save(selections)
+        return removed
+
+    def persist(self):
+        """Write the cart as ``EnrollmentCart`` rows (called inside the finalize transaction)."""
+        selections = self._load()
+        existing = set(Section.objects.filter(
+            id__in=[section_id for pair in selections.values() for section_id in pair if section_id]
+        ).values_list("id", flat=True))  # Sections deleted since they were picked count as missing
+        EnrollmentCart.objects.filter(student=self.student).delete()
+        EnrollmentCart.objects.bulk_create([
+            EnrollmentCart(
+                student=self.student, course_id=course_id,
+                lecture_section_id=lecture_id if lecture_id in existing else None,
+                tutorial_section_id=tutorial_id if tutorial_id in existing else None,
+            )
+            for course_id, (lecture_id, tutorial_id) in selections.items()
+        ])
+
+    def after_finalize(self):
+        """Move what finalize left in the cart (e.g. waitlisted courses) back into the cache."""
+        rows = EnrollmentCart.objects.filter(student=self.student)
+        try:
+            with self._locked():
+                self._save({
+                    course_id: [lecture_id, tutorial_id]
+                    for course_id, lecture_id, tutorial_id in rows.values_list("course_id", "lecture_section_id", "tutorial_section_id")
+                })
+                rows.delete()
+        except CartBusy:
+            # ✅ The rows are a complete copy: dropping the stale cached cart makes _load read them back
+            self.cache.delete(self.key)
+
+
+def get_cart(student):
+    """Cart of ``student`` using the configured backend."""
+    return import_string(getattr(settings, "ENROLLMENT_CART_BACKEND", "courses.cart.DatabaseCart"))(student)
@@ -0,0 +1,182 @@
+"""Course catalog with seat availability and full-text search.
+
+A page is built from one course query plus one query for the sections of
+the courses on the page. Search uses a weighted Postgres full-text index over
+code, name and description (see migration ``0015_course_search_index``); on
+SQLite the same migration builds an FTS5 table, so search also works in
+local development.
+
+The structure of a page (courses, sections, lecturers, times) is cached
+under a catalog version number that is bumped when sections or courses
+change. Seat counts change with every enrollment, so they are not part of
+the cached page: :func:`get_page` overlays them from the
+``Section.seats_taken`` counters with one indexed query over the page's
+sections. Enrollments therefore never flush the cache.
+"""
+import hashlib
+import re
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Paginator, EmptyPage
+from django.db import connection, transaction
+from django.db.models import BooleanField, Count, FloatField, Prefetch, Q
+from django.db.models.expressions import RawSQL
+from .models import Course, Section
+
+VERSION_KEY = "catalog:version"
+PAGE_KEY = "catalog:page:{}:{}:{}:{}"
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Must stay identical to the expression indexed by migration 0015_course_search_index
+SEARCH_DOCUMENT = (
+    "(setweight(to_tsvector('english'::regconfig, coalesce(courses_course.code, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(courses_course.name, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(courses_course.description, '')), 'C'))"
+)
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def catalog_version():
+    cache = get_catalog_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate_catalog():
+    """Retire every cached catalog page once the current transaction commits."""
+    def bump():
+        cache = get_catalog_cache()
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 2, timeout=None)
+    transaction.on_commit(bump)
+
+
+def get_page_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _search_terms(query):
+    """Words of a search query, reduced to characters that are safe in tsquery/FTS5 syntax."""
+    return [term for term in re.findall(r"\w+", query.lower()) if term]
+
+
+def search_courses(courses, query):
+    """Filter ``courses`` by a full-text ``query`` (prefix match on every word), best matches first."""
+    terms = _search_terms(query)
+    if not terms:
+        return courses.order_by("code")
+
+    if connection.vendor == "postgresql":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        return courses.filter(
+            RawSQL(f"{SEARCH_DOCUMENT} @@ to_tsquery('english'::regconfig, %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            rank=RawSQL(f"ts_rank({SEARCH_DOCUMENT}, to_tsquery('english'::regconfig, %s))", [tsquery], output_field=FloatField())
+        ).order_by("-rank", "code")
+
+    if connection.vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return courses.filter(
+            id__in=RawSQL("SELECT rowid FROM courses_course_fts WHERE courses_course_fts MATCH %s", [match])
+        ).order_by("code")
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(code__icontains=term) | Q(name__icontains=term) | Q(description__icontains=term)
+    return courses.filter(condition).order_by("code")
+
+
+def catalog_queryset(query=""):
+    """Courses with their section count, sections prefetched in one query."""
+    courses = Course.objects.annotate(section_count=Count("sections")).prefetch_related(Prefetch(
+        "sections",
+        queryset=Section.objects.select_related("lecturer").order_by("section_type", "section_number"),
+    ))
+    return search_courses(courses, query)
+
+
+def _section_entry(section):
+    return {
+        "id": section.id,
+        "type": section.section_type,
+        "number": section.section_number,
+        "lecturer": f"{section.lecturer.first_name} {section.lecturer.last_name}" if section.lecturer else None,
+        "day": section.start_date.strftime("%A") if section.start_date else None,
+        "start_date": section.start_date.isoformat() if section.start_date else None,
+        "time": section.class_time.strftime("%H:%M") if section.class_time else None,
+        "duration": section.duration,
+    }
+
+
+def build_page(query="", page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Uncached catalog page as plain data, without seat counts (see :func:`with_seats`)."""
+    paginator = Paginator(catalog_queryset(query), page_size)
+    try:
+        current = paginator.page(page)
+    except EmptyPage:
+        current = paginator.page(paginator.num_pages)
+    return {
+        "query": query,
+        "page": current.number,
+        "num_pages": paginator.num_pages,
+        "count": paginator.count,
+        "has_next": current.has_next(),
+        "has_previous": current.has_previous(),
+        "results": [
+            {
+                "id": course.id,
+                "code": course.code,
+                "name": course.name,
+                "description": course.description or "",
+                "tutorial_required": course.tutorial_required,
+                "section_count": course.section_count,
+                "sections": [_section_entry(section) for section in course.sections.all()],
+            }
+            for course in current.object_list
+        ],
+    }
+
+
+def with_seats(data):
+    """Copy of a page with live ``max_students``/``seats_left``/``is_full`` and per-course ``open_seats``."""
+    section_ids = [section["id"] for course in data["results"] for section in course["sections"]]
+    seats = {
+        section_id: (max_students, max(max_students - seats_taken, 0))
+        for section_id, max_students, seats_taken in Section.objects.filter(id__in=section_ids).values_list(
+            "id", "max_students", "seats_taken"
+        )
+    }
+    results = []
+    for course in data["results"]:
+        sections = []
+        for section in course["sections"]:
+            max_students, seats_left = seats.get(section["id"], (0, 0))
+            sections.append(dict(section, max_students=max_students, seats_left=seats_left, is_full=seats_left == 0))
+        results.append(dict(course, sections=sections, open_seats=sum(section["seats_left"] for section in sections)))
+    return dict(data, results=results)
+
+
+def get_page(query="", page=1, page_size=DEFAULT_PAGE_SIZE):
+    """Cached :func:`build_page` with live seat counts."""
+    query = " ".join(_search_terms(query))
+    cache = get_catalog_cache()
+    key = PAGE_KEY.format(catalog_version(), page_size, page, hashlib.md5(query.encode()).hexdigest())
+    data = cache.get(key)
+    if data is None:
+        data = build_page(query, page, page_size)
+        cache.set(key, data, timeout=getattr(settings, "CATALOG_CACHE_TIMEOUT", 300))
+    return with_seats(data)
@@ -0,0 +1,18 @@
+"""System checks for the cache-backed enrollment cart."""
+from django.conf import settings
+from django.core import checks
+from users.checks import is_process_local
+
+
+@checks.register(checks.Tags.caches)
+def check_cart_cache(app_configs, **kwargs):
+    if getattr(settings, "ENROLLMENT_CART_BACKEND", "courses.cart.DatabaseCart") == "courses.cart.CacheCart" and is_process_local(
+        getattr(settings, "CART_CACHE_ALIAS", "default")
+    ):
+        return [checks.Warning(
+            "CacheCart keeps carts in a per-process cache; students lose their cart when another worker "
+            "serves them or the cache culls it.",
+            hint="Use a dedicated shared cache (Redis) for CART_CACHE_ALIAS or 'courses.cart.DatabaseCart'.",
+            id="courses.W001",
+        )]
+    return []
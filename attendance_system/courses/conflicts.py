@@ -0,0 +1,100 @@
+"""Timetable conflict engine.
+
+A section meets every week on the weekday of its ``start_date``, from
+``class_time`` for ``duration`` minutes, for ``WEEKS_PER_SEMESTER`` weeks.
+Each section is turned into a bitmap over the 10,080 minutes of a week
+(a plain Python ``int``), so "does this clash?" becomes a bitwise AND.
+
+A :class:`Timetable` holds someone's committed sections, loaded with one
+query, grouped by the date range they run over. Sections only clash when
+their date ranges overlap as well as their weekly slots, which also catches
+recurrences on the same weekday that start in different weeks.
+"""
+from datetime import timedelta
+from .models import Section, Enrollment
+from .scheduling import WEEKS_PER_SEMESTER
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def slot_mask(start, duration):
+    """Bitmap of ``duration`` minutes from minute ``start`` of the week."""
+    end = start + duration
+    mask = ((1 << (min(end, MINUTES_PER_WEEK) - start)) - 1) << start
+    if end > MINUTES_PER_WEEK:
+        # ✅ Classes running past Sunday midnight wrap to Monday morning
+        mask |= (1 << (end - MINUTES_PER_WEEK)) - 1
+    return mask
+
+
+def weekly_mask(section):
+    """Bitmap of the minutes of the week a section occupies (0 if unscheduled)."""
+    if not section.start_date or not section.class_time:
+        return 0
+    start = (
+        section.start_date.weekday() * MINUTES_PER_DAY
+        + section.class_time.hour * 60 + section.class_time.minute
+    )
+    return slot_mask(start, section.duration)
+
+
+def term_of(section):
+    """First and last class date of a section."""
+    return section.start_date, section.start_date + timedelta(weeks=WEEKS_PER_SEMESTER - 1)
+
+
+def _same_section(first, second):
+    """Unsaved sections (e.g. rows of an import) are only the same if they are the same object."""
+    return first is second or (first.pk is not None and first.pk == second.pk)
+
+
+class Timetable:
+    """Committed weekly slots of one student or lecturer."""
+
+    def __init__(self, sections=()):
+        self._terms = {}  # (first date, last date) -> [combined mask, [(mask, section), ...]]
+        for section in sections:
+            self.add(section)
+
+    @classmethod
+    def for_student(cls, student, exclude_enrollment_id=None, extra_sections=()):
+        """Timetable of a student's enrolled sections (one query) plus ``extra_sections``."""
+        enrollments = Enrollment.objects.filter(student=student).select_related("section")
+        if exclude_enrollment_id:
+            enrollments = enrollments.exclude(id=exclude_enrollment_id)
+        return cls([enrollment.section for enrollment in enrollments] + list(extra_sections))
+
+    @classmethod
+    def for_lecturer(cls, lecturer, exclude_section_id=None):
+        """Timetable of the sections a lecturer teaches (one query)."""
+        sections = Section.objects.filter(lecturer=lecturer)
+        if exclude_section_id:
+            sections = sections.exclude(id=exclude_section_id)
+        return cls(sections)
+
+    def add(self, section):
+        mask = weekly_mask(section)
+        if not mask:
+            return
+        term = self._terms.setdefault(term_of(section), [0, []])
+        term[0] |= mask
+        term[1].append((mask, section))
+
+    def clash(self, section):
+        """Return the first committed section that clashes with ``section``, or ``None``."""
+        mask = weekly_mask(section)
+        if not mask:
+            return None
+        first, last = term_of(section)
+        for (term_first, term_last), (combined, entries) in self._terms.items():
+            if term_first > last or first > term_last or not combined & mask:
+                continue
+            for entry_mask, committed in entries:
+                if entry_mask & mask and not _same_section(committed, section):
+                    return committed
+        return None
+
+    def clash_map(self, candidates):
+        """Map each candidate section's ID to the section it clashes with (or ``None``)."""
+        return {candidate.pk: self.clash(candidate) for candidate in candidates}
@@ -1,7 +1,10 @@
 from django import forms
 from .models import Course, Section, Enrollment, EnrollmentCart
 from datetime import timedelta
+from django.urls import reverse_lazy
+from django.utils.text import format_lazy
 from users.models import User
+from users.autocomplete import AutocompleteSelect, user_label
 
 class CourseForm(forms.ModelForm):
     class Meta:
@@ -36,31 +39,15 @@ class SectionForm(forms.ModelForm):
     class Meta:
         model = Section
         fields = ['course', 'section_type', 'section_number', 'lecturer', 'start_date', 'class_time', 'duration', 'max_students']
+        # ✅ Courses and lecturers are searched on demand instead of listing every row
+        widgets = {
+            'course': AutocompleteSelect(reverse_lazy('autocomplete_courses')),
+            'lecturer': AutocompleteSelect(reverse_lazy('autocomplete_lecturers')),
+        }
 
-    def clean(self):
-        """Validate schedule conflicts and ensure correct section limits."""
-        cleaned_data = super().clean()
-        start_date = cleaned_data.get("start_date")
-        class_time = cleaned_data.get("class_time")
-        lecturer = cleaned_data.get("lecturer")
-
-        if start_date and class_time and lecturer:
-            try:
-                section = Section(
-                    course=cleaned_data["course"],
-                    section_type=cleaned_data["section_type"],
-                    section_number=cleaned_data["section_number"],
-                    lecturer=lecturer,
-                    start_date=start_date,
-                    class_time=class_time,
-                    duration=cleaned_data["duration"],
-                    max_students=cleaned_data["max_students"]
-                )
-                section.clean()
-            except forms.ValidationError as e:
-                raise forms.ValidationError(e)
-
-        return cleaned_data
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['lecturer'].label_from_instance = user_label
 
 class EnrollmentForm(forms.ModelForm):
     class Meta:
@@ -93,8 +80,7 @@ class EnrollmentForm(forms.ModelForm):
 
         if self.student and section:
             try:
-                enrolled_students = Enrollment.objects.filter(section=section).count()
-                if enrolled_students >= section.max_students:
+                if section.is_full:
                     raise forms.ValidationError(f"The section {section.section_type} {section.section_number} is full. Please select another section.")
 
                 enrollment = Enrollment(student=self.student, section=section)
@@ -135,10 +121,10 @@ class EnrollmentCartForm(forms.ModelForm):
             raise forms.ValidationError("You must select at least one section (Lecture or Tutorial).")
 
         # ✅ Ensure sections are not full
-        if lecture_section and Enrollment.objects.filter(section=lecture_section).count() >= lecture_section.max_students:
+        if lecture_section and lecture_section.is_full:
             raise forms.ValidationError(f"Lecture section {lecture_section.section_number} is full. Please select another.")
 
-        if tutorial_section and Enrollment.objects.filter(section=tutorial_section).count() >= tutorial_section.max_students:
+        if tutorial_section and tutorial_section.is_full:
             raise forms.ValidationError(f"Tutorial section {tutorial_section.section_number} is full. Please select another.")
 
         return cleaned_data
@@ -149,10 +135,21 @@ class AdminEnrollmentForm(forms.ModelForm):
     student = forms.ModelChoiceField(
         queryset=User.objects.filter(role='Student'),  # ✅ Fetch only Students
         required=True,
-        label="Select Student"
+        label="Select Student",
+        widget=AutocompleteSelect(reverse_lazy('autocomplete_students')),
     )
 
     class Meta:
         model = Enrollment
         fields = ['student', 'section']
+        widgets = {'section': AutocompleteSelect(format_lazy('{}?open=1', reverse_lazy('autocomplete_sections')))}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['student'].label_from_instance = user_label
+
 
+class SectionImportForm(forms.Form):
+    """CSV upload for the bulk course/section import."""
+    csv_file = forms.FileField(label="CSV file", widget=forms.ClearableFileInput(attrs={'accept': '.csv'}))
+    dry_run = forms.BooleanField(required=False, label="Only validate (don't import)")
@@ -0,0 +1,178 @@
+"""iCalendar (.ics) feeds of class sessions.
+
+Every student and lecturer gets a secret feed URL (their user ID signed with
+a key that includes ``User.calendar_feed_secret``, so no login is needed by
+calendar clients). Rotating the secret with :func:`reset_feed_token` revokes
+every URL handed out before. A student's feed lists the sessions of
+their enrolled sections, a lecturer's feed the sessions of the sections they
+teach. Feeds are rendered line by line from one ``values_list`` query,
+cached per user under the schedule change stamp
+(``User.schedule_changed_at``, moved by ``courses/student_schedule.py``) and
+served with a strong ETag (a hash of the body), so polling clients get 304s
+until something in the schedule changes. The stamp is read from the user row
+the token is checked against, so every worker sees a change as soon as it is
+committed, whichever cache holds the feeds.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+from users.models import User
+from .models import Section
+from .student_schedule import get_schedule_cache
+
+FEED_KEY = "calendar:feed:{}:{}"
+TOKEN_SALT = "courses.calendar-feed"
+PRODID = "-//FYPAS//Class Schedule//EN"
+
+SESSION_FIELDS = (
+    "sessions__id", "sessions__date", "sessions__start_time", "duration",
+    "course__code", "course__name", "section_type", "section_number",
+)
+
+
+def _signer(secret):
+    return signing.Signer(salt=f"{TOKEN_SALT}:{secret}")
+
+
+def feed_token(user):
+    return _signer(user.calendar_feed_secret).sign(str(user.pk))
+
+
+def user_for_token(token):
+    """Return the active student or lecturer a feed token belongs to, or ``None``."""
+    user_id = token.partition(":")[0]
+    if not (user_id.isascii() and user_id.isdecimal()):
+        return None
+    user = User.objects.filter(pk=int(user_id), is_active=True, role__in=["Student", "Lecturer"]).first()
+    if user is None:
+        return None
+    try:
+        _signer(user.calendar_feed_secret).unsign(token)
+    except signing.BadSignature:
+        return None
+    return user
+
+
+def reset_feed_token(user):
+    """Give ``user`` a new feed URL; the old one stops working immediately."""
+    user.calendar_feed_secret = get_random_string(32)
+    user.save(update_fields=["calendar_feed_secret"])
+
+
+def feed_url(request, user):
+    return request.build_absolute_uri(reverse("calendar_feed", args=[feed_token(user)]))
+
+
+def _escape(text):
+    return str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line):
+    """Split content lines longer than 75 octets (RFC 5545, section 3.1)."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1  # ✅ Never split inside a multi-byte character
+        parts.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74  # Continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _session_rows(user_ids, role):
+    """``(user_id, session fields...)`` rows for the feeds of ``user_ids``, grouped by user."""
+    if role == "Lecturer":
+        sections = Section.objects.filter(lecturer_id__in=user_ids)
+        owner = "lecturer_id"
+    else:
+        sections = Section.objects.filter(enrollment__student_id__in=user_ids)
+        owner = "enrollment__student_id"
+    return (
+        sections.filter(sessions__isnull=False)
+        .order_by(owner, "sessions__date", "sessions__start_time")
+        .values_list(owner, *SESSION_FIELDS)
+    )
+
+
+def iter_feed(rows, stamp):
+    """Yield the lines of a VCALENDAR for ``rows`` of :data:`SESSION_FIELDS`."""
+    local_tz = ZoneInfo(settings.TIME_ZONE)
+    dtstamp = _utc(datetime.fromtimestamp(stamp, tz=timezone.utc))
+    yield "BEGIN:VCALENDAR\r\n"
+    yield "VERSION:2.0\r\n"
+    yield f"PRODID:{PRODID}\r\n"
+    yield "CALSCALE:GREGORIAN\r\n"
+    yield "X-WR-CALNAME:Class Schedule\r\n"
+    for session_id, session_date, start_time, duration, code, name, section_type, section_number in rows:
+        start = datetime.combine(session_date, start_time, tzinfo=local_tz)
+        yield "BEGIN:VEVENT\r\n"
+        yield f"UID:session-{session_id}@fypas\r\n"
+        yield f"DTSTAMP:{dtstamp}\r\n"
+        yield f"DTSTART:{_utc(start)}\r\n"
+        yield f"DTEND:{_utc(start + timedelta(minutes=duration))}\r\n"
+        yield _fold(f"SUMMARY:{_escape(f'{code} {name} ({section_type} {section_number})')}")
+        yield "END:VEVENT\r\n"
+    yield "END:VCALENDAR\r\n"
+
+
+def _store(user_id, stamp, lines):
+    body = "".join(lines).encode("utf-8")
+    feed = ('"%s"' % hashlib.sha256(body).hexdigest()[:32], body)
+    get_schedule_cache().set(FEED_KEY.format(user_id, stamp), feed, timeout=getattr(settings, "CALENDAR_FEED_TIMEOUT", 86400))
+    return feed
+
+
+def feed_stamp(user):
+    return user.schedule_changed_at.timestamp()
+
+
+def cached_feed(user):
+    """Return ``(etag, body)`` of a cached, current feed, or ``None``."""
+    return get_schedule_cache().get(FEED_KEY.format(user.pk, feed_stamp(user)))
+
+
+def get_feed(user):
+    """Return ``(etag, body)`` for a user's feed, rendering it on a cache miss."""
+    feed = cached_feed(user)
+    if feed is None:
+        stamp = feed_stamp(user)
+        rows = (row[1:] for row in _session_rows([user.pk], user.role).iterator())
+        feed = _store(user.pk, stamp, iter_feed(rows, stamp))
+    return feed
+
+
+def prerender_feeds(users):
+    """Render and cache the feeds of ``users`` whose cached copy is stale.
+
+    ``users`` need ``id``, ``role`` and ``schedule_changed_at`` loaded. Rows
+    for the whole batch are read with one query per role. Returns the number
+    of feeds rendered.
+    """
+    keys = {user: FEED_KEY.format(user.pk, feed_stamp(user)) for user in users}
+    cached = get_schedule_cache().get_many(keys.values())
+    stale = {}
+    for user, key in keys.items():
+        if key not in cached:
+            stale.setdefault(user.role, []).append(user)
+
+    rendered = 0
+    for role, stale_users in stale.items():
+        rows_by_user = {user.pk: [] for user in stale_users}
+        for owner_id, *fields in _session_rows(list(rows_by_user), role).iterator(chunk_size=2000):
+            rows_by_user[owner_id].append(fields)
+        for user in stale_users:
+            stamp = feed_stamp(user)
+            _store(user.pk, stamp, iter_feed(rows_by_user[user.pk], stamp))
+            rendered += 1
+    return rendered
@@ -0,0 +1,183 @@
+"""Bulk import of courses and sections from CSV.
+
+One row per section (a row without ``section_type`` only creates the
+course)::
+
+    course_code,course_name,description,lecture_required,tutorial_required,
+    section_type,section_number,lecturer,start_date,class_time,duration,max_students
+
+``lecturer`` is a matric ID, ``start_date`` is ``YYYY-MM-DD`` and
+``class_time`` is ``HH:MM``. The whole file is validated before anything is
+written: lecturers, existing courses and existing sections are loaded with
+one query each, and lecturer overlaps are checked in memory with the weekly
+slot bitmaps of ``courses/conflicts.py``, so every problem in the file is
+reported at once. A clean file is written with ``bulk_create`` and its class
+sessions with one :func:`~courses.scheduling.sync_sessions` call.
+"""
+import csv
+from collections import namedtuple
+from datetime import date, datetime
+from django.db import transaction
+from users.models import User
+from .catalog import invalidate_catalog
+from .conflicts import Timetable
+from .models import Course, Section
+from .scheduling import sync_sessions
+
+COLUMNS = [
+    "course_code", "course_name", "description", "lecture_required", "tutorial_required",
+    "section_type", "section_number", "lecturer", "start_date", "class_time", "duration", "max_students",
+]
+REQUIRED_COLUMNS = {"course_code", "course_name"}
+SECTION_TYPES = {choice for choice, _ in Section.SECTION_TYPES}
+
+ImportResult = namedtuple("ImportResult", ["courses", "sections", "sessions", "errors"])
+
+_TRUE = {"1", "true", "yes", "y"}
+
+
+def _flag(value):
+    return (value or "").strip().lower() in _TRUE
+
+
+def _int(value, name, low, high, errors, line):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        errors.append((line, f"{name} must be a whole number."))
+        return None
+    if not low <= number <= high:
+        errors.append((line, f"{name} must be between {low} and {high}."))
+        return None
+    return number
+
+
+def read_rows(csv_file):
+    """Parse a text-mode CSV file into ``(line number, row dict)`` pairs."""
+    reader = csv.DictReader(csv_file)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}.")
+    return [
+        (line, {key.strip(): (value or "").strip() for key, value in row.items() if key})
+        for line, row in enumerate(reader, start=2)
+    ]
+
+
+def validate(rows):
+    """Check every row; returns ``(courses, sections, errors)`` with unsaved model instances."""
+    errors = []
+    codes = {row["course_code"] for _, row in rows if row.get("course_code")}
+    matric_ids = {row["lecturer"] for _, row in rows if row.get("lecturer")}
+
+    # ✅ One query each for everything the file refers to
+    existing_courses = {course.code: course for course in Course.objects.filter(code__in=codes)}
+    lecturers = {
+        lecturer.matric_id: lecturer
+        for lecturer in User.objects.filter(matric_id__in=matric_ids, role="Lecturer")
+    }
+    taken = set(
+        Section.objects.filter(course__code__in=codes).values_list("course__code", "section_type", "section_number")
+    )
+    timetables = {lecturer.id: Timetable() for lecturer in lecturers.values()}
+    for section in Section.objects.filter(lecturer__in=lecturers.values()).select_related("course"):
+        timetables[section.lecturer_id].add(section)
+
+    courses, sections = {}, []
+    for line, row in rows:
+        code = row.get("course_code", "")
+        if not code:
+            errors.append((line, "course_code is required."))
+            continue
+        if len(code) > 10:
+            errors.append((line, f"Course code {code} is longer than 10 characters."))
+            continue
+
+        course = existing_courses.get(code) or courses.get(code)
+        if course is None:
+            if not row.get("course_name"):
+                errors.append((line, f"course_name is required for new course {code}."))
+                continue
+            if len(row["course_name"]) > 100:
+                errors.append((line, f"course_name of {code} is longer than 100 characters."))
+                continue
+            course = Course(
+                code=code, name=row["course_name"], description=row.get("description") or None,
+                lecture_required=_flag(row.get("lecture_required")), tutorial_required=_flag(row.get("tutorial_required")),
+            )
+            courses[code] = course
+        elif row.get("course_name") and row["course_name"] != course.name:
+            errors.append((line, f"Course {code} is already named \"{course.name}\"."))
+
+        section_type = row.get("section_type", "")
+        if not section_type:
+            continue  # Course-only row
+        section_type = section_type.capitalize()
+        if section_type not in SECTION_TYPES:
+            errors.append((line, f"section_type must be Lecture or Tutorial, not \"{row['section_type']}\"."))
+            continue
+
+        row_errors = []
+        section_number = _int(row.get("section_number"), "section_number", 1, 999, row_errors, line)
+        duration = _int(row.get("duration") or 60, "duration", 30, 300, row_errors, line)
+        max_students = _int(row.get("max_students") or 30, "max_students", 5, 500, row_errors, line)
+
+        start_date = class_time = None
+        try:
+            if row.get("start_date"):
+                start_date = date.fromisoformat(row["start_date"])
+            if row.get("class_time"):
+                class_time = datetime.strptime(row["class_time"], "%H:%M").time()
+        except ValueError:
+            row_errors.append((line, "start_date must be YYYY-MM-DD and class_time HH:MM."))
+        if bool(start_date) != bool(class_time):
+            row_errors.append((line, "start_date and class_time must be given together."))
+
+        lecturer = None
+        if row.get("lecturer"):
+            lecturer = lecturers.get(row["lecturer"])
+            if lecturer is None:
+                row_errors.append((line, f"Lecturer {row['lecturer']} does not exist."))
+
+        key = (code, section_type, section_number)
+        if section_number is not None and key in taken:
+            row_errors.append((line, f"{code} {section_type} {section_number} already exists."))
+        taken.add(key)
+
+        if row_errors:
+            errors.extend(row_errors)
+            continue
+
+        section = Section(
+            course=course, section_type=section_type, section_number=section_number, lecturer=lecturer,
+            start_date=start_date, class_time=class_time, duration=duration, max_students=max_students,
+        )
+        if lecturer and start_date:
+            # ✅ Compare against the lecturer's existing sections and every earlier row of the file
+            clash = timetables[lecturer.id].clash(section)
+            if clash:
+                errors.append((line, f"Lecturer {lecturer.matric_id} already teaches {clash} at this time."))
+                continue
+            timetables[lecturer.id].add(section)
+        sections.append(section)
+
+    return list(courses.values()), sections, sorted(errors)
+
+
+def import_sections(csv_file, dry_run=False):
+    """Validate and import a CSV file. Nothing is written if any row has an error."""
+    try:
+        rows = read_rows(csv_file)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return ImportResult(0, 0, 0, [(1, str(e))])
+
+    courses, sections, errors = validate(rows)
+    if errors or dry_run:
+        return ImportResult(len(courses), len(sections), 0, errors)
+
+    with transaction.atomic():
+        Course.objects.bulk_create(courses, batch_size=1000)
+        Section.objects.bulk_create(sections, batch_size=1000)  # ✅ Picks up the new courses' primary keys
+        stats = sync_sessions(sections)
+        invalidate_catalog()  # bulk_create sends no signals
+    return ImportResult(len(courses), len(sections), stats["created"], [])
@@ -0,0 +1,43 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from courses.models import Section
+from courses.solver import assign_timeslots
+
+
+class Command(BaseCommand):
+    help = 'Assign weekday/time slots to unscheduled sections (lecturer, student and course clashes avoided)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester-start', type=date.fromisoformat, required=True,
+                            help='First day of the semester (YYYY-MM-DD)')
+        parser.add_argument('--course', nargs='*', help='Only these course codes')
+        parser.add_argument('--rounds', type=int, default=50, help='Local search rounds')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for tie-breaking')
+        parser.add_argument('--dry-run', action='store_true', help='Solve without saving')
+
+    def handle(self, *args, **kwargs):
+        sections = Section.objects.filter(Q(start_date__isnull=True) | Q(class_time__isnull=True)).select_related('course')
+        if kwargs['course']:
+            sections = sections.filter(course__code__in=kwargs['course'])
+
+        started = time.perf_counter()
+        solution, scheduled = assign_timeslots(
+            sections, kwargs['semester_start'], max_rounds=kwargs['rounds'], seed=kwargs['seed'], dry_run=kwargs['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{len(solution.slots)} sections solved in {elapsed:.2f}s: "
+            f"{solution.greedy_clashes} student clashes after greedy, {solution.student_clashes} after "
+            f"{solution.moves} local search moves"
+        )
+        if solution.hard_conflicts:
+            self.stdout.write(self.style.WARNING(
+                f"{len(solution.hard_conflicts)} sections left unscheduled: their lecturer has no free slot"
+            ))
+        if kwargs['dry_run']:
+            self.stdout.write("Dry run: nothing saved")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Scheduled {len(scheduled)} sections"))
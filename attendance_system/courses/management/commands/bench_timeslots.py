@@ -0,0 +1,59 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from courses.solver import Task, TimeslotSolver, LINK_WEIGHT_CAP
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the time-slot solver on synthetic semesters (no database writes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', nargs='+', type=int, default=[200, 600, 1200], help='Courses per semester')
+        parser.add_argument('--tutorials', type=int, default=2, help='Tutorial sections per course')
+        parser.add_argument('--sections-per-lecturer', type=int, default=6, help='Average teaching load')
+        parser.add_argument('--students-per-course', type=int, default=15, help='Students per course (x courses = enrollments)')
+        parser.add_argument('--courses-per-student', type=int, default=5, help='Courses each student takes')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **kwargs):
+        for num_courses in kwargs['courses']:
+            tasks, links = self.synthetic_semester(num_courses, kwargs)
+            started = time.perf_counter()
+            solver = TimeslotSolver(tasks, links=links, seed=kwargs['seed'])
+            built = time.perf_counter() - started
+            solution = solver.solve()
+            solved = time.perf_counter() - started - built
+            self.stdout.write(
+                f"{num_courses} courses / {len(tasks)} sections: graph {built:.2f}s, solve {solved:.2f}s; "
+                f"student clashes {solution.greedy_clashes} (greedy) -> {solution.student_clashes} "
+                f"({solution.moves} moves); lecturer conflicts {len(solution.hard_conflicts)}"
+            )
+
+    def synthetic_semester(self, num_courses, options):
+        rng = random.Random(options['seed'])
+        tutorials = options['tutorials']
+        num_sections = num_courses * (1 + tutorials)
+        num_lecturers = max(1, num_sections // options['sections_per_lecturer'])
+        num_students = max(1, num_courses * options['students_per_course'] // options['courses_per_student'])
+
+        tasks, links, sections_by_course = [], [], []
+        students = {}
+        next_id = 1
+        for _ in range(num_courses):
+            ids = list(range(next_id, next_id + 1 + tutorials))
+            next_id += len(ids)
+            sections_by_course.append(ids)
+            for section_id in ids:
+                students[section_id] = set()
+            links.extend((ids[0], tutorial_id, LINK_WEIGHT_CAP) for tutorial_id in ids[1:])
+
+        # ✅ Each student takes a lecture and one tutorial of several courses
+        for student_id in range(num_students):
+            for course in rng.sample(sections_by_course, min(options['courses_per_student'], num_courses)):
+                students[course[0]].add(student_id)
+                if tutorials:
+                    students[rng.choice(course[1:])].add(student_id)
+
+        for section_id, members in students.items():
+            tasks.append(Task(section_id, rng.choice([60, 60, 90, 120]), rng.randrange(1, num_lecturers + 1), frozenset(members)))
+        return tasks, links
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from courses.importer import import_sections
+
+
+class Command(BaseCommand):
+    help = 'Import courses and sections from a CSV file (see courses/importer.py for the columns)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the file')
+
+    def handle(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with open(kwargs['path'], newline='', encoding='utf-8-sig') as csv_file:
+                result = import_sections(csv_file, dry_run=kwargs['dry_run'])
+        except OSError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if result.errors:
+            for line, message in result.errors:
+                self.stderr.write(f"Line {line}: {message}")
+            raise CommandError(f"{len(result.errors)} error(s) found; nothing was imported.")
+
+        if kwargs['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"File is valid: {result.courses} new courses and {result.sections} sections ({elapsed:.2f}s)"
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.courses} courses, {result.sections} sections and "
+            f"{result.sessions} class sessions in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from courses.ical import prerender_feeds
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the iCalendar feeds of students and lecturers whose schedule changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users rendered per batch')
+        parser.add_argument('--role', choices=['Student', 'Lecturer'], help='Only users with this role')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        users = User.objects.filter(is_active=True, role__in=[kwargs['role']] if kwargs['role'] else ['Student', 'Lecturer'])
+        users = users.order_by('id').only('id', 'role', 'schedule_changed_at')
+
+        started = time.perf_counter()
+        checked = rendered = 0
+        last_id = 0
+        while True:
+            # ✅ Keyset batches: each batch costs one session query per role, feeds still fresh are skipped
+            batch = list(users.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            rendered += prerender_feeds(batch)
+            checked += len(batch)
+            self.stdout.write(f"Checked {checked} users...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} calendar feeds ({checked - rendered} already up to date) "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
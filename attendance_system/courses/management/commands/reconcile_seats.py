@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from courses.seats import reconcile_seats
+
+
+class Command(BaseCommand):
+    help = 'Recompute Section.seats_taken from the enrollment table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--section', type=int, nargs='*', help='Only reconcile these section IDs')
+
+    def handle(self, *args, **kwargs):
+        fixed = reconcile_seats(kwargs['section'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled seat counts ({fixed} section(s) corrected)"))
@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from courses.models import Section
+from courses.scheduling import sync_sessions
+
+
+class Command(BaseCommand):
+    help = 'Regenerate class sessions for all sections in batches, optionally moving them to a new semester'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Sections processed per transaction')
+        parser.add_argument('--semester-start', type=date.fromisoformat,
+                            help='First day of the new semester (YYYY-MM-DD); each section keeps its weekday')
+        parser.add_argument('--course', nargs='*', help='Only these course codes')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        semester_start = kwargs['semester_start']
+
+        sections = Section.objects.order_by('id')
+        if kwargs['course']:
+            sections = sections.filter(course__code__in=kwargs['course'])
+
+        totals = {"sections": 0, "created": 0, "updated": 0, "deleted": 0}
+        last_id = 0
+        while True:
+            # ✅ Keyset batches keep each transaction small regardless of section count
+            batch = list(sections.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            with transaction.atomic():
+                if semester_start:
+                    moved = []
+                    for section in batch:
+                        if section.start_date:
+                            offset = (section.start_date.weekday() - semester_start.weekday()) % 7
+                            section.start_date = semester_start + timedelta(days=offset)
+                            moved.append(section)
+                    Section.objects.bulk_update(moved, ['start_date'])
+                stats = sync_sessions(batch)
+
+            totals["sections"] += len(batch)
+            for key, value in stats.items():
+                totals[key] += value
+            self.stdout.write(f"Processed {totals['sections']} sections...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sessions regenerated for {totals['sections']} sections: "
+            f"{totals['created']} created, {totals['updated']} updated, {totals['deleted']} deleted"
+        ))
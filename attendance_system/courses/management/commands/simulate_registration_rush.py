@@ -0,0 +1,91 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, DatabaseError
+from attendance.benchmarking import create_bench_section, cleanup_bench_data, percentile
+from courses.models import Enrollment, EnrollmentCart, Section, Waitlist
+from courses.registration import FairAdmissionQueue, RegistrationBusy, finalize_cart
+
+
+class Command(BaseCommand):
+    help = 'Simulate a registration rush: many students finalizing their carts within the same window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000, help='Students finalizing their carts')
+        parser.add_argument('--window', type=float, default=60, help='Seconds over which the requests arrive')
+        parser.add_argument('--seats', type=int, default=None, help='Lecture capacity (default: 80%% of students)')
+        parser.add_argument('--workers', type=int, default=200, help='Concurrent request threads')
+        parser.add_argument('--max-concurrent', type=int, default=20, help='Admission queue concurrency limit')
+        parser.add_argument('--queue-timeout', type=float, default=30, help='Seconds a request may wait in the queue')
+
+    def handle(self, *args, **kwargs):
+        num_students = kwargs['students']
+        seats = kwargs['seats'] if kwargs['seats'] is not None else num_students * 4 // 5
+
+        cleanup_bench_data("R")
+        # ✅ Build the students on a throwaway section, then give each a cart for a fresh lecture/tutorial pair
+        section, students = create_bench_section(num_students, label="R")
+        Enrollment.objects.filter(section=section).delete()
+        course = section.course
+        course.tutorial_required = True
+        course.save(update_fields=['tutorial_required'])
+        lecture = Section.objects.create(course=course, section_type="Lecture", section_number=2, max_students=seats)
+        tutorial = Section.objects.create(course=course, section_type="Tutorial", section_number=1, max_students=num_students)
+        EnrollmentCart.objects.bulk_create(
+            [EnrollmentCart(student=student, course=course, lecture_section=lecture, tutorial_section=tutorial)
+             for student in students],
+            batch_size=1000,
+        )
+
+        queue = FairAdmissionQueue(kwargs['max_concurrent'], kwargs['queue_timeout'])
+        arrivals = sorted(random.uniform(0, kwargs['window']) for _ in students)
+        latencies = []
+
+        def finalize(job):
+            student, arrival = job
+            delay = started + arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            request_started = time.perf_counter()
+            try:
+                with queue.admit():
+                    result = finalize_cart(student)
+                outcome = "enrolled" if result.enrolled else "waitlisted"
+            except RegistrationBusy:
+                outcome = "busy"
+            except (ValidationError, DatabaseError):
+                outcome = "error"
+            finally:
+                close_old_connections()
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            return outcome
+
+        self.stdout.write(
+            f"{num_students} students, {seats} lecture seats, arriving over {kwargs['window']:.0f}s "
+            f"(admission limit {kwargs['max_concurrent']})..."
+        )
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=kwargs['workers']) as pool:
+                results = list(pool.map(finalize, zip(students, arrivals)))
+            elapsed = time.perf_counter() - started
+
+            lecture.refresh_from_db()
+            rows = Enrollment.objects.filter(section=lecture).count()
+            waitlisted = Waitlist.objects.filter(section=lecture).count()
+            self.stdout.write(
+                f"{len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.0f} req/s): "
+                f"p50={percentile(latencies, 50):.1f}ms p99={percentile(latencies, 99):.1f}ms"
+            )
+            self.stdout.write(
+                f"{results.count('enrolled')} enrolled, {results.count('waitlisted')} waitlisted, "
+                f"{results.count('busy')} turned away by the queue, {results.count('error')} errors; "
+                f"lecture seats_taken={lecture.seats_taken}/{lecture.max_students}, {waitlisted} waitlist entries"
+            )
+            if rows > lecture.max_students or rows != lecture.seats_taken:
+                raise CommandError("Lecture was overbooked or the seat counter drifted")
+            self.stdout.write(self.style.SUCCESS("No overbooking detected"))
+        finally:
+            cleanup_bench_data("R")
@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, OperationalError
+from attendance.benchmarking import create_bench_section, cleanup_bench_data
+from courses.models import Enrollment, Section
+
+
+class Command(BaseCommand):
+    help = 'Fire many simultaneous enrollments at one section and verify it is never overbooked'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seats', type=int, default=30, help='Capacity of the target section')
+        parser.add_argument('--students', type=int, default=300, help='Students trying to enroll at once')
+        parser.add_argument('--workers', type=int, default=50, help='Concurrent threads')
+
+    def handle(self, *args, **kwargs):
+        cleanup_bench_data("S")
+        # ✅ Build the students on a throwaway section, then point them at a fresh one
+        section, students = create_bench_section(kwargs['students'], label="S")
+        Enrollment.objects.filter(section=section).delete()
+        target = Section.objects.create(
+            course=section.course, section_type="Tutorial", section_number=1, max_students=kwargs['seats'],
+        )
+
+        def enroll(student):
+            try:
+                Enrollment.objects.create(student=student, section=target)
+                return "enrolled"
+            except ValidationError:
+                return "full"
+            except OperationalError:
+                return "error"
+            finally:
+                close_old_connections()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=kwargs['workers']) as pool:
+                results = list(pool.map(enroll, students))
+            elapsed = time.perf_counter() - started
+
+            target.refresh_from_db()
+            rows = Enrollment.objects.filter(section=target).count()
+            self.stdout.write(
+                f"{len(students)} attempts in {elapsed:.2f}s: {results.count('enrolled')} enrolled, "
+                f"{results.count('full')} rejected as full, {results.count('error')} database errors; "
+                f"{rows} enrollment rows, seats_taken={target.seats_taken}/{target.max_students}"
+            )
+            if rows > target.max_students or rows != target.seats_taken:
+                raise CommandError("Section was overbooked or the seat counter drifted")
+            self.stdout.write(self.style.SUCCESS("No overbooking detected"))
+        finally:
+            cleanup_bench_data("S")
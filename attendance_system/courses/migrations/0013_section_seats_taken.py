@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_existing_seats(apps, schema_editor):
+    Section = apps.get_model('courses', 'Section')
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    Section.objects.update(seats_taken=Coalesce(
+        Subquery(
+            Enrollment.objects.filter(section=OuterRef('pk'))
+            .order_by().values('section').annotate(total=Count('id')).values('total')
+        ),
+        Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_alter_classsession_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing_seats, migrations.RunPython.noop),
+    ]
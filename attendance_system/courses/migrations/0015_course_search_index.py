@@ -0,0 +1,62 @@
+from django.db import migrations
+
+# Must stay identical to courses.catalog.SEARCH_DOCUMENT for Postgres to use the index
+SEARCH_DOCUMENT = (
+    "(setweight(to_tsvector('english'::regconfig, coalesce(courses_course.code, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(courses_course.name, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(courses_course.description, '')), 'C'))"
+)
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE courses_course_fts USING fts5("
+    "code, name, description, content='courses_course', content_rowid='id')",
+    "INSERT INTO courses_course_fts(rowid, code, name, description) "
+    "SELECT id, code, name, coalesce(description, '') FROM courses_course",
+    "CREATE TRIGGER courses_course_fts_insert AFTER INSERT ON courses_course BEGIN "
+    "INSERT INTO courses_course_fts(rowid, code, name, description) "
+    "VALUES (new.id, new.code, new.name, coalesce(new.description, '')); END",
+    "CREATE TRIGGER courses_course_fts_delete AFTER DELETE ON courses_course BEGIN "
+    "INSERT INTO courses_course_fts(courses_course_fts, rowid, code, name, description) "
+    "VALUES ('delete', old.id, old.code, old.name, coalesce(old.description, '')); END",
+    "CREATE TRIGGER courses_course_fts_update AFTER UPDATE ON courses_course BEGIN "
+    "INSERT INTO courses_course_fts(courses_course_fts, rowid, code, name, description) "
+    "VALUES ('delete', old.id, old.code, old.name, coalesce(old.description, '')); "
+    "INSERT INTO courses_course_fts(rowid, code, name, description) "
+    "VALUES (new.id, new.code, new.name, coalesce(new.description, '')); END",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS courses_course_fts_update",
+    "DROP TRIGGER IF EXISTS courses_course_fts_delete",
+    "DROP TRIGGER IF EXISTS courses_course_fts_insert",
+    "DROP TABLE IF EXISTS courses_course_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f"CREATE INDEX courses_course_search_idx ON courses_course USING gin ({SEARCH_DOCUMENT})")
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS courses_course_search_idx")
+    elif vendor == 'sqlite':
+        for statement in SQLITE_REVERSE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_waitlist'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
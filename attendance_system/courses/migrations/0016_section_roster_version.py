@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='roster_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_section_roster_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='waitlist',
+            index=models.Index(fields=['section', 'position'], name='waitlist_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_waitlist_queue_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waitlist',
+            name='paired_section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.section'),
+        ),
+    ]
@@ -1,5 +1,4 @@
-from datetime import timedelta, datetime
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from users.models import User
 
@@ -30,6 +29,11 @@ class Section(models.Model):
     class_time = models.TimeField(null=True, blank=True)  # ✅ Time for each session
     duration = models.PositiveIntegerField(default=60)  # Duration in minutes
     max_students = models.PositiveIntegerField(default=30)  # ✅ Section-based student limit
+    seats_taken = models.PositiveIntegerField(default=0)  # ✅ Maintained atomically by courses/seats.py
+    roster_version = models.PositiveIntegerField(default=0)  # ✅ Bumped on every enrollment change (courses/roster.py)
+
+    # Only changed with atomic UPDATEs, never from an in-memory copy
+    ATOMIC_FIELDS = ('seats_taken', 'roster_version')
 
     class Meta:
         unique_together = ('course', 'section_type', 'section_number')
@@ -37,22 +41,35 @@ class Section(models.Model):
     def __str__(self):
         return f"{self.course.code} - {self.section_type} {self.section_number}"
 
+    def save(self, *args, **kwargs):
+        """Never overwrite the counters in ATOMIC_FIELDS from a stale in-memory copy."""
+        self._previous_lecturer_id = None
+        if not self._state.adding and self.pk:
+            self._previous_lecturer_id = (
+                Section.objects.filter(pk=self.pk).values_list("lecturer_id", flat=True).first()
+            )
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.ATOMIC_FIELDS
+                ]
+        super().save(*args, **kwargs)
+
+    @property
+    def seats_left(self):
+        return max(self.max_students - self.seats_taken, 0)
+
+    @property
+    def is_full(self):
+        return self.seats_taken >= self.max_students
+
     def clean(self):
         """Prevent overlapping schedules for lecturers."""
+        from .conflicts import Timetable
+
         if self.start_date and self.class_time and self.lecturer:
-            # ✅ Convert class_time to datetime before adding timedelta
-            start_datetime = datetime.combine(self.start_date, self.class_time)
-            end_datetime = start_datetime + timedelta(minutes=self.duration)  
-
-            # ✅ Find overlapping sections
-            overlapping_sections = Section.objects.filter(
-                lecturer=self.lecturer,
-                start_date=self.start_date,
-                class_time__lt=end_datetime.time(),
-                class_time__gte=self.class_time
-            ).exclude(id=self.id)
-
-            if overlapping_sections.exists():
+            # ✅ Compare weekly slots against every section the lecturer teaches
+            if Timetable.for_lecturer(self.lecturer, exclude_section_id=self.id).clash(self):
                 raise ValidationError("This lecturer already has a section scheduled at this time.")
 
         super().clean()
@@ -83,28 +100,39 @@ class Enrollment(models.Model):
 
     def clean(self):
         """Prevent students from enrolling in overlapping schedules and full sections."""
+        from .conflicts import Timetable
+
+        if self.section_id is None or self.student_id is None:
+            return super().clean()  # ✅ The missing field already reports its own error
+
         if self.section.start_date:
-            # ✅ Convert class_time to datetime for accurate comparison
-            start_datetime = datetime.combine(self.section.start_date, self.section.class_time)
-            end_datetime = start_datetime + timedelta(minutes=self.section.duration)
-
-            overlapping_enrollments = Enrollment.objects.filter(
-                student=self.student,
-                section__start_date=self.section.start_date,
-                section__class_time__lt=end_datetime.time(),
-                section__class_time__gte=self.section.class_time
-            ).exclude(id=self.id)
-
-            if overlapping_enrollments.exists():
+            # ✅ Compare weekly slots against the student's other enrollments
+            if Timetable.for_student(self.student, exclude_enrollment_id=self.id).clash(self.section):
                 raise ValidationError("This student is already enrolled in another section at this time.")
 
-        # ✅ Check if the section has reached maximum capacity
-        enrolled_students = Enrollment.objects.filter(section=self.section).count()
-        if enrolled_students >= self.section.max_students:
+        # ✅ Check if the section has reached maximum capacity (enforced atomically in save)
+        if self.section.is_full:
             raise ValidationError(f"The section {self.section.section_type} {self.section.section_number} is full. Please select another section.")
 
         super().clean()
 
+    def save(self, *args, **kwargs):
+        """Reserve a seat with a conditional UPDATE before writing the enrollment."""
+        from .seats import reserve_seats, release_seats
+
+        with transaction.atomic():
+            self._previous_section_id = None
+            if self.pk:
+                self._previous_section_id = (
+                    Enrollment.objects.filter(pk=self.pk).values_list("section_id", flat=True).first()
+                )
+            if self._previous_section_id != self.section_id:
+                if not reserve_seats(self.section_id):
+                    raise ValidationError(f"The section {self.section.section_type} {self.section.section_number} is full. Please select another section.")
+                if self._previous_section_id:
+                    release_seats(self._previous_section_id)
+            super().save(*args, **kwargs)
+
 class EnrollmentCart(models.Model):
     """Temporary cart for student self-enrollment before final submission."""
     student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'Student'})
@@ -120,6 +148,8 @@ class EnrollmentCart(models.Model):
 
     def clean(self):
         """Prevent students from adding incomplete selections and conflicting sections to their cart."""
+        from .conflicts import Timetable
+
         cart_items = EnrollmentCart.objects.filter(student=self.student).exclude(id=self.id)
 
         # ✅ Ensure course requirements are met before allowing finalization
@@ -128,31 +158,45 @@ class EnrollmentCart(models.Model):
         if self.course.tutorial_required and not self.tutorial_section:
             raise ValidationError(f"⚠️ You must select a Tutorial section for {self.course.name}.")
 
-        # ✅ Check for schedule conflicts
-        for cart_item in cart_items:
-            if self.lecture_section and cart_item.lecture_section:
-                start_dt1 = datetime.combine(self.lecture_section.start_date, self.lecture_section.class_time)
-                end_dt1 = start_dt1 + timedelta(minutes=self.lecture_section.duration)
-                start_dt2 = datetime.combine(cart_item.lecture_section.start_date, cart_item.lecture_section.class_time)
-                end_dt2 = start_dt2 + timedelta(minutes=cart_item.lecture_section.duration)
-
-                if (start_dt1 < end_dt2 and start_dt2 < end_dt1):
-                    raise ValidationError(f"⚠️ Lecture {self.lecture_section.section_number} conflicts with Lecture {cart_item.lecture_section.section_number}.")
-
-            if self.tutorial_section and cart_item.tutorial_section:
-                start_dt1 = datetime.combine(self.tutorial_section.start_date, self.tutorial_section.class_time)
-                end_dt1 = start_dt1 + timedelta(minutes=self.tutorial_section.duration)
-                start_dt2 = datetime.combine(cart_item.tutorial_section.start_date, cart_item.tutorial_section.class_time)
-                end_dt2 = start_dt2 + timedelta(minutes=cart_item.tutorial_section.duration)
-
-                if (start_dt1 < end_dt2 and start_dt2 < end_dt1):
-                    raise ValidationError(f"⚠️ Tutorial {self.tutorial_section.section_number} conflicts with Tutorial {cart_item.tutorial_section.section_number}.")
+        # ✅ Check for schedule conflicts with every other section in the cart
+        timetable = Timetable(
+            section
+            for cart_item in cart_items.select_related("lecture_section", "tutorial_section")
+            for section in (cart_item.lecture_section, cart_item.tutorial_section)
+            if section
+        )
+        for section in (self.lecture_section, self.tutorial_section):
+            clashing = timetable.clash(section) if section else None
+            if clashing:
+                raise ValidationError(
+                    f"⚠️ {section.section_type} {section.section_number} conflicts with "
+                    f"{clashing.section_type} {clashing.section_number}."
+                )
+            if section:
+                timetable.add(section)  # The lecture and tutorial must not clash either
 
         # ✅ Ensure the selected section is not already full
-        if self.lecture_section and Enrollment.objects.filter(section=self.lecture_section).count() >= self.lecture_section.max_students:
+        if self.lecture_section and self.lecture_section.is_full:
             raise ValidationError(f"⚠️ Lecture section {self.lecture_section.section_number} is full. Please select another.")
 
-        if self.tutorial_section and Enrollment.objects.filter(section=self.tutorial_section).count() >= self.tutorial_section.max_students:
+        if self.tutorial_section and self.tutorial_section.is_full:
             raise ValidationError(f"⚠️ Tutorial section {self.tutorial_section.section_number} is full. Please select another.")
 
         super().clean()
+
+class Waitlist(models.Model):
+    """Queue of students waiting for a seat in a full section."""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'Student'})
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="waitlist")
+    # ✅ The other section of the same cart item the student still needs (taken together on promotion)
+    paired_section = models.ForeignKey(Section, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    position = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('student', 'section')
+        ordering = ['section', 'position']
+        indexes = [models.Index(fields=['section', 'position'], name='waitlist_queue_idx')]  # Promotion and rank lookups
+
+    def __str__(self):
+        return f"{self.student.matric_id} waiting for {self.section} (#{self.position})"
@@ -0,0 +1,313 @@
+"""Enrollment finalization and registration-rush admission control.
+
+:func:`finalize_cart` turns a student's cart into enrollments in one
+transaction: the cart (written to ``EnrollmentCart`` rows here if it was
+kept in the cache) and the sections involved are row-locked, seats
+are checked against the locked counters, enrollments are inserted with one
+``bulk_create`` and courses whose sections filled up meanwhile are put on
+the waitlist instead of failing. When a seat is freed later,
+:func:`promote_waitlist` gives it to the first waitlisted student who can
+still take it, together with the other section of their cart item.
+
+When ``settings.REGISTRATION_RUSH['ENABLED']`` is set, finalize requests
+first pass through a :class:`FairAdmissionQueue`, which serves them in
+arrival order with at most ``MAX_CONCURRENT`` running at once, so a burst of
+thousands of students queues in the app instead of piling onto row locks.
+"""
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from users.outbox import enqueue
+from .models import Section, Enrollment, EnrollmentCart, Waitlist
+from .roster import invalidate_roster
+from .student_schedule import touch_schedules
+
+FinalizeResult = namedtuple("FinalizeResult", ["enrolled", "waitlisted"])
+
+DEFAULTS = {
+    "ENABLED": False,
+    "MAX_CONCURRENT": 20,   # Finalize requests allowed to run at the same time
+    "QUEUE_TIMEOUT": 30,    # Seconds a request may wait for its turn
+}
+
+
+def get_rush_setting(name):
+    return getattr(settings, "REGISTRATION_RUSH", {}).get(name, DEFAULTS[name])
+
+
+class RegistrationBusy(Exception):
+    """Raised when a request waited too long for its turn in the admission queue."""
+
+    def __init__(self, position):
+        super().__init__(f"Registration is busy (queue position {position}).")
+        self.position = position
+
+
+class FairAdmissionQueue:
+    """First-come, first-served gate with a concurrency limit."""
+
+    def __init__(self, limit, timeout):
+        self.limit = limit
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        self._next_ticket = 0
+        self._head = 0          # Lowest ticket that has not been admitted yet
+        self._active = 0
+        self._abandoned = set()
+
+    def _skip_abandoned(self):
+        while self._head in self._abandoned:
+            self._abandoned.discard(self._head)
+            self._head += 1
+
+    @contextmanager
+    def admit(self):
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            deadline = time.monotonic() + self.timeout
+            while True:
+                self._skip_abandoned()
+                if ticket == self._head and self._active < self.limit:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    position = ticket - self._head + 1
+                    self._abandoned.add(ticket)
+                    self._skip_abandoned()
+                    self._condition.notify_all()
+                    raise RegistrationBusy(position)
+                self._condition.wait(remaining)
+            self._head += 1
+            self._active += 1
+            self._condition.notify_all()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def waiting(self):
+        """Number of requests queued for their turn."""
+        with self._condition:
+            return self._next_ticket - self._head - len(self._abandoned)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_admission_queue():
+    """Return the process-wide admission queue."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = FairAdmissionQueue(get_rush_setting("MAX_CONCURRENT"), get_rush_setting("QUEUE_TIMEOUT"))
+    return _queue
+
+
+def finalize_cart(student, cart=None):
+    """Enroll ``student`` in every course in their cart, waitlisting the ones that are full.
+
+    ``cart`` is a backend from ``courses/cart.py`` whose selections are first
+    written as ``EnrollmentCart`` rows in the same transaction; without it the
+    student's existing rows are used. Raises ``ValidationError`` if a cart
+    item is missing a required section.
+    """
+    with transaction.atomic():
+        if cart is not None:
+            cart.persist()
+        cart_items = list(
+            EnrollmentCart.objects.select_for_update().filter(student=student).select_related("course").order_by("id")
+        )
+
+        # ✅ Ensure each course has 1 Lecture & 1 Tutorial (if required)
+        for cart_item in cart_items:
+            if not cart_item.lecture_section_id:
+                raise ValidationError(f"You must select a Lecture for {cart_item.course.name}.")
+            if cart_item.course.tutorial_required and not cart_item.tutorial_section_id:
+                raise ValidationError(f"You must select a Tutorial for {cart_item.course.name}.")
+
+        section_ids = {
+            section_id
+            for cart_item in cart_items
+            for section_id in (cart_item.lecture_section_id, cart_item.tutorial_section_id)
+            if section_id
+        }
+        # ✅ Lock the sections in a stable order so concurrent carts cannot deadlock
+        sections = {
+            section.id: section
+            for section in Section.objects.select_for_update(of=("self",)).select_related("course")
+            .filter(id__in=section_ids).order_by("id")
+        }
+        already_enrolled = set(
+            Enrollment.objects.filter(student=student, section_id__in=section_ids).values_list("section_id", flat=True)
+        )
+
+        enroll_ids, waitlist_pairs, finished_cart_ids = [], {}, []
+        for cart_item in cart_items:
+            needed = [
+                section_id
+                for section_id in (cart_item.lecture_section_id, cart_item.tutorial_section_id)
+                if section_id and section_id not in already_enrolled
+            ]
+            full = [section_id for section_id in needed if sections[section_id].is_full]
+            if full:
+                # Keep the cart item so the student can pick other sections
+                for section_id in full:
+                    waitlist_pairs[section_id] = next((other for other in needed if other != section_id), None)
+                continue
+            for section_id in needed:
+                sections[section_id].seats_taken += 1
+            enroll_ids.extend(needed)
+            finished_cart_ids.append(cart_item.id)
+
+        if enroll_ids:
+            Section.objects.filter(id__in=enroll_ids).update(seats_taken=F("seats_taken") + 1)
+            Enrollment.objects.bulk_create([Enrollment(student=student, section_id=section_id) for section_id in enroll_ids])
+            invalidate_roster(*enroll_ids)  # bulk_create does not send post_save
+            touch_schedules([student.id])
+            # ✅ Waiting for another section of a course/type the student now has is pointless
+            satisfied = Q()
+            for section_id in enroll_ids:
+                satisfied |= Q(section__course_id=sections[section_id].course_id, section__section_type=sections[section_id].section_type)
+            Waitlist.objects.filter(satisfied, student=student).delete()
+
+        waitlisted = []
+        waitlist_ids = list(waitlist_pairs)
+        if waitlist_ids:
+            existing = {
+                section_id: paired_id
+                for section_id, paired_id in Waitlist.objects.filter(student=student, section_id__in=waitlist_ids)
+                .values_list("section_id", "paired_section_id")
+            }
+            last_positions = dict(
+                Waitlist.objects.filter(section_id__in=waitlist_ids).values("section_id")
+                .annotate(last=Max("position")).values_list("section_id", "last")
+            )
+            new_entries = [
+                Waitlist(
+                    student=student, section_id=section_id, paired_section_id=waitlist_pairs[section_id],
+                    position=last_positions.get(section_id, 0) + 1,
+                )
+                for section_id in waitlist_ids
+                if section_id not in existing
+            ]
+            Waitlist.objects.bulk_create(new_entries)
+            for section_id, paired_id in existing.items():
+                if paired_id != waitlist_pairs[section_id]:  # The student picked another companion section
+                    Waitlist.objects.filter(student=student, section_id=section_id).update(paired_section_id=waitlist_pairs[section_id])
+            ranks = dict(waitlist_ranks(
+                Waitlist.objects.filter(student=student, section_id__in=waitlist_ids)
+            ).values_list("section_id", "rank"))
+            waitlisted = [(sections[section_id], ranks[section_id]) for section_id in waitlist_ids]
+
+        EnrollmentCart.objects.filter(id__in=finished_cart_ids).delete()
+
+    return FinalizeResult([sections[section_id] for section_id in enroll_ids], waitlisted)
+
+
+def waitlist_ranks(entries):
+    """Annotate waitlist entries with ``rank``, their 1-based place in the queue (positions keep gaps)."""
+    ahead = Waitlist.objects.filter(
+        section=OuterRef("section"), position__lte=OuterRef("position")
+    ).order_by().values("section").annotate(total=Count("id")).values("total")
+    return entries.annotate(rank=Subquery(ahead))
+
+
+def waitlist_promotion_message(student, sections):
+    names = " and ".join(str(section) for section in sections)
+    body = (
+        f"Dear {student.first_name} {student.last_name},\n\n"
+        f"A seat opened up and you have been enrolled from the waitlist in {names}.\n"
+        f"If you no longer need it, you can drop or change the section under My Courses.\n\n"
+        f"Best Regards,\nUniversity Administration"
+    )
+    return EmailMessage(f"Enrolled from the waitlist: {names}", body, settings.EMAIL_HOST_USER, [student.personal_email])
+
+
+def _has_section_of_type(student, section):
+    return Enrollment.objects.filter(
+        student=student, section__course_id=section.course_id, section__section_type=section.section_type
+    ).exists()
+
+
+def promote_waitlist(section_id):
+    """Give free seats in a section to the first waitlisted students who can still take them.
+
+    A waitlisted cart item is promoted as a whole: the student is enrolled in
+    the section and its ``paired_section`` in one savepoint, only when both
+    have a free seat, and the item leaves their cart. Entries of students who
+    have meanwhile enrolled in another section of the same course and type
+    are removed. Students whose timetable would clash, or whose paired
+    section is still full, keep their place. Promoted students are emailed
+    through the outbox. Returns the new enrollments.
+    """
+    from .cart import CartBusy, get_cart
+    from .conflicts import Timetable
+
+    promoted = []
+    with transaction.atomic():
+        section = Section.objects.select_related("course").filter(pk=section_id).first()
+        if section is None or section.is_full:
+            return promoted
+        # ✅ Concurrent releases promote different students instead of racing for the same entry
+        entries = list(
+            Waitlist.objects.select_for_update(skip_locked=True).filter(section=section)
+            .select_related("student", "paired_section__course").order_by("position")
+        )
+        satisfied = set(Enrollment.objects.filter(
+            student_id__in=[entry.student_id for entry in entries],
+            section__course_id=section.course_id, section__section_type=section.section_type,
+        ).values_list("student_id", flat=True))
+
+        stale = [entry.id for entry in entries if entry.student_id in satisfied]
+        for entry in entries:
+            if entry.student_id in satisfied:
+                continue
+            needed = [section]
+            paired = entry.paired_section
+            if paired is not None and not _has_section_of_type(entry.student, paired):
+                if paired.is_full:
+                    continue
+                needed.append(paired)
+            timetable = Timetable.for_student(entry.student)
+            if any(needed_section.start_date and timetable.clash(needed_section) for needed_section in needed):
+                continue
+            try:
+                with transaction.atomic():
+                    enrollments = [Enrollment.objects.create(student=entry.student, section=needed_section) for needed_section in needed]
+            except ValidationError:
+                section.refresh_from_db(fields=["seats_taken", "max_students"])
+                if section.is_full:
+                    break
+                continue  # The paired section filled up meanwhile
+            promoted.extend(enrollments)
+            Waitlist.objects.filter(student=entry.student, section__in=needed).exclude(id=entry.id).delete()
+            stale.append(entry.id)
+            try:
+                get_cart(entry.student).remove(section.course_id)
+            except CartBusy:
+                pass  # A leftover cart item is harmless: finalize skips sections the student is enrolled in
+            enqueue([waitlist_promotion_message(entry.student, needed)])
+            section.seats_taken += 1
+            if section.is_full:
+                break
+        Waitlist.objects.filter(id__in=stale).delete()
+    return promoted
+
+
+def finalize_enrollment(student, cart=None):
+    """Run :func:`finalize_cart`, through the admission queue when registration-rush mode is on."""
+    if not get_rush_setting("ENABLED"):
+        return finalize_cart(student, cart)
+    with get_admission_queue().admit():
+        return finalize_cart(student, cart)
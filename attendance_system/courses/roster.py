@@ -0,0 +1,153 @@
+"""Per-section enrollment roster cache.
+
+Each section's enrolled student IDs are cached as a compact bitmap, so a
+membership check during a check-in burst reads one integer instead of the
+enrollment table. Storage goes through Django's cache framework
+(``settings.ROSTER_CACHE_ALIAS``), so the backend can be local memory, the
+file system or Redis without code changes.
+
+Every enrollment change bumps ``Section.roster_version`` in the same
+transaction (see the Enrollment signals in ``courses/signals.py``). Cached
+rosters carry the version they were built from and are rebuilt when it no
+longer matches. Each process remembers the versions it has read for
+``ROSTER_VERSION_TTL`` seconds, so a warm membership check runs no queries.
+A change is seen at once by the worker that made it, and by other workers
+(even with a per-process roster cache) within ``ROSTER_VERSION_TTL``.
+"""
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from .models import Enrollment, Section
+
+ROSTER_KEY = "roster:section:{}"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+_versions = {}  # section_id -> (expires_at, roster_version) read by this process
+_versions_lock = threading.Lock()
+
+
+class RosterBitmap:
+    """Set of student IDs stored as one bit per ID from the lowest ID upwards."""
+
+    __slots__ = ("offset", "bits", "size")
+
+    def __init__(self, student_ids):
+        student_ids = sorted(set(student_ids))
+        self.offset = student_ids[0] if student_ids else 0
+        self.size = len(student_ids)
+        bits = bytearray((student_ids[-1] - self.offset) // 8 + 1 if student_ids else 0)
+        for student_id in student_ids:
+            position = student_id - self.offset
+            bits[position >> 3] |= 1 << (position & 7)
+        self.bits = bytes(bits)
+
+    def __contains__(self, student_id):
+        position = student_id - self.offset
+        if position < 0 or (position >> 3) >= len(self.bits):
+            return False
+        return bool(self.bits[position >> 3] & (1 << (position & 7)))
+
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):
+            while byte:
+                low_bit = byte & -byte
+                yield self.offset + index * 8 + low_bit.bit_length() - 1
+                byte ^= low_bit
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        return (self.offset, self.bits, self.size)
+
+    def __setstate__(self, state):
+        self.offset, self.bits, self.size = state
+
+
+def get_roster_cache():
+    return caches[getattr(settings, "ROSTER_CACHE_ALIAS", "default")]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def roster_version(section_id):
+    """``Section.roster_version``, re-read from the database at most every ``ROSTER_VERSION_TTL`` seconds."""
+    remembered = _versions.get(section_id)
+    if remembered is not None and remembered[0] > time.monotonic():
+        return remembered[1]
+    version = Section.objects.filter(pk=section_id).values_list("roster_version", flat=True).first()
+    with _versions_lock:
+        _versions[section_id] = (time.monotonic() + getattr(settings, "ROSTER_VERSION_TTL", 5), version)
+    return version
+
+
+def forget_versions(section_ids):
+    with _versions_lock:
+        for section_id in section_ids:
+            _versions.pop(section_id, None)
+
+
+def get_roster(section_id):
+    """Return the :class:`RosterBitmap` of students enrolled in a section."""
+    cache = get_roster_cache()
+    key = ROSTER_KEY.format(section_id)
+    # ✅ Read the version before the IDs, so a roster is never newer-tagged than its contents
+    version = roster_version(section_id)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        _count("hits")
+        return cached[1]
+
+    _count("misses")
+    roster = RosterBitmap(
+        Enrollment.objects.filter(section_id=section_id).values_list("student_id", flat=True)
+    )
+    cache.set(key, (version, roster), timeout=getattr(settings, "ROSTER_CACHE_TIMEOUT", 3600))
+    return roster
+
+
+def is_enrolled(student_id, section_id):
+    """O(1) membership check backed by the roster cache."""
+    return student_id in get_roster(section_id)
+
+
+def invalidate_roster(*section_ids):
+    """Mark rosters stale: bump their version now and drop this process's copies (again on commit)."""
+    section_ids = {section_id for section_id in section_ids if section_id}
+    if not section_ids:
+        return
+    Section.objects.filter(id__in=section_ids).update(roster_version=F("roster_version") + 1)
+    forget_versions(section_ids)
+    keys = [ROSTER_KEY.format(section_id) for section_id in section_ids]
+
+    def drop():
+        forget_versions(section_ids)  # A read during the transaction may have remembered the old version
+        get_roster_cache().delete_many(keys)
+
+    transaction.on_commit(drop)
+
+
+def clear_rosters():
+    """Forget every roster and remembered version (e.g. between tests, where section IDs are reused)."""
+    with _versions_lock:
+        _versions.clear()
+    get_roster_cache().clear()
+
+
+def roster_stats():
+    """Hit/miss counters for this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_roster_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
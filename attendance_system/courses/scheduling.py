@@ -0,0 +1,69 @@
+"""Class session generation.
+
+Every section with a ``start_date`` and ``class_time`` meets once a week for
+``WEEKS_PER_SEMESTER`` weeks. :func:`sync_sessions` computes that session set
+for any number of sections, diffs it against the stored ``ClassSession`` rows
+and applies the difference with bulk statements in one transaction, so it is
+safe to call after creating, editing or rescheduling sections.
+"""
+from datetime import timedelta
+from django.db import transaction
+from .models import ClassSession
+from .student_schedule import touch_section_schedules
+
+WEEKS_PER_SEMESTER = 14
+
+
+def planned_sessions(section):
+    """Map week number to ``(date, start_time)`` for a section (empty if unscheduled)."""
+    if not section.start_date or not section.class_time:
+        return {}
+    return {
+        week: (section.start_date + timedelta(weeks=week - 1), section.class_time)
+        for week in range(1, WEEKS_PER_SEMESTER + 1)
+    }
+
+
+def sync_sessions(sections):
+    """Bring the class sessions of ``sections`` in line with their schedules.
+
+    Returns a dict with the number of sessions created, updated and deleted.
+    """
+    sections = [section for section in sections if section.pk]
+    stats = {"created": 0, "updated": 0, "deleted": 0}
+    if not sections:
+        return stats
+
+    existing = {
+        (session.section_id, session.week_number): session
+        for session in ClassSession.objects.filter(section__in=sections)
+    }
+
+    to_create, to_update = [], []
+    for section in sections:
+        for week, (session_date, start_time) in planned_sessions(section).items():
+            session = existing.pop((section.pk, week), None)
+            if session is None:
+                to_create.append(ClassSession(
+                    section=section, week_number=week, date=session_date, start_time=start_time
+                ))
+            elif session.date != session_date or session.start_time != start_time:
+                session.date, session.start_time = session_date, start_time
+                to_update.append(session)
+
+    # ✅ Whatever is left over no longer matches the schedule
+    to_delete = [session.pk for session in existing.values()]
+
+    with transaction.atomic():
+        if to_create:
+            ClassSession.objects.bulk_create(to_create, batch_size=1000)
+        if to_update:
+            ClassSession.objects.bulk_update(to_update, ["date", "start_time"], batch_size=1000)
+        if to_delete:
+            ClassSession.objects.filter(pk__in=to_delete).delete()
+        if to_create or to_update or to_delete:
+            # ✅ Bulk statements send no signals, so refresh the cached student schedules here
+            touch_section_schedules([section.pk for section in sections])
+
+    stats.update(created=len(to_create), updated=len(to_update), deleted=len(to_delete))
+    return stats
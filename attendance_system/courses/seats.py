@@ -0,0 +1,39 @@
+"""Atomic seat accounting for sections.
+
+``Section.seats_taken`` is a denormalized enrollment count. Seats are taken
+with a conditional ``UPDATE ... SET seats_taken = seats_taken + n WHERE
+seats_taken + n <= max_students``, so two requests can never both claim the
+last seat, and capacity checks no longer need to COUNT enrollment rows.
+The course catalog reads the counters live, so seat changes do not touch
+its cache.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Section, Enrollment
+
+
+def reserve_seats(section_id, count=1):
+    """Take ``count`` seats in a section. Returns ``False`` (taking none) if they don't fit."""
+    return Section.objects.filter(
+        id=section_id, seats_taken__lte=F("max_students") - count
+    ).update(seats_taken=F("seats_taken") + count) == 1
+
+
+def release_seats(section_id, count=1):
+    """Give back ``count`` seats (never going below zero)."""
+    Section.objects.filter(id=section_id, seats_taken__gte=count).update(seats_taken=F("seats_taken") - count)
+
+
+def reconcile_seats(section_ids=None):
+    """Recompute ``seats_taken`` from the enrollment table. Returns the number of sections fixed."""
+    actual = Coalesce(
+        Subquery(
+            Enrollment.objects.filter(section=OuterRef("pk"))
+            .order_by().values("section").annotate(total=Count("id")).values("total")
+        ),
+        Value(0),
+    )
+    sections = Section.objects.all()
+    if section_ids:
+        sections = sections.filter(id__in=section_ids)
+    return sections.annotate(actual=actual).exclude(seats_taken=F("actual")).update(seats_taken=actual)
@@ -1,21 +1,80 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models import QuerySet
 from django.dispatch import receiver
-from datetime import timedelta
-from .models import Section, ClassSession
+from .models import Course, Section, Enrollment
+from .cart import invalidate_cached_sections
+from .catalog import invalidate_catalog
+from .registration import promote_waitlist
+from .roster import invalidate_roster
+from .scheduling import sync_sessions
+from .seats import release_seats
+from .student_schedule import touch_schedules, touch_section_schedules
 
 @receiver(post_save, sender=Section)
 def create_class_sessions(sender, instance, created, **kwargs):
-    """Automatically generates 14 weeks of class sessions based on the first scheduled date"""
-    if created and instance.start_date and instance.class_time:
-        # ✅ Delete any existing sessions for this section
-        ClassSession.objects.filter(section=instance).delete()
-
-        # ✅ Generate 14 class sessions
-        for week in range(1, 15):  # Weeks 1 - 14
-            session_date = instance.start_date + timedelta(weeks=week-1)
-            ClassSession.objects.create(
-                section=instance,
-                week_number=week,
-                date=session_date,
-                start_time=instance.class_time
-            )
+    """Keeps the 14 weekly class sessions in line with the section's schedule"""
+    sync_sessions([instance])
+    if not created:
+        touch_section_schedules([instance.pk])  # ✅ e.g. a changed section type shows up in cached schedules
+    touch_schedules([instance.lecturer_id, getattr(instance, "_previous_lecturer_id", None)])
+
+@receiver(post_delete, sender=Section)
+def invalidate_lecturer_schedule(sender, instance, **kwargs):
+    """The lecturer's calendar loses the deleted section"""
+    touch_schedules([instance.lecturer_id])
+
+@receiver(post_save, sender=Course)
+def invalidate_course_schedules(sender, instance, created, **kwargs):
+    """Course names appear in cached student schedules"""
+    if not created:
+        touch_section_schedules(instance.sections.values_list("id", flat=True))
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_course_catalog(sender, instance, **kwargs):
+    """Cached catalog pages list courses and sections (seat counts are read live)"""
+    invalidate_catalog()
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_cart_section(sender, instance, **kwargs):
+    """Carts validate selections against cached copies of the section"""
+    invalidate_cached_sections(instance.pk)
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_section_roster(sender, instance, **kwargs):
+    """Drop the cached roster of every section touched by this enrollment"""
+    invalidate_roster(instance.section_id, getattr(instance, "_previous_section_id", None))
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+@receiver(post_delete, sender=Enrollment)
+def release_section_seat(sender, instance, origin=None, **kwargs):
+    """Give the seat back when an enrollment is removed (also covers queryset deletes)"""
+    release_seats(instance.section_id)
+    # ✅ The freed seat goes to the head of the waitlist
+    origin_model = _origin_model(origin)
+    if origin_model is Enrollment:
+        promote_waitlist(instance.section_id)
+    elif origin_model not in (Section, Course):  # Deleted sections have no waitlist left
+        # A cascade (e.g. a deleted student) is still removing their other rows, so promote once it is done
+        section_id = instance.section_id
+        transaction.on_commit(lambda: promote_waitlist(section_id))
+
+@receiver(post_save, sender=Enrollment)
+def promote_after_section_change(sender, instance, created, **kwargs):
+    """Changing sections frees a seat in the previous one"""
+    previous_section_id = getattr(instance, "_previous_section_id", None)
+    if previous_section_id and previous_section_id != instance.section_id:
+        promote_waitlist(previous_section_id)
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_student_schedule(sender, instance, **kwargs):
+    """Cached weekly schedules of the student are stale once their enrollments change"""
+    touch_schedules([instance.student_id])
@@ -0,0 +1,290 @@
+"""Automatic weekday/time-slot assignment for unscheduled sections.
+
+The problem is modelled as a conflict graph over the sections to schedule:
+
+* sections taught by the same lecturer must not overlap (hard),
+* sections sharing students should not overlap, weighted by the number of
+  shared students (soft); a course's Lecture and Tutorials are linked the
+  same way because its students take both,
+* every section also has fixed costs per slot from what is already
+  scheduled: the lecturer's other sections (hard) and the other sections of
+  its students and its course (soft).
+
+Slots are weekly bitmaps (``courses/conflicts.py``), so overlap tests are
+integer ANDs. :class:`TimeslotSolver` colours the graph greedily, most
+constrained section first, then runs min-conflicts local search that moves
+conflicting sections to their cheapest slot until nothing improves. A small
+load term spreads sections across the week.
+"""
+import random
+from collections import Counter, defaultdict, namedtuple
+from datetime import time, timedelta
+from django.conf import settings
+from django.db import transaction
+from .catalog import invalidate_catalog
+from .conflicts import MINUTES_PER_DAY, slot_mask, term_of, weekly_mask
+from .models import Section, Enrollment
+from .scheduling import WEEKS_PER_SEMESTER, sync_sessions
+
+HARD = 10 ** 9       # Cost of a lecturer double-booking
+SOFT = 1000          # Cost per student clash
+LINK_WEIGHT_CAP = 50  # Weight of a Lecture/Tutorial link of the same course
+
+Task = namedtuple("Task", ["id", "duration", "lecturer_id", "students"])
+Solution = namedtuple("Solution", ["slots", "hard_conflicts", "student_clashes", "greedy_clashes", "moves"])
+
+
+def candidate_slots(step=60):
+    """``(weekday, minute of day)`` start slots on weekdays within the teaching day."""
+    day_start = getattr(settings, "SCHEDULING_DAY_START", 8) * 60
+    day_end = getattr(settings, "SCHEDULING_DAY_END", 21) * 60
+    return [(weekday, minute) for weekday in range(5) for minute in range(day_start, day_end, step)]
+
+
+class TimeslotSolver:
+    """Greedy + local search slot assignment over a conflict graph."""
+
+    def __init__(self, tasks, lecturer_busy=None, fixed_soft=None, links=(), slots=None, seed=0):
+        self.tasks = {task.id: task for task in tasks}
+        self.lecturer_busy = lecturer_busy or {}
+        self.fixed_soft = fixed_soft or {}
+        self.random = random.Random(seed)
+        day_end = getattr(settings, "SCHEDULING_DAY_END", 21) * 60
+        slots = slots or candidate_slots()
+
+        # ✅ Slot options per task: only starts that finish within the teaching day
+        self.options = {}
+        for task in self.tasks.values():
+            self.options[task.id] = [
+                (slot, slot_mask(slot[0] * MINUTES_PER_DAY + slot[1], task.duration))
+                for slot in slots if slot[1] + task.duration <= day_end
+            ]
+        self._build_graph(links)
+        self._build_fixed_costs()
+        self.assigned = {}   # task id -> option index
+        self.load = Counter()
+
+    def _build_graph(self, links):
+        self.hard_neighbors = defaultdict(set)
+        self.soft_neighbors = defaultdict(Counter)
+
+        by_lecturer = defaultdict(list)
+        by_student = defaultdict(list)
+        for task in self.tasks.values():
+            if task.lecturer_id is not None:
+                by_lecturer[task.lecturer_id].append(task.id)
+            for student_id in task.students:
+                by_student[student_id].append(task.id)
+
+        for task_ids in by_lecturer.values():
+            for task_id in task_ids:
+                self.hard_neighbors[task_id].update(other for other in task_ids if other != task_id)
+        for task_ids in by_student.values():
+            for index, task_id in enumerate(task_ids):
+                for other in task_ids[index + 1:]:
+                    self.soft_neighbors[task_id][other] += 1
+                    self.soft_neighbors[other][task_id] += 1
+        for first, second, weight in links:
+            if first in self.tasks and second in self.tasks:
+                self.soft_neighbors[first][second] += weight
+                self.soft_neighbors[second][first] += weight
+
+    def _build_fixed_costs(self):
+        self.fixed = {}
+        for task in self.tasks.values():
+            lecturer_busy = self.lecturer_busy.get(task.lecturer_id, 0)
+            soft = self.fixed_soft.get(task.id, ())
+            self.fixed[task.id] = [
+                (HARD if lecturer_busy & mask else 0) + SOFT * sum(weight for busy, weight in soft if busy & mask)
+                for _, mask in self.options[task.id]
+            ]
+
+    def _mask(self, task_id):
+        return self.options[task_id][self.assigned[task_id]][1]
+
+    def _neighbor_masks(self, task_id):
+        """Slots taken by the task's assigned neighbours: ``(lecturer mask, {student mask: weight})``."""
+        lecturer = 0
+        for other in self.hard_neighbors[task_id]:
+            if other in self.assigned:
+                lecturer |= self._mask(other)
+        shared = Counter()
+        for other, weight in self.soft_neighbors[task_id].items():
+            if other in self.assigned:
+                shared[self._mask(other)] += weight
+        return lecturer, shared
+
+    def _cost(self, task_id, index, neighbors=None):
+        """Conflict cost of putting ``task_id`` in option ``index`` given the other assignments."""
+        lecturer, shared = neighbors or self._neighbor_masks(task_id)
+        mask = self.options[task_id][index][1]
+        cost = self.fixed[task_id][index]
+        if lecturer & mask:
+            cost += HARD
+        return cost + SOFT * sum(weight for busy, weight in shared.items() if busy & mask)
+
+    def _best_option(self, task_id):
+        neighbors = self._neighbor_masks(task_id)
+        best, best_cost = [], None
+        options = self.options[task_id]
+        for index in range(len(options)):
+            cost = self._cost(task_id, index, neighbors) + self.load[options[index][0]]
+            if best_cost is None or cost < best_cost:
+                best, best_cost = [index], cost
+            elif cost == best_cost:
+                best.append(index)
+        return (self.random.choice(best), best_cost) if best else (None, None)
+
+    def _place(self, task_id, index):
+        previous = self.assigned.get(task_id)
+        if previous is not None:
+            self.load[self.options[task_id][previous][0]] -= 1
+        self.assigned[task_id] = index
+        self.load[self.options[task_id][index][0]] += 1
+
+    def _conflict_cost(self, task_id):
+        return self._cost(task_id, self.assigned[task_id])
+
+    def greedy(self):
+        """Assign tasks one by one, most constrained first, each to its cheapest slot."""
+        order = sorted(
+            self.tasks,
+            key=lambda task_id: (
+                len(self.hard_neighbors[task_id]),
+                sum(self.soft_neighbors[task_id].values()) + sum(weight for _, weight in self.fixed_soft.get(task_id, ())),
+                self.tasks[task_id].duration,
+            ),
+            reverse=True,
+        )
+        for task_id in order:
+            index, _ = self._best_option(task_id)
+            if index is not None:
+                self._place(task_id, index)
+
+    def local_search(self, max_rounds=50):
+        """Min-conflicts: move conflicting tasks to their cheapest slot until no move helps."""
+        moves = 0
+        for _ in range(max_rounds):
+            conflicting = [task_id for task_id in self.assigned if self._conflict_cost(task_id) >= SOFT]
+            if not conflicting:
+                break
+            self.random.shuffle(conflicting)
+            moved = False
+            for task_id in conflicting:
+                current = self.assigned[task_id]
+                current_cost = self._conflict_cost(task_id) + self.load[self.options[task_id][current][0]] - 1
+                self.load[self.options[task_id][current][0]] -= 1
+                index, cost = self._best_option(task_id)
+                self.load[self.options[task_id][current][0]] += 1
+                if index is not None and index != current and cost < current_cost:
+                    self._place(task_id, index)
+                    moves += 1
+                    moved = True
+            if not moved:
+                break
+        return moves
+
+    def clashes(self):
+        """``(hard conflict task ids, student clash count)`` of the current assignment."""
+        hard, soft = [], 0
+        for task_id in self.assigned:
+            cost = self._conflict_cost(task_id)
+            if cost >= HARD:
+                hard.append(task_id)
+            soft += (cost % HARD) // SOFT
+        # Pairwise clashes are seen from both sides; fixed ones only once
+        fixed = sum((self.fixed[task_id][self.assigned[task_id]] % HARD) // SOFT for task_id in self.assigned)
+        return hard, fixed + (soft - fixed) // 2
+
+    def solve(self, max_rounds=50):
+        self.greedy()
+        _, greedy_clashes = self.clashes()
+        moves = self.local_search(max_rounds)
+        hard, student_clashes = self.clashes()
+        slots = {task_id: self.options[task_id][index][0] for task_id, index in self.assigned.items()}
+        unplaced = [task_id for task_id in self.tasks if task_id not in self.assigned]
+        return Solution(slots, sorted(hard + unplaced), student_clashes, greedy_clashes, moves)
+
+
+def _overlaps(term, section):
+    first, last = term_of(section)
+    return not (first > term[1] or term[0] > last)
+
+
+def build_solver(sections, semester_start, seed=0):
+    """Load the conflict graph for ``sections`` (unsaved schedule) from the database."""
+    sections = list(sections)
+    section_ids = [section.id for section in sections]
+    term = (semester_start, semester_start + timedelta(weeks=WEEKS_PER_SEMESTER - 1, days=6))
+
+    students = defaultdict(set)
+    for section_id, student_id in Enrollment.objects.filter(section_id__in=section_ids).values_list("section_id", "student_id"):
+        students[section_id].add(student_id)
+    tasks = [Task(section.id, section.duration, section.lecturer_id, frozenset(students[section.id])) for section in sections]
+
+    # ✅ What is already scheduled: lecturers' sections, students' sections and the course's sections
+    lecturer_ids = {section.lecturer_id for section in sections if section.lecturer_id}
+    lecturer_busy = defaultdict(int)
+    for section in Section.objects.filter(lecturer_id__in=lecturer_ids, start_date__isnull=False).exclude(id__in=section_ids):
+        if _overlaps(term, section):
+            lecturer_busy[section.lecturer_id] |= weekly_mask(section)
+
+    student_busy = defaultdict(int)
+    all_students = set().union(*students.values()) if students else set()
+    for enrollment in Enrollment.objects.filter(
+        student_id__in=all_students, section__start_date__isnull=False
+    ).exclude(section_id__in=section_ids).select_related("section"):
+        if _overlaps(term, enrollment.section):
+            student_busy[enrollment.student_id] |= weekly_mask(enrollment.section)
+
+    by_course = defaultdict(list)
+    for section in sections:
+        by_course[section.course_id].append(section)
+    course_busy = defaultdict(list)
+    for section in Section.objects.filter(course_id__in=by_course, start_date__isnull=False).exclude(id__in=section_ids):
+        if _overlaps(term, section):
+            course_busy[section.course_id].append(section)
+
+    fixed_soft, links = {}, []
+    for section in sections:
+        masks = Counter(student_busy[student_id] for student_id in students[section.id] if student_busy[student_id])
+        for other in course_busy[section.course_id]:
+            if other.section_type != section.section_type:
+                masks[weekly_mask(other)] += min(section.max_students, other.max_students, LINK_WEIGHT_CAP)
+        fixed_soft[section.id] = list(masks.items())
+    for course_sections in by_course.values():
+        lectures = [section for section in course_sections if section.section_type == "Lecture"]
+        tutorials = [section for section in course_sections if section.section_type == "Tutorial"]
+        links.extend(
+            (lecture.id, tutorial.id, min(lecture.max_students, tutorial.max_students, LINK_WEIGHT_CAP))
+            for lecture in lectures for tutorial in tutorials
+        )
+
+    return TimeslotSolver(tasks, lecturer_busy=lecturer_busy, fixed_soft=fixed_soft, links=links, seed=seed)
+
+
+def apply_solution(sections, solution, semester_start):
+    """Save the assigned slots (skipping sections left with a lecturer conflict) and generate sessions."""
+    skipped = set(solution.hard_conflicts)
+    scheduled = []
+    for section in sections:
+        if section.id in skipped or section.id not in solution.slots:
+            continue
+        weekday, minute = solution.slots[section.id]
+        section.start_date = semester_start + timedelta(days=(weekday - semester_start.weekday()) % 7)
+        section.class_time = time(minute // 60, minute % 60)
+        scheduled.append(section)
+
+    with transaction.atomic():
+        Section.objects.bulk_update(scheduled, ["start_date", "class_time"], batch_size=1000)
+        sync_sessions(scheduled)
+        invalidate_catalog()  # bulk_update sends no signals
+    return scheduled
+
+
+def assign_timeslots(sections, semester_start, max_rounds=50, seed=0, dry_run=False):
+    """Solve and (unless ``dry_run``) save slots for ``sections``. Returns ``(solution, scheduled sections)``."""
+    sections = [section for section in sections if not section.start_date or not section.class_time]
+    solution = build_solver(sections, semester_start, seed=seed).solve(max_rounds)
+    scheduled = [] if dry_run else apply_solution(sections, solution, semester_start)
+    return solution, scheduled
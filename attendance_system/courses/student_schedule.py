@@ -0,0 +1,91 @@
+"""Cached weekly schedules for students.
+
+A student's schedule for a week is built from one joined query over all of
+their enrolled sections and cached per (student, week). Every user has a
+change stamp (``User.schedule_changed_at``); it is part of each cache key
+and ETag, and doubles as the ``Last-Modified`` time. Changing an enrollment,
+a section or its class sessions moves the stamp of the students and
+lecturers affected in the same transaction, so no worker serves a stale
+week once the change is committed and unchanged weeks answer with 304s.
+The calendar feeds in ``courses/ical.py`` key off the same stamps.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.timezone import now
+from users.models import User
+from .models import Section, Enrollment
+
+WEEK_KEY = "schedule:week:{}:{}:{}"
+
+
+def get_schedule_cache():
+    return caches[getattr(settings, "SCHEDULE_CACHE_ALIAS", "default")]
+
+
+def schedule_stamp(user_id):
+    """Return the user's change stamp (seconds since the epoch; one primary-key query)."""
+    changed_at = User.objects.filter(pk=user_id).values_list("schedule_changed_at", flat=True).first()
+    return changed_at.timestamp() if changed_at else 0.0
+
+
+def touch_schedules(user_ids):
+    """Move the change stamp of ``user_ids`` (inside the current transaction)."""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        User.objects.filter(id__in=user_ids).update(schedule_changed_at=now())
+
+
+def touch_section_schedules(section_ids):
+    """Move the change stamp of every student enrolled in, and every lecturer teaching, ``section_ids``."""
+    section_ids = [section_id for section_id in section_ids if section_id]
+    if section_ids:
+        touch_schedules(
+            list(Enrollment.objects.filter(section_id__in=section_ids).values_list("student_id", flat=True).distinct())
+            + list(Section.objects.filter(id__in=section_ids).values_list("lecturer_id", flat=True))
+        )
+
+
+def build_week(student_id, selected_date):
+    """Return ``(start_of_week, schedule)`` for the week containing ``selected_date``."""
+    rows = list(Enrollment.objects.filter(student_id=student_id).values_list(
+        "section__start_date", "section__course__name", "section__section_type",
+        "section__sessions__date", "section__sessions__start_time",
+    ))
+
+    # ✅ Weeks are counted from the earliest start date among the student's enrolled courses
+    start_dates = [start_date for start_date, *_ in rows if start_date]
+    if start_dates:
+        earliest_start_date = min(start_dates)
+        week_offset = (selected_date - earliest_start_date).days // 7
+        start_of_week = earliest_start_date + timedelta(weeks=week_offset)
+    else:
+        # If no courses have a start date, default to the current week
+        start_of_week = selected_date - timedelta(days=selected_date.weekday())
+
+    end_of_week = start_of_week + timedelta(days=4)
+    schedule = [
+        {
+            "course": course_name,
+            "type": section_type,
+            "day": session_date.strftime("%A"),
+            "hour": start_time.hour,
+        }
+        for _, course_name, section_type, session_date, start_time in rows
+        if session_date and start_of_week <= session_date <= end_of_week
+    ]
+    return start_of_week, schedule
+
+
+def get_week(student_id, selected_date, stamp=None):
+    """Cached :func:`build_week`; returns ``(start_of_week, schedule, stamp)``."""
+    if stamp is None:
+        stamp = schedule_stamp(student_id)
+    cache = get_schedule_cache()
+    key = WEEK_KEY.format(student_id, stamp, selected_date.isoformat())
+    cached = cache.get(key)
+    if cached is None:
+        cached = build_week(student_id, selected_date)
+        cache.set(key, cached, timeout=getattr(settings, "SCHEDULE_CACHE_TIMEOUT", 3600))
+    start_of_week, schedule = cached
+    return start_of_week, schedule, stamp
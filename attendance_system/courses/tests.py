@@ -1,3 +1,651 @@
-from django.test import TestCase
+import io
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+from unittest.mock import patch
+from datetime import date, time
+from django.contrib.messages import get_messages
+from django.core import checks, signing
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from users.models import OutboxEmail, User
+from .cart import CART_KEY, LOCK_KEY, CacheCart, CartBusy, DatabaseCart, cached_sections, get_cart, get_cart_cache
+from .forms import AdminEnrollmentForm, SectionForm
+from .catalog import catalog_version, get_page
+from .conflicts import MINUTES_PER_WEEK, Timetable, slot_mask
+from .ical import TOKEN_SALT, feed_token, user_for_token
+from .importer import import_sections
+from .models import ClassSession, Course, Section, Enrollment, EnrollmentCart, Waitlist
+from .registration import finalize_cart
+from .roster import clear_rosters, get_roster, is_enrolled
+from .scheduling import sync_sessions
+from .seats import reconcile_seats, release_seats, reserve_seats
+from .solver import Task, TimeslotSolver
 
-# Create your tests here.
+
+def make_user(matric_id, role="Student"):
+    user = User(matric_id=matric_id, email=f"{matric_id}@university.com", personal_email=f"{matric_id}@example.com",
+                role=role, first_login=False)
+    user.set_unusable_password()  # Tests log in with force_login; hashing would only slow them down
+    user.save()
+    return user
+
+
+def make_section(course=None, number=1, max_students=30, **fields):
+    course = course or Course.objects.create(code=f"CS{number:03d}", name=f"Course {number}")
+    fields = {"section_type": "Lecture", "start_date": date(2026, 10, 12), "class_time": time(9, 0), **fields}
+    return Section.objects.create(course=course, section_number=number, max_students=max_students, **fields)
+
+
+class RosterTests(TestCase):
+    """TestCase never runs on_commit callbacks, so cached rosters are never
+    dropped here: like a change made by another worker process."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = make_section()
+        cls.student = make_user("S0000001")
+
+    def setUp(self):
+        clear_rosters()
+
+    def test_warm_membership_checks_run_no_queries(self):
+        is_enrolled(self.student.id, self.section.id)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.assertFalse(is_enrolled(self.student.id, self.section.id))
+
+    def test_changes_by_other_workers_are_seen_after_the_ttl(self):
+        self.assertFalse(is_enrolled(self.student.id, self.section.id))
+        # Another worker enrolls the student: no signals run in this process
+        Enrollment.objects.bulk_create([Enrollment(student=self.student, section=self.section)])
+        Section.objects.filter(pk=self.section.pk).update(roster_version=F("roster_version") + 1)
+        self.assertFalse(is_enrolled(self.student.id, self.section.id))
+        with patch("courses.roster.time.monotonic", return_value=monotonic() + 60):
+            self.assertTrue(is_enrolled(self.student.id, self.section.id))
+
+    def test_new_enrollment_is_seen_despite_a_cached_roster(self):
+        self.assertFalse(is_enrolled(self.student.id, self.section.id))
+        Enrollment.objects.create(student=self.student, section=self.section)
+        self.assertTrue(is_enrolled(self.student.id, self.section.id))
+
+    def test_dropped_enrollment_is_seen_despite_a_cached_roster(self):
+        enrollment = Enrollment.objects.create(student=self.student, section=self.section)
+        self.assertTrue(is_enrolled(self.student.id, self.section.id))
+        enrollment.delete()
+        self.assertFalse(is_enrolled(self.student.id, self.section.id))
+
+    def test_saving_a_stale_section_keeps_the_roster_version(self):
+        stale = Section.objects.get(pk=self.section.pk)
+        Enrollment.objects.create(student=self.student, section=self.section)
+        get_roster(self.section.id)
+        stale.max_students = 40
+        stale.save()
+        self.assertEqual(Section.objects.get(pk=self.section.pk).roster_version, 1)
+        self.assertTrue(is_enrolled(self.student.id, self.section.id))
+
+
+class AutocompleteWidgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = make_section()
+        cls.student = make_user("S0000001")
+
+    def test_invalid_posted_ids_render_as_field_errors(self):
+        for value in ("abc", "1.5", "99999999999999999999999"):
+            with self.subTest(value=value):
+                form = AdminEnrollmentForm(data={"student": value, "section": value})
+                self.assertFalse(form.is_valid())
+                self.assertIn("student", form.errors)
+                html = str(form)
+                self.assertNotIn(f'value="{value}" selected', html)
+
+                form = SectionForm(data={"course": value, "lecturer": value})
+                self.assertFalse(form.is_valid())
+                self.assertIn("course", form.errors)
+                str(form)
+
+    def test_selected_rows_are_rendered(self):
+        form = AdminEnrollmentForm(data={"student": str(self.student.pk), "section": "abc"})
+        self.assertIn(f'<option value="{self.student.pk}" selected>', str(form["student"]))
+
+
+class SectionAdminTests(TestCase):
+    def test_counters_are_read_only_in_the_change_form(self):
+        admin_user = make_user("A0000001", role="Admin")
+        User.objects.filter(pk=admin_user.pk).update(is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        section = make_section()
+        response = self.client.get(reverse("admin:courses_section_change", args=[section.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'name="seats_taken"')
+        self.assertNotContains(response, 'name="roster_version"')
+        self.assertContains(response, "Seats taken")
+
+
+class StudentScheduleTests(TestCase):
+    """TestCase never runs on_commit callbacks, so nothing here relies on them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user("S0000001")
+        cls.section = make_section()
+
+    def get_week(self, **headers):
+        return self.client.get(
+            reverse("student_schedule"), {"week_date": "2026-10-12"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest", **headers
+        )
+
+    def test_enrollment_changes_the_etag_and_the_week(self):
+        self.client.force_login(self.student)
+        first = self.get_week()
+        self.assertEqual(first.json()["schedule"], [])
+        self.assertEqual(self.get_week(HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        Enrollment.objects.create(student=self.student, section=self.section)
+        response = self.get_week(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry["course"] for entry in response.json()["schedule"]], [self.section.course.name])
+
+
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user("S0000001")
+        cls.section = make_section()
+        Enrollment.objects.create(student=cls.student, section=cls.section)
+
+    def feed(self, user):
+        return self.client.get(reverse("calendar_feed", args=[feed_token(user)]))
+
+    def test_feed_lists_the_students_sessions(self):
+        response = self.feed(self.student)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "BEGIN:VEVENT")
+
+    def test_enrollment_changes_refresh_the_cached_feed(self):
+        etag = self.feed(self.student)["ETag"]
+        Enrollment.objects.create(student=self.student, section=make_section(number=2))
+        response = self.client.get(reverse("calendar_feed", args=[feed_token(self.student)]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "CS002")
+
+    def test_tampered_and_unsalted_tokens_are_rejected(self):
+        token = feed_token(self.student)
+        for bad in (token[:-1] + ("A" if token[-1] != "A" else "B"), signing.Signer(salt=TOKEN_SALT).sign(str(self.student.pk)), "²:x"):
+            with self.subTest(token=bad):
+                self.assertIsNone(user_for_token(bad))
+
+    def test_reset_revokes_the_previous_url(self):
+        old_token = feed_token(self.student)
+        self.client.force_login(self.student)
+        response = self.client.post(reverse("reset_calendar_feed"))
+        self.assertRedirects(response, reverse("student_schedule"), fetch_redirect_response=False)
+
+        self.student.refresh_from_db()
+        self.assertNotEqual(feed_token(self.student), old_token)
+        self.assertEqual(self.client.get(reverse("calendar_feed", args=[old_token])).status_code, 404)
+        self.assertEqual(self.feed(self.student).status_code, 200)
+
+
+class CatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = make_section(max_students=2)
+        cls.student = make_user("S0000001")
+
+    def test_enrollments_update_seats_without_flushing_the_cache(self):
+        self.assertEqual(get_page()["results"][0]["open_seats"], 2)
+        version = catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Enrollment.objects.create(student=self.student, section=self.section)
+
+        self.assertEqual(catalog_version(), version)
+        with self.assertNumQueries(1):
+            course = get_page()["results"][0]
+        self.assertEqual(course["open_seats"], 1)
+        self.assertEqual(course["sections"][0]["seats_left"], 1)
+
+    def test_section_changes_flush_the_cache(self):
+        get_page()
+        version = catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.max_students = 5
+            self.section.save()
+        self.assertNotEqual(catalog_version(), version)
+        self.assertEqual(get_page()["results"][0]["sections"][0]["max_students"], 5)
+
+
+class SeatConcurrencyTests(TransactionTestCase):
+    """Real concurrent transactions (no wrapping test transaction) against the seat counter."""
+
+    def setUp(self):
+        self.students = [make_user(f"S{i:07d}") for i in range(24)]
+        self.section = make_section(max_students=5)
+
+    def run_in_thread(self, action):
+        """Run ``action`` on this thread's own connection, retrying SQLite lock errors.
+
+        Postgres waits on the row lock instead, so it never takes the retry path.
+        """
+        try:
+            for _ in range(50):
+                try:
+                    return action()
+                except OperationalError:
+                    sleep(0.01)
+            raise AssertionError("Database stayed locked")
+        finally:
+            connection.close()
+
+    def enroll_all(self, students, section, workers=8):
+        def enroll(student):
+            try:
+                self.run_in_thread(lambda: Enrollment.objects.create(student=student, section=section))
+                return "enrolled"
+            except ValidationError:
+                return "full"
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(enroll, students))
+
+    def assertSeatsMatchEnrollments(self, section):
+        section.refresh_from_db()
+        rows = Enrollment.objects.filter(section=section).count()
+        self.assertLessEqual(rows, section.max_students)
+        self.assertEqual(section.seats_taken, rows)
+
+    def test_concurrent_enrollments_never_oversubscribe(self):
+        results = self.enroll_all(self.students, self.section)
+        self.assertEqual(results.count("enrolled"), 5)
+        self.assertEqual(results.count("full"), len(self.students) - 5)
+        self.assertSeatsMatchEnrollments(self.section)
+
+    def test_concurrent_drops_and_enrollments_keep_the_counter_exact(self):
+        self.enroll_all(self.students[:5], self.section)
+        enrollments = list(Enrollment.objects.filter(section=self.section))
+
+        def drop(enrollment):
+            self.run_in_thread(enrollment.delete)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            dropped = pool.map(drop, enrollments[:3])
+            joined = pool.submit(self.enroll_all, self.students[5:], self.section, 4)
+            list(dropped)
+            joined.result()
+        self.assertSeatsMatchEnrollments(self.section)
+
+
+class SeatCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = make_section(max_students=2)
+        cls.other = make_section(course=cls.section.course, number=2, max_students=2)
+        cls.students = [make_user(f"S{i:07d}") for i in range(3)]
+
+    def seats(self, section):
+        return Section.objects.values_list("seats_taken", flat=True).get(pk=section.pk)
+
+    def test_reserve_never_exceeds_capacity(self):
+        self.assertFalse(reserve_seats(self.section.id, 3))
+        self.assertTrue(reserve_seats(self.section.id, 2))
+        self.assertFalse(reserve_seats(self.section.id))
+        self.assertEqual(self.seats(self.section), 2)
+
+    def test_release_never_goes_below_zero(self):
+        release_seats(self.section.id)
+        self.assertEqual(self.seats(self.section), 0)
+
+    def test_full_section_rejects_enrollment_without_a_row(self):
+        for student in self.students[:2]:
+            Enrollment.objects.create(student=student, section=self.section)
+        with self.assertRaises(ValidationError):
+            Enrollment.objects.create(student=self.students[2], section=self.section)
+        self.assertEqual(self.seats(self.section), 2)
+        self.assertEqual(Enrollment.objects.filter(section=self.section).count(), 2)
+
+    def test_moving_an_enrollment_moves_its_seat(self):
+        enrollment = Enrollment.objects.create(student=self.students[0], section=self.section)
+        enrollment.section = self.other
+        enrollment.save()
+        self.assertEqual((self.seats(self.section), self.seats(self.other)), (0, 1))
+
+    def test_queryset_delete_releases_seats(self):
+        for student in self.students[:2]:
+            Enrollment.objects.create(student=student, section=self.section)
+        Enrollment.objects.filter(section=self.section).delete()
+        self.assertEqual(self.seats(self.section), 0)
+
+    def test_reconcile_repairs_drift(self):
+        Enrollment.objects.create(student=self.students[0], section=self.section)
+        Section.objects.filter(pk=self.section.pk).update(seats_taken=2)
+        self.assertEqual(reconcile_seats([self.section.id]), 1)
+        self.assertEqual(self.seats(self.section), 1)
+
+
+class WaitlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = make_section(max_students=1)
+        cls.first, cls.second, cls.third = [make_user(f"S{i:07d}") for i in range(1, 4)]
+        cls.enrollment = Enrollment.objects.create(student=cls.first, section=cls.section)
+        Waitlist.objects.create(student=cls.second, section=cls.section, position=4)
+        Waitlist.objects.create(student=cls.third, section=cls.section, position=7)
+
+    def waiting(self):
+        return list(Waitlist.objects.filter(section=self.section).values_list("student__matric_id", flat=True))
+
+    def test_drop_promotes_the_head_of_the_waitlist(self):
+        self.client.force_login(self.first)
+        self.client.post(reverse("drop_course", args=[self.section.course_id]))
+        self.assertTrue(Enrollment.objects.filter(student=self.second, section=self.section).exists())
+        self.assertEqual(self.waiting(), [self.third.matric_id])
+        self.assertEqual(Section.objects.get(pk=self.section.pk).seats_taken, 1)
+        self.assertEqual(OutboxEmail.objects.get().to, [self.second.personal_email])
+
+    def test_moving_to_another_section_promotes(self):
+        self.enrollment.section = make_section(course=self.section.course, number=2)
+        self.enrollment.save()
+        self.assertTrue(Enrollment.objects.filter(student=self.second, section=self.section).exists())
+
+    def test_students_enrolled_elsewhere_are_removed_and_skipped(self):
+        Enrollment.objects.create(student=self.second, section=make_section(course=self.section.course, number=2))
+        self.enrollment.delete()
+        self.assertTrue(Enrollment.objects.filter(student=self.third, section=self.section).exists())
+        self.assertEqual(self.waiting(), [])
+
+    def test_students_with_a_clash_keep_their_place(self):
+        Enrollment.objects.create(student=self.second, section=make_section(number=2))  # Same time, other course
+        self.enrollment.delete()
+        self.assertTrue(Enrollment.objects.filter(student=self.third, section=self.section).exists())
+        self.assertEqual(self.waiting(), [self.second.matric_id])
+
+    def test_deleting_the_section_does_not_promote(self):
+        self.section.delete()
+        self.assertFalse(Enrollment.objects.exists())
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_deleting_a_student_promotes_once_committed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        self.assertTrue(Enrollment.objects.filter(student=self.second, section=self.section).exists())
+
+    def test_student_sees_their_place_and_can_leave(self):
+        self.client.force_login(self.third)
+        response = self.client.get(reverse("my_courses"))
+        self.assertContains(response, "#2")
+        self.client.post(reverse("leave_waitlist", args=[self.section.id]))
+        self.assertEqual(self.waiting(), [self.second.matric_id])
+
+
+class WaitlistedCartItemTests(TestCase):
+    """A cart item is waitlisted and promoted as a whole (lecture and tutorial together)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(code="CS001", name="Course 1", tutorial_required=True)
+        cls.lecture = make_section(course=course)
+        cls.tutorial = make_section(course=course, section_type="Tutorial", max_students=1, class_time=time(11, 0))
+        cls.holder, cls.student = make_user("S0000001"), make_user("S0000002")
+        cls.held = Enrollment.objects.create(student=cls.holder, section=cls.tutorial)
+
+    def finalize(self):
+        EnrollmentCart.objects.create(student=self.student, course=self.lecture.course,
+                                      lecture_section=self.lecture, tutorial_section=self.tutorial)
+        return finalize_cart(self.student)
+
+    def test_full_tutorial_waitlists_the_whole_item(self):
+        result = self.finalize()
+        self.assertEqual(result.enrolled, [])
+        entry = Waitlist.objects.get(student=self.student)
+        self.assertEqual((entry.section, entry.paired_section), (self.tutorial, self.lecture))
+
+    def test_freed_tutorial_enrolls_the_lecture_too_and_clears_the_cart(self):
+        self.finalize()
+        self.held.delete()
+        self.assertEqual(
+            set(Enrollment.objects.filter(student=self.student).values_list("section_id", flat=True)),
+            {self.lecture.id, self.tutorial.id},
+        )
+        self.assertFalse(Waitlist.objects.filter(student=self.student).exists())
+        self.assertFalse(EnrollmentCart.objects.filter(student=self.student).exists())
+
+    def test_item_waits_while_its_paired_section_is_full(self):
+        Section.objects.filter(pk=self.lecture.pk).update(max_students=1)
+        Enrollment.objects.create(student=make_user("S0000003"), section=self.lecture)
+        self.finalize()
+        self.held.delete()
+        self.assertFalse(Enrollment.objects.filter(student=self.student).exists())
+        self.assertEqual(Waitlist.objects.filter(student=self.student).count(), 2)
+
+
+class SlowCacheCart(CacheCart):
+    """Widens the read-modify-write window so unlocked updates would lose each other."""
+
+    def _load(self):
+        selections = super()._load()
+        sleep(0.005)
+        return selections
+
+
+class CartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user("S0000001")
+        cls.sections = [make_section(number=number) for number in range(1, 11)]
+
+    def setUp(self):
+        get_cart_cache().clear()
+
+    def test_carts_are_rows_by_default(self):
+        cart = get_cart(self.student)
+        self.assertIsInstance(cart, DatabaseCart)
+        cart.select(self.sections[0].course, self.sections[0])
+        self.assertEqual(cart.items()[0].lecture_section, self.sections[0])
+
+    @override_settings(ENROLLMENT_CART_BACKEND="courses.cart.CacheCart")
+    def test_cache_cart_in_a_per_process_cache_is_reported(self):
+        self.assertIn("courses.W001", [message.id for message in checks.run_checks(tags=[checks.Tags.caches])])
+
+    def test_concurrent_cache_cart_clicks_are_all_kept(self):
+        get_cart_cache().set(CART_KEY.format(self.student.pk), {})  # No row fallback query from the threads
+        cart = SlowCacheCart(self.student)
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            list(pool.map(lambda section: cart.select(section.course, section), self.sections))
+        self.assertEqual(len(get_cart_cache().get(CART_KEY.format(self.student.pk))), len(self.sections))
+
+    @patch("courses.cart.LOCK_WAIT", 0.05)
+    def test_cache_cart_lock_is_never_skipped_or_stolen(self):
+        cache, lock_key = get_cart_cache(), LOCK_KEY.format(self.student.pk)
+        cart, section = CacheCart(self.student), self.sections[0]
+        cache.set(lock_key, "other", timeout=60)
+        with self.assertRaises(CartBusy):
+            cart.select(section.course, section)
+        self.assertEqual(cart.items(), [])
+        self.assertEqual(cache.get(lock_key), "other")
+
+        cache.delete(lock_key)
+        with cart._locked():
+            cache.set(lock_key, "other", timeout=60)  # Our lock expired and another request took it
+        self.assertEqual(cache.get(lock_key), "other")
+
+    @override_settings(ENROLLMENT_CART_BACKEND="courses.cart.CacheCart")
+    @patch("courses.cart.LOCK_WAIT", 0.05)
+    def test_busy_cache_cart_falls_back_to_rows_or_asks_to_retry(self):
+        cache, lock_key = get_cart_cache(), LOCK_KEY.format(self.student.pk)
+        cart, lecture, other = CacheCart(self.student), self.sections[0], make_section(number=11, class_time=time(14, 0))
+        cart.select(lecture.course, lecture)
+        EnrollmentCart.objects.create(student=self.student, course=other.course, lecture_section=other)
+        cache.set(lock_key, "other", timeout=60)
+        cart.after_finalize()
+        self.assertEqual([item.lecture_section for item in cart.items()], [other])
+
+        self.client.force_login(self.student)
+        response = self.client.post(reverse("select_sections", args=[lecture.course_id]), {"section_id": lecture.id})
+        self.assertIn("being updated", str(list(get_messages(response.wsgi_request))[0]))
+        response = self.client.get(reverse("remove_from_cart", args=[other.course_id]))
+        self.assertRedirects(response, reverse("review_cart"), fetch_redirect_response=False)
+        self.assertEqual(len(cart.items()), 1)
+
+    def test_cached_sections_read_seats_live(self):
+        section = self.sections[0]
+        cached_sections([section.id])
+        Enrollment.objects.create(student=self.student, section=section)
+        self.assertEqual(cached_sections([section.id])[section.id].seats_taken, 1)
+
+
+class ConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lecturer = make_user("L0000001", role="Lecturer")
+        cls.section = make_section(lecturer=cls.lecturer)  # Monday 09:00 for 60 minutes
+
+    def section_data(self, **changes):
+        data = {
+            "course": self.section.course_id, "section_type": "Lecture", "section_number": 1,
+            "lecturer": self.lecturer.id, "start_date": "2026-10-12", "class_time": "09:00",
+            "duration": 60, "max_students": 30,
+        }
+        return {**data, **changes}
+
+    def test_slot_mask_wraps_past_the_end_of_the_week(self):
+        self.assertEqual(slot_mask(MINUTES_PER_WEEK - 1, 2), (1 << (MINUTES_PER_WEEK - 1)) | 1)
+
+    def test_overlapping_slots_clash_and_adjacent_ones_do_not(self):
+        timetable = Timetable([self.section])
+        overlapping = Section(start_date=date(2026, 10, 12), class_time=time(9, 59), duration=30)
+        adjacent = Section(start_date=date(2026, 10, 12), class_time=time(10, 0), duration=30)
+        self.assertEqual(timetable.clash(overlapping), self.section)
+        self.assertIsNone(timetable.clash(adjacent))
+
+    def test_same_slot_in_a_later_term_does_not_clash(self):
+        later = Section(start_date=date(2027, 6, 7), class_time=time(9, 0), duration=60)
+        self.assertIsNone(Timetable([self.section]).clash(later))
+
+    def test_a_section_never_clashes_with_itself(self):
+        self.assertIsNone(Timetable.for_lecturer(self.lecturer).clash(self.section))
+
+    def test_editing_a_section_without_changes_is_valid(self):
+        form = SectionForm(self.section_data(), instance=self.section)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_new_section_at_the_lecturers_busy_time_is_rejected(self):
+        form = SectionForm(self.section_data(section_number=2, class_time="09:30"))
+        self.assertFalse(form.is_valid())
+        self.assertIn("This lecturer already has a section scheduled at this time.", form.non_field_errors())
+
+
+class EnrollmentViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.other = make_user("S0000001"), make_user("S0000002")
+        cls.section = make_section()
+        cls.full = make_section(course=cls.section.course, number=2, max_students=1, class_time=time(14, 0))
+        Enrollment.objects.create(student=cls.student, section=cls.section)
+        Enrollment.objects.create(student=cls.other, section=cls.full)
+
+    def test_changing_to_a_section_filled_meanwhile_is_reported(self):
+        self.client.force_login(self.student)
+        url = reverse("change_section", args=[self.section.course_id])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {"section_id": self.full.id})
+        self.assertRedirects(response, url)
+        self.assertIn("is full", str(list(get_messages(response.wsgi_request))[0]))
+        self.assertEqual(Enrollment.objects.get(student=self.student).section, self.section)
+
+    def test_changing_section_moves_the_enrollment(self):
+        open_section = make_section(course=self.section.course, number=3, class_time=time(16, 0))
+        self.client.force_login(self.student)
+        self.client.post(reverse("change_section", args=[self.section.course_id]), {"section_id": open_section.id})
+        self.assertEqual(Enrollment.objects.get(student=self.student).section, open_section)
+
+
+class TimeslotSolverTests(TestCase):
+    def test_a_lecturer_is_never_double_booked(self):
+        for lecturer_id in (0, 7):
+            with self.subTest(lecturer_id=lecturer_id):
+                tasks = [Task(task_id, 60, lecturer_id, frozenset()) for task_id in (1, 2)]
+                self.assertEqual(TimeslotSolver(tasks, slots=[(0, 9 * 60)]).solve().hard_conflicts, [1, 2])
+                solution = TimeslotSolver(tasks, slots=[(0, 9 * 60), (0, 10 * 60)]).solve()
+                self.assertEqual(solution.hard_conflicts, [])
+                self.assertNotEqual(solution.slots[1], solution.slots[2])
+
+
+class SessionSyncTests(TestCase):
+    def sessions(self, section):
+        return list(section.sessions.order_by("week_number").values_list("week_number", "date", "start_time"))
+
+    def test_rescheduled_section_is_reconciled_in_place(self):
+        section = make_section()
+        ids = set(section.sessions.values_list("id", flat=True))
+        self.assertEqual(len(ids), 14)
+
+        section.start_date, section.class_time = date(2026, 10, 14), time(14, 0)
+        section.save()
+        self.assertEqual(set(section.sessions.values_list("id", flat=True)), ids)  # Updated, not recreated
+        self.assertEqual(self.sessions(section)[0], (1, date(2026, 10, 14), time(14, 0)))
+        self.assertEqual(self.sessions(section)[-1], (14, date(2027, 1, 13), time(14, 0)))
+
+        # The duration changes the weekly slot, not the session dates
+        section.duration = 120
+        self.assertEqual(sync_sessions([section]), {"created": 0, "updated": 0, "deleted": 0})
+
+    def test_stale_sessions_are_diffed(self):
+        section = make_section()
+        ClassSession.objects.filter(section=section, week_number=3).delete()
+        ClassSession.objects.filter(section=section, week_number=5).update(date=date(2026, 1, 1))
+        ClassSession.objects.create(section=section, week_number=15, date=date(2027, 1, 18), start_time=time(9, 0))
+        self.assertEqual(sync_sessions([section]), {"created": 1, "updated": 1, "deleted": 1})
+        self.assertEqual([week for week, _, _ in self.sessions(section)], list(range(1, 15)))
+        self.assertEqual(self.sessions(section)[4][1], date(2026, 11, 9))
+
+        section.start_date = None
+        section.save()
+        self.assertEqual(self.sessions(section), [])
+
+
+class ImporterTests(TestCase):
+    HEADER = "course_code,course_name,section_type,section_number,lecturer,start_date,class_time,max_students\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lecturer = make_user("L0000001", "Lecturer")
+
+    def run_import(self, rows, **kwargs):
+        return import_sections(io.StringIO(self.HEADER + "".join(f"{row}\n" for row in rows)), **kwargs)
+
+    def test_clean_file_is_imported_with_sessions(self):
+        result = self.run_import([
+            "CS101,Intro,Lecture,1,L0000001,2026-10-12,09:00,40",
+            "CS101,,Tutorial,1,,2026-10-13,10:00,",
+            "CS102,Data,,,,,,",
+        ])
+        self.assertEqual(result, (2, 2, 28, []))
+        self.assertEqual(Section.objects.get(section_type="Lecture").max_students, 40)
+        self.assertEqual(ClassSession.objects.count(), 28)
+
+    def test_every_error_is_reported_and_nothing_is_written(self):
+        make_section(Course.objects.create(code="CS200", name="Existing"))
+        result = self.run_import([
+            f"CS101,{'x' * 101},Lecture,1,,,,",
+            "CS102,Ok,Lecture,1,L0000001,2026-10-12,09:00,",
+            "CS103,Ok,Lecture,1,L0000001,2026-10-12,09:30,",
+            "CS104,Ok,Lecture,1,L9999999,2026-10-12,13:00,",
+            "CS200,,Lecture,1,,,,",
+            "CS105,Ok,Seminar,1,,,,",
+        ])
+        self.assertEqual(result.errors, [
+            (2, "course_name of CS101 is longer than 100 characters."),
+            (4, "Lecturer L0000001 already teaches CS102 - Lecture 1 at this time."),
+            (5, "Lecturer L9999999 does not exist."),
+            (6, "CS200 Lecture 1 already exists."),
+            (7, 'section_type must be Lecture or Tutorial, not "Seminar".'),
+        ])
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_dry_run_writes_nothing(self):
+        result = self.run_import(["CS101,Intro,Lecture,1,,2026-10-12,09:00,"], dry_run=True)
+        self.assertEqual(result, (1, 1, 0, []))
+        self.assertFalse(Course.objects.exists())
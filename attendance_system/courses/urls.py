@@ -1,22 +1,28 @@
 from django.urls import path
 from .views import (
-    manage_courses_view, create_course_view, edit_course_view, delete_course_view,
+    manage_courses_view, create_course_view, import_sections_view, edit_course_view, delete_course_view,
     manage_sections_view, create_section_view, edit_section_view, delete_section_view, view_course_sections_view,
     manage_enrollments_view, enroll_student_view, unenroll_student_view, admin_enroll_student_view,
     select_course_view, select_sections_view, review_cart_view, remove_from_cart_view, finalize_enrollment_view,
-    my_courses_view, change_section_view, drop_course_view,
-    student_schedule_view
+    my_courses_view, change_section_view, drop_course_view, leave_waitlist_view,
+    student_schedule_view, calendar_feed_view, reset_calendar_feed_view, course_catalog_view,
+    autocomplete_courses_view, autocomplete_sections_view
 )
 
 urlpatterns = [
     # 🔹 Course Management
     path('manage-courses/', manage_courses_view, name='manage_courses'),
     path('create-course/', create_course_view, name='create_course'),
+    path('import-sections/', import_sections_view, name='import_sections'),  # ✅ Bulk CSV import
     path('edit-course/<int:course_id>/', edit_course_view, name='edit_course'),
     path('delete-course/<int:course_id>/', delete_course_view, name='delete_course'),
     path('view-course-sections/<int:course_id>/', view_course_sections_view, name='view_course_sections'),
     path('create-section/<int:course_id>/', create_section_view, name='create_section_for_course'),
 
+    # 🔹 Autocomplete lookups for admin forms
+    path('autocomplete/courses/', autocomplete_courses_view, name='autocomplete_courses'),
+    path('autocomplete/sections/', autocomplete_sections_view, name='autocomplete_sections'),
+
     # 🔹 Section Management
     path('manage-sections/', manage_sections_view, name='manage_sections'),
     path('create-section/', create_section_view, name='create_section'),
@@ -31,15 +37,19 @@ urlpatterns = [
 
     # 🔹 Student Self-Enrollment (Cart-Based Process)
     path('select-course/', select_course_view, name='select_course'),  # ✅ Step 1: Select Courses
+    path('catalog/', course_catalog_view, name='course_catalog'),  # ✅ JSON catalog with open seats
     path('select-sections/<int:course_id>/', select_sections_view, name='select_sections'),  # ✅ Step 2: Choose Sections
     path('review-cart/', review_cart_view, name='review_cart'),  # ✅ Step 3: Review Cart
-    path('remove-from-cart/<int:cart_id>/', remove_from_cart_view, name='remove_from_cart'),  # ✅ Remove from cart
+    path('remove-from-cart/<int:course_id>/', remove_from_cart_view, name='remove_from_cart'),  # ✅ Remove from cart
     path('finalize-enrollment/', finalize_enrollment_view, name='finalize_enrollment'),  # ✅ Step 4: Finalize Enrollment
     
     path('my-courses/', my_courses_view, name='my_courses'),
     path('change-section/<int:course_id>/', change_section_view, name='change_section'),
     path('drop-course/<int:course_id>/', drop_course_view, name='drop_course'),
+    path('leave-waitlist/<int:section_id>/', leave_waitlist_view, name='leave_waitlist'),
 
     # 🔹 Student Schedule
     path('student-schedule/', student_schedule_view, name='student_schedule'),  # ✅ View enrolled courses
+    path('calendar/<str:token>.ics', calendar_feed_view, name='calendar_feed'),  # ✅ Subscribable iCalendar feed
+    path('calendar/reset/', reset_calendar_feed_view, name='reset_calendar_feed'),
 ]
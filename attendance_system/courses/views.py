@@ -1,13 +1,25 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404
 from django.contrib import messages
-from .models import Course, Section, Enrollment, EnrollmentCart, ClassSession
-from .forms import CourseForm, SectionForm, EnrollmentForm, EnrollmentCartForm, AdminEnrollmentForm
-from datetime import timedelta, datetime
+from .models import Course, Section, Enrollment, Waitlist
+from .forms import CourseForm, SectionForm, EnrollmentForm, EnrollmentCartForm, AdminEnrollmentForm, SectionImportForm
+from .conflicts import Timetable
+from .registration import finalize_enrollment, RegistrationBusy, waitlist_ranks
+from .cart import CartBusy, get_cart
+from .student_schedule import get_week
+from .ical import feed_url, get_feed, user_for_token, reset_feed_token
+from .catalog import get_page as get_catalog_page, get_page_size
+from .importer import import_sections, COLUMNS
+from .autocomplete import course_results, section_results
+from users.autocomplete import cached_results
+from datetime import datetime
 from django.utils.timezone import now
 from django.http import JsonResponse
-from django.db.models import Min
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.core.exceptions import ValidationError
+import io
 
 # 🔹 MANAGE COURSES
 @login_required(login_url='/users/login/')
@@ -37,24 +49,14 @@ def create_course_view(request):
                 sections_to_create.append(('Tutorial', 1))
 
             for section_type, section_number in sections_to_create:
-                section = Section.objects.create(
+                Section.objects.create(
                     course=course,
                     section_type=section_type,
                     section_number=section_number,
                     start_date=None,  # Start date will be assigned later
                     class_time=None,  # Class time will be assigned later
                     duration=60,  # Default 1 hour
-                )
-
-                # ✅ Generate 14 weeks of class sessions only when start_date & class_time are set
-                if section.start_date and section.class_time:
-                    for week in range(1, 15):
-                        ClassSession.objects.create(
-                            section=section,
-                            week_number=week,
-                            date=section.start_date + timedelta(weeks=week - 1),
-                            start_time=section.class_time
-                        )
+                )  # ✅ Class sessions are generated once a schedule is set
 
             messages.success(request, "Course and required sections created successfully!")
             return redirect('manage_courses')
@@ -63,6 +65,30 @@ def create_course_view(request):
 
     return render(request, 'courses/create_course.html', {'form': form})
 
+@login_required(login_url='/users/login/')
+def import_sections_view(request):
+    """Allows Admins to create a semester's courses and sections from one CSV upload."""
+    if request.user.role not in ['Superadmin', 'Admin']:
+        return render(request, 'access_denied.html')
+
+    errors = []
+    if request.method == 'POST':
+        form = SectionImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            csv_file = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            result = import_sections(csv_file, dry_run=form.cleaned_data['dry_run'])
+            errors = result.errors
+            if not errors:
+                if form.cleaned_data['dry_run']:
+                    messages.success(request, f"File is valid: {result.courses} new courses and {result.sections} sections.")
+                else:
+                    messages.success(request, f"Imported {result.courses} courses, {result.sections} sections and {result.sessions} class sessions.")
+                    return redirect('manage_courses')
+    else:
+        form = SectionImportForm()
+
+    return render(request, 'courses/import_sections.html', {'form': form, 'errors': errors, 'columns': COLUMNS})
+
 @login_required(login_url='/users/login/')
 def edit_course_view(request, course_id):
     """Allows Admins to edit a course and auto-handle related sections."""
@@ -78,39 +104,23 @@ def edit_course_view(request, course_id):
 
             # ✅ Handle Lecture Section
             if course.lecture_required:
-                lecture_section, created = Section.objects.get_or_create(
+                Section.objects.get_or_create(
                     course=course,
                     section_type='Lecture',
                     section_number=1,
                     defaults={'start_date': None, 'class_time': None, 'duration': 60}
                 )
-                if created and lecture_section.start_date and lecture_section.class_time:
-                    for week in range(1, 15):
-                        ClassSession.objects.create(
-                            section=lecture_section,
-                            week_number=week,
-                            date=lecture_section.start_date + timedelta(weeks=week - 1),
-                            start_time=lecture_section.class_time
-                        )
             else:
                 Section.objects.filter(course=course, section_type='Lecture').delete()
 
             # ✅ Handle Tutorial Section
             if course.tutorial_required:
-                tutorial_section, created = Section.objects.get_or_create(
+                Section.objects.get_or_create(
                     course=course,
                     section_type='Tutorial',
                     section_number=1,
                     defaults={'start_date': None, 'class_time': None, 'duration': 60}
                 )
-                if created and tutorial_section.start_date and tutorial_section.class_time:
-                    for week in range(1, 15):
-                        ClassSession.objects.create(
-                            section=tutorial_section,
-                            week_number=week,
-                            date=tutorial_section.start_date + timedelta(weeks=week - 1),
-                            start_time=tutorial_section.class_time
-                        )
             else:
                 Section.objects.filter(course=course, section_type='Tutorial').delete()
 
@@ -171,18 +181,7 @@ def create_section_view(request, course_id=None):
             section = form.save(commit=False)
             if course:
                 section.course = course  # ✅ Assign course
-            section.save()
-
-            # ✅ Ensure class sessions are generated correctly
-            existing_sessions = ClassSession.objects.filter(section=section).count()
-            if existing_sessions == 0:
-                for week in range(1, 15):  # ✅ Generate 14 weeks
-                    ClassSession.objects.create(
-                        section=section,
-                        week_number=week,
-                        date=section.start_date + timedelta(weeks=week - 1),
-                        start_time=section.class_time
-                    )
+            section.save()  # ✅ Class sessions are generated by sync_sessions on save
 
             messages.success(request, "Section created and class sessions generated successfully!")
             return redirect('view_course_sections', course_id=course.id)
@@ -201,22 +200,9 @@ def edit_section_view(request, section_id):
     if request.method == 'POST':
         form = SectionForm(request.POST, instance=section)
         if form.is_valid():
-            section = form.save()
-
-            # ✅ Ensure class sessions are generated if they don't exist
-            existing_sessions = ClassSession.objects.filter(section=section).count()
-            if existing_sessions == 0:
-                for week in range(1, 15):  # ✅ Generate 14 weeks if missing
-                    ClassSession.objects.create(
-                        section=section,
-                        week_number=week,
-                        date=section.start_date + timedelta(weeks=week - 1),
-                        start_time=section.class_time
-                    )
-                messages.success(request, "Section updated and missing class sessions were generated!")
+            form.save()  # ✅ Existing class sessions follow the new start date/time
 
-            else:
-                messages.success(request, "Section updated successfully!")
+            messages.success(request, "Section updated and class sessions rescheduled successfully!")
 
             return redirect('manage_sections')
 
@@ -248,13 +234,13 @@ def admin_enroll_student_view(request):
         if form.is_valid():
             enrollment = form.save(commit=False)
 
-            # ✅ Check if section is full
-            enrolled_students = Enrollment.objects.filter(section=enrollment.section).count()
-            if enrolled_students >= enrollment.section.max_students:
+            # ✅ The seat is reserved atomically when saving
+            try:
+                enrollment.save()
+            except ValidationError:
                 messages.error(request, f"The section {enrollment.section.section_type} {enrollment.section.section_number} is full.")
                 return render(request, 'courses/admin_enroll_student.html', {'form': form})
 
-            enrollment.save()
             messages.success(request, "Student enrolled successfully!")
             return redirect('manage_enrollments')
     else:
@@ -262,6 +248,24 @@ def admin_enroll_student_view(request):
 
     return render(request, 'courses/admin_enroll_student.html', {'form': form})
 
+@login_required(login_url='/users/login/')
+def autocomplete_courses_view(request):
+    """Courses matching ?q= for the autocomplete widgets."""
+    if request.user.role not in ['Superadmin', 'Admin']:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    return JsonResponse({'results': cached_results('courses', request.GET.get('q', ''), course_results)})
+
+@login_required(login_url='/users/login/')
+def autocomplete_sections_view(request):
+    """Sections of the courses matching ?q= (only ones with free seats when ?open=1)."""
+    if request.user.role not in ['Superadmin', 'Admin']:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    open_only = request.GET.get('open') == '1'
+    return JsonResponse({'results': cached_results(
+        'open-sections' if open_only else 'sections', request.GET.get('q', ''),
+        lambda query: section_results(query, open_only),
+    )})
+
 # 🔹 MANAGE ENROLLMENT
 @login_required(login_url='/users/login/')
 def manage_enrollments_view(request):
@@ -279,7 +283,12 @@ def enroll_student_view(request):
     if request.method == 'POST':
         form = EnrollmentForm(request.POST)
         if form.is_valid():
-            form.save()
+            # ✅ The seat is reserved atomically when saving
+            try:
+                form.save()
+            except ValidationError as e:
+                form.add_error(None, e)
+                return render(request, 'courses/enroll_student.html', {'form': form})
             messages.success(request, "Student enrolled successfully!")
             return redirect('manage_enrollments')
     else:
@@ -300,17 +309,56 @@ def unenroll_student_view(request, enrollment_id):
 # 🔹 SELECT COURSES
 @login_required(login_url='/users/login/')
 def select_course_view(request):
-    """Step 1: Student selects courses to enroll in, excluding already enrolled ones."""
+    """Step 1: Student searches the course catalog and picks courses to enroll in."""
     if request.user.role != 'Student':
         return render(request, 'access_denied.html')
 
-    # Get course IDs that the student has already enrolled in
-    enrolled_courses = Enrollment.objects.filter(student=request.user).values_list('section__course_id', flat=True)
-    
-    # Exclude already enrolled courses
-    available_courses = Course.objects.exclude(id__in=enrolled_courses)
+    catalog = _catalog_for(request)
+    return render(request, 'courses/select_course.html', {'catalog': catalog, 'courses': catalog['results']})
 
-    return render(request, 'courses/select_course.html', {'courses': available_courses})
+@login_required(login_url='/users/login/')
+def course_catalog_view(request):
+    """Paginated, searchable course catalog with per-section open seats (JSON)."""
+    return JsonResponse(_catalog_for(request))
+
+def _catalog_for(request):
+    """Cached catalog page for the request's ``q``/``page``/``page_size``, with the student's enrolled courses marked."""
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    catalog = get_catalog_page(request.GET.get('q', ''), page, get_page_size(request.GET.get('page_size')))
+
+    # ✅ Pages are shared between students, so "already enrolled" is filled in per request
+    enrolled_courses = set()
+    if request.user.role == 'Student':
+        enrolled_courses = set(
+            Enrollment.objects.filter(student=request.user).values_list('section__course_id', flat=True)
+        )
+    return dict(catalog, results=[
+        dict(course, enrolled=course['id'] in enrolled_courses) for course in catalog['results']
+    ])
+
+def _section_timetables(student, cart, cart_item):
+    """Timetables to check Lecture and Tutorial candidates of ``cart_item``'s course against.
+
+    Both contain the student's enrollments and other cart items; a Lecture
+    candidate is also checked against the selected Tutorial and vice versa.
+    """
+    committed = [
+        enrollment.section
+        for enrollment in Enrollment.objects.filter(student=student).select_related('section__course')
+    ] + [
+        section
+        for other in cart.items()
+        if other.course_id != cart_item.course_id
+        for section in (other.lecture_section, other.tutorial_section)
+        if section
+    ]
+    return {
+        'Lecture': Timetable(committed + ([cart_item.tutorial_section] if cart_item.tutorial_section else [])),
+        'Tutorial': Timetable(committed + ([cart_item.lecture_section] if cart_item.lecture_section else [])),
+    }
 
 # 🔹 SELECT SECTIONS
 @login_required(login_url='/users/login/')
@@ -323,15 +371,9 @@ def select_sections_view(request, course_id):
     lecture_sections = Section.objects.filter(course=course, section_type='Lecture')
     tutorial_sections = Section.objects.filter(course=course, section_type='Tutorial')
 
-    # ✅ Get the cart item for this student and course, ensuring only one exists
-    cart_item, created = EnrollmentCart.objects.get_or_create(
-        student=request.user, 
-        course=course,
-        defaults={'lecture_section': None, 'tutorial_section': None}
-    )
-
-    # ✅ Delete duplicate cart entries (if any exist)
-    EnrollmentCart.objects.filter(student=request.user, course=course).exclude(id=cart_item.id).delete()
+    # ✅ Read the cart without writing anything; an empty item if the course is not in it yet
+    cart = get_cart(request.user)
+    cart_item = cart.get(course)
 
     if request.method == 'POST':
         section_id = request.POST.get('section_id')
@@ -342,39 +384,22 @@ def select_sections_view(request, course_id):
             messages.error(request, f"⚠️ Cannot select {section.section_type} {section.section_number} as its schedule is not set.")
             return redirect('select_sections', course_id=course.id)
 
-        # ✅ Convert to full datetime for proper time calculations
-        selected_section_start = datetime.combine(section.start_date, section.class_time)
-        selected_section_end = selected_section_start + timedelta(minutes=section.duration)
-
-        # ✅ Prevent schedule clashes with sections already in the cart
-        if cart_item.lecture_section and cart_item.lecture_section.start_date and cart_item.lecture_section.class_time:
-            lecture_start = datetime.combine(cart_item.lecture_section.start_date, cart_item.lecture_section.class_time)
-            lecture_end = lecture_start + timedelta(minutes=cart_item.lecture_section.duration)
-
-            if (
-                lecture_start <= selected_section_start < lecture_end or
-                lecture_start < selected_section_end <= lecture_end
-            ):
-                messages.error(request, f"⚠️ Cannot add {section.section_type} {section.section_number} as it conflicts with Lecture {cart_item.lecture_section.section_number}.")
-                return redirect('select_sections', course_id=course.id)
-
-        if cart_item.tutorial_section and cart_item.tutorial_section.start_date and cart_item.tutorial_section.class_time:
-            tutorial_start = datetime.combine(cart_item.tutorial_section.start_date, cart_item.tutorial_section.class_time)
-            tutorial_end = tutorial_start + timedelta(minutes=cart_item.tutorial_section.duration)
-
-            if (
-                tutorial_start <= selected_section_start < tutorial_end or
-                tutorial_start < selected_section_end <= tutorial_end
-            ):
-                messages.error(request, f"⚠️ Cannot add {section.section_type} {section.section_number} as it conflicts with Tutorial {cart_item.tutorial_section.section_number}.")
-                return redirect('select_sections', course_id=course.id)
-
-        # ✅ Add section to cart (Lecture or Tutorial)
+        # ✅ Prevent schedule clashes with enrolled sections and everything else in the cart
+        clashing = _section_timetables(request.user, cart, cart_item)[section.section_type].clash(section)
+        if clashing:
+            messages.error(request, f"⚠️ Cannot add {section.section_type} {section.section_number} as it conflicts with {clashing}.")
+            return redirect('select_sections', course_id=course.id)
+
+        # ✅ Add section to cart (replaces any earlier Lecture or Tutorial of this course)
+        try:
+            cart.select(course, section)
+        except CartBusy:
+            messages.error(request, "⚠️ Your cart is being updated by another request. Please try again.")
+            return redirect('select_sections', course_id=course.id)
         if section.section_type == "Lecture":
-            cart_item.lecture_section = section  # Ensures only one lecture section
-        elif section.section_type == "Tutorial":
-            cart_item.tutorial_section = section  # Ensures only one tutorial section
-        cart_item.save()
+            cart_item.lecture_section = section
+        else:
+            cart_item.tutorial_section = section
 
         messages.success(request, f"✅ {section.section_type} {section.section_number} added to cart successfully!")
 
@@ -384,11 +409,19 @@ def select_sections_view(request, course_id):
 
         return redirect('select_sections', course_id=course.id)  # Stay on page if requirements are not met
 
+    # ✅ Mark every clashing option in one pass
+    timetables = _section_timetables(request.user, cart, cart_item)
+    clashes = {
+        **timetables['Lecture'].clash_map(lecture_sections),
+        **timetables['Tutorial'].clash_map(tutorial_sections),
+    }
+
     return render(request, 'courses/select_sections.html', {
         'course': course,
         'lecture_sections': lecture_sections,
         'tutorial_sections': tutorial_sections,
-        'cart_item': cart_item
+        'cart_item': cart_item,
+        'clashes': clashes,
     })
 
 # 🔹 REVIEW CART
@@ -398,18 +431,23 @@ def review_cart_view(request):
     if request.user.role != 'Student':
         return render(request, 'access_denied.html')
 
-    cart_items = EnrollmentCart.objects.filter(student=request.user)
+    cart_items = get_cart(request.user).items()
     return render(request, 'courses/review_cart.html', {'cart_items': cart_items})
 
 # 🔹 REMOVE FROM CART
 @login_required(login_url='/users/login/')
-def remove_from_cart_view(request, cart_id):
+def remove_from_cart_view(request, course_id):
     """Allows students to remove a course from their cart before finalizing enrollment."""
     if request.user.role != 'Student':
         return render(request, 'access_denied.html')
 
-    cart_item = get_object_or_404(EnrollmentCart, id=cart_id, student=request.user)
-    cart_item.delete()
+    try:
+        removed = get_cart(request.user).remove(course_id)
+    except CartBusy:
+        messages.error(request, "⚠️ Your cart is being updated by another request. Please try again.")
+        return redirect('review_cart')
+    if not removed:
+        raise Http404("Course is not in your cart.")
     messages.success(request, "Course removed from cart!")
     return redirect('review_cart')
 
@@ -420,25 +458,22 @@ def finalize_enrollment_view(request):
     if request.user.role != 'Student':
         return render(request, 'courses/access_denied.html')
 
-    cart_items = EnrollmentCart.objects.filter(student=request.user)
-
-    # ✅ Ensure each course has 1 Lecture & 1 Tutorial (if required)
-    for cart_item in cart_items:
-        if not cart_item.lecture_section:
-            messages.error(request, f"⚠️ You must select a Lecture for {cart_item.course.name}.")
-            return redirect('review_cart')
-        if cart_item.course.tutorial_required and not cart_item.tutorial_section:
-            messages.error(request, f"⚠️ You must select a Tutorial for {cart_item.course.name}.")
-            return redirect('review_cart')
-
-    # ✅ Proceed with Enrollment
-    for cart_item in cart_items:
-        Enrollment.objects.create(student=request.user, section=cart_item.lecture_section)
-        if cart_item.tutorial_section:
-            Enrollment.objects.create(student=request.user, section=cart_item.tutorial_section)
-
-    # ✅ Clear the cart after finalizing enrollment
-    cart_items.delete()
+    # ✅ One transaction per cart; full sections put the student on the waitlist
+    cart = get_cart(request.user)
+    try:
+        result = finalize_enrollment(request.user, cart)
+    except RegistrationBusy as e:
+        messages.warning(request, f"⏳ Registration is very busy right now (you were #{e.position} in the queue). Please try again in a moment.")
+        return redirect('review_cart')
+    except ValidationError as e:
+        messages.error(request, f"⚠️ {e.messages[0]}")
+        return redirect('review_cart')
+    cart.after_finalize()
+
+    for section, rank in result.waitlisted:
+        messages.warning(request, f"⏳ {section} is full. You are #{rank} on its waitlist.")
+    if result.waitlisted and not result.enrolled:
+        return redirect('review_cart')
 
     messages.success(request, "Enrollment completed successfully!")
     return redirect('student_schedule')
@@ -447,7 +482,6 @@ def finalize_enrollment_view(request):
 def student_schedule_view(request):
     """Displays the student's weekly schedule with AJAX support."""
     student = request.user
-    enrollments = Enrollment.objects.filter(student=student).select_related('section__course')
 
     # ✅ Get the selected week date from the request
     week_date_str = request.GET.get("week_date")
@@ -456,46 +490,54 @@ def student_schedule_view(request):
     else:
         selected_date = now().date()  # Default to today's date
 
-    # ✅ Find the earliest start date among the student's enrolled courses
-    earliest_start_date = enrollments.aggregate(Min("section__start_date"))["section__start_date__min"]
-    
-    if earliest_start_date:
-        # ✅ Adjust the selected week based on the actual start date
-        week_offset = (selected_date - earliest_start_date).days // 7
-        start_of_week = earliest_start_date + timedelta(weeks=week_offset)
-    else:
-        # If no courses have a start date, default to the current week
-        start_of_week = selected_date - timedelta(days=selected_date.weekday())
-
-    # ✅ Retrieve class sessions for the student's enrolled sections
-    weekly_schedule = []
-    for enrollment in enrollments:
-        class_sessions = ClassSession.objects.filter(
-            section=enrollment.section,
-            date__range=[start_of_week, start_of_week + timedelta(days=4)]
-        )
-
-        for session in class_sessions:
-            weekly_schedule.append({
-                "course": enrollment.section.course.name,
-                "type": enrollment.section.section_type,
-                "day": session.date.strftime("%A"),
-                "hour": session.start_time.hour,
-            })
-
-    # ✅ Debugging Output
-    print(f"Adjusted Start of Week: {start_of_week} | Selected Date: {selected_date}")
-    print("Weekly Schedule Data:", weekly_schedule)
-
-    # ✅ Return JSON if it's an AJAX request
+    # ✅ Return JSON if it's an AJAX request (cached per student and week, revalidated with ETag/Last-Modified)
     if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-        return JsonResponse({"schedule": weekly_schedule, "start_of_week": start_of_week.strftime("%Y-%m-%d")})
-
+        stamp = student.schedule_changed_at.timestamp()  # ✅ Loaded with request.user, so no extra query
+        etag = quote_etag(f"{student.id}-{stamp}-{selected_date.isoformat()}")
+        last_modified = int(stamp)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            start_of_week, weekly_schedule, stamp = get_week(student.id, selected_date, stamp)
+            response = JsonResponse({"schedule": weekly_schedule, "start_of_week": start_of_week.strftime("%Y-%m-%d")})
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    start_of_week, weekly_schedule, stamp = get_week(student.id, selected_date, student.schedule_changed_at.timestamp())
+    enrollments = Enrollment.objects.filter(student=student).select_related('section__course')
     return render(request, "courses/student_schedule.html", {
         "enrollments": enrollments,
         "selected_week": start_of_week.strftime("%Y-%m-%d"),
+        "calendar_url": feed_url(request, student),
     })
 
+def calendar_feed_view(request, token):
+    """Token-authenticated iCalendar feed for calendar apps (no login session)."""
+    user = user_for_token(token)
+    if user is None:
+        raise Http404("Unknown calendar feed.")
+
+    etag, body = get_feed(user)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="text/calendar; charset=utf-8")
+        response["Content-Disposition"] = 'inline; filename="schedule.ics"'
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, max-age=900"
+    return response
+
+@login_required(login_url='/users/login/')
+def reset_calendar_feed_view(request):
+    """Replace the user's calendar feed URL, e.g. after it was shared by mistake."""
+    if request.user.role not in ('Student', 'Lecturer'):
+        return render(request, 'access_denied.html')
+
+    if request.method == 'POST':
+        reset_feed_token(request.user)
+        messages.success(request, "Your calendar link has been reset. Subscribe again with the new link; the old one no longer works.")
+    return redirect('student_schedule' if request.user.role == 'Student' else 'lecturer_attendance_dashboard')
+
 @login_required(login_url='/users/login/')
 def my_courses_view(request):
     """Displays all enrolled courses for the student with options to drop or change sections."""
@@ -504,8 +546,22 @@ def my_courses_view(request):
 
     # ✅ Fetch enrolled courses and their sections
     enrollments = Enrollment.objects.filter(student=request.user).select_related('section__course')
+    waitlist = waitlist_ranks(Waitlist.objects.filter(student=request.user).select_related('section__course'))
 
-    return render(request, 'courses/my_courses.html', {'enrollments': enrollments})
+    return render(request, 'courses/my_courses.html', {'enrollments': enrollments, 'waitlist': waitlist})
+
+@login_required(login_url='/users/login/')
+def leave_waitlist_view(request, section_id):
+    """Removes the student from a section's waitlist."""
+    if request.user.role != 'Student':
+        return render(request, 'access_denied.html')
+
+    if request.method == 'POST':
+        if Waitlist.objects.filter(student=request.user, section_id=section_id).delete()[0]:
+            messages.success(request, "You have left the waitlist.")
+        else:
+            messages.error(request, "You are not on the waitlist for this section.")
+    return redirect('my_courses')
 
 @login_required(login_url='/users/login/')
 def change_section_view(request, course_id):
@@ -513,34 +569,42 @@ def change_section_view(request, course_id):
     if request.user.role != 'Student':
         return render(request, 'access_denied.html')
 
-    # ✅ Ensure the student is enrolled in this course
-    enrollment = Enrollment.objects.filter(student=request.user, section__course_id=course_id).first()
-    if not enrollment:
+    # ✅ Ensure the student is enrolled in this course (one enrollment per section type)
+    enrollments = {
+        enrollment.section.section_type: enrollment
+        for enrollment in Enrollment.objects.filter(student=request.user, section__course_id=course_id).select_related('section__course')
+    }
+    if not enrollments:
         messages.error(request, "You are not enrolled in this course.")
         return redirect('my_courses')
 
-    course = enrollment.section.course
+    course = next(iter(enrollments.values())).section.course
 
-    # ✅ Get available sections for this course
-    lecture_sections = Section.objects.filter(course=course, section_type='Lecture').exclude(schedule=None)
-    tutorial_sections = Section.objects.filter(course=course, section_type='Tutorial').exclude(schedule=None)
+    # ✅ Get available (scheduled) sections for this course
+    sections = Section.objects.filter(course=course).exclude(start_date=None).exclude(class_time=None).order_by('section_number')
+    lecture_sections = sections.filter(section_type='Lecture')
+    tutorial_sections = sections.filter(section_type='Tutorial')
 
     if request.method == 'POST':
-        section_id = request.POST.get('section_id')
-        section = get_object_or_404(Section, id=section_id)
+        section_id = request.POST.get('section_id', '')
+        section = sections.filter(id=section_id).first() if section_id.isascii() and section_id.isdecimal() else None
+        enrollment = enrollments.get(section.section_type) if section else None
+        if enrollment is None:
+            messages.error(request, "Please choose one of the listed sections.")
+            return redirect('change_section', course_id=course.id)
 
         # ✅ Prevent schedule conflicts
-        enrolled_sections = Enrollment.objects.filter(student=request.user).exclude(section=enrollment.section)
-        for e in enrolled_sections:
-            if section.schedule and e.section.schedule:
-                end_time = section.schedule + timedelta(minutes=section.duration)
-                if e.section.schedule < end_time and section.schedule < (e.section.schedule + timedelta(minutes=e.section.duration)):
-                    messages.error(request, "This section conflicts with another enrolled section.")
-                    return redirect('change_section', course_id=course.id)
-
-        # ✅ Update enrollment with new section
+        if Timetable.for_student(request.user, exclude_enrollment_id=enrollment.id).clash(section):
+            messages.error(request, "This section conflicts with another enrolled section.")
+            return redirect('change_section', course_id=course.id)
+
+        # ✅ Update enrollment with new section (the seat is reserved atomically when saving)
         enrollment.section = section
-        enrollment.save()
+        try:
+            enrollment.save()
+        except ValidationError:
+            messages.error(request, f"The section {section.section_type} {section.section_number} is full. Please select another section.")
+            return redirect('change_section', course_id=course.id)
 
         messages.success(request, f"Successfully changed section to {section.section_type} {section.section_number}.")
         return redirect('my_courses')
@@ -549,7 +613,7 @@ def change_section_view(request, course_id):
         'course': course,
         'lecture_sections': lecture_sections,
         'tutorial_sections': tutorial_sections,
-        'current_section': enrollment.section
+        'current_sections': [enrollment.section for enrollment in enrollments.values()],
     })
 
 @login_required(login_url='/users/login/')
@@ -0,0 +1,94 @@
+"""Autocomplete lookups for admin forms.
+
+Choosing a student, lecturer, course or section used to render every row of
+the table into a ``<select>``. :class:`AutocompleteSelect` renders only the
+selected option and fetches matches from a JSON endpoint as the admin types
+(``users/static/js/autocomplete.js``). Lookups are prefix searches on
+indexed columns, capped at ``AUTOCOMPLETE_LIMIT`` results and cached for
+``AUTOCOMPLETE_CACHE_TIMEOUT`` seconds.
+"""
+import hashlib
+from django import forms
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from .directory import search_users
+from .models import User
+
+RESULTS_KEY = "autocomplete:{}:{}:{}"
+
+
+def get_limit():
+    return getattr(settings, "AUTOCOMPLETE_LIMIT", 20)
+
+
+def cached_results(kind, query, build):
+    """``build(query)`` cached per kind and normalized query for a short time."""
+    query = " ".join(query.split())[:100]
+    cache = caches[getattr(settings, "AUTOCOMPLETE_CACHE_ALIAS", "default")]
+    key = RESULTS_KEY.format(kind, get_limit(), hashlib.md5(query.lower().encode()).hexdigest())
+    results = cache.get(key)
+    if results is None:
+        results = build(query)
+        cache.set(key, results, timeout=getattr(settings, "AUTOCOMPLETE_CACHE_TIMEOUT", 30))
+    return results
+
+
+def user_label(user):
+    return f"{user.matric_id} - {user.first_name} {user.last_name}"
+
+
+def user_results(role, query):
+    """Up to ``AUTOCOMPLETE_LIMIT`` users of ``role`` whose matric ID, name or email starts with ``query``."""
+    users = search_users(User.objects.filter(role=role), query).order_by("matric_id").only(
+        "id", "matric_id", "first_name", "last_name"
+    )[:get_limit()]
+    return [{"id": user.id, "text": user_label(user)} for user in users]
+
+
+class AutocompleteSelect(forms.Select):
+    """Select that renders only its selected option; the rest are fetched from ``url`` while typing."""
+
+    class Media:
+        js = ("js/autocomplete.js",)
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = str(self.url)
+        return context
+
+    def _valid_keys(self, values):
+        """Posted values converted to the key type; invalid ones (e.g. "abc" for an ID) are dropped."""
+        queryset = self.choices.queryset
+        to_field_name = self.choices.field.to_field_name
+        key_field = queryset.model._meta.get_field(to_field_name) if to_field_name else queryset.model._meta.pk
+        keys = []
+        for value in values:
+            try:
+                key = key_field.to_python(value)
+                key_field.run_validators(key)  # ✅ Includes the database's integer range
+            except ValidationError:
+                continue
+            keys.append(key)
+        return keys
+
+    def optgroups(self, name, value, attrs=None):
+        """The empty choice plus the selected rows only (one ``pk__in`` query instead of the whole table)."""
+        selected = [str(v) for v in value if v not in ("", None)]
+        options = [("", "---------")]
+        keys = self._valid_keys(selected)
+        if keys:
+            field = self.choices.field
+            lookup = f"{field.to_field_name or 'pk'}__in"
+            options += [
+                (field.prepare_value(obj), field.label_from_instance(obj))
+                for obj in self.choices.queryset.filter(**{lookup: keys})
+            ]
+        return [
+            (None, [self.create_option(name, option_value, label, str(option_value) in selected, index, attrs=attrs)], index)
+            for index, (option_value, label) in enumerate(options)
+        ]
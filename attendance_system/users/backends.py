@@ -0,0 +1,47 @@
+"""Authentication backend that serves ``request.user`` from the cache.
+
+``AuthenticationMiddleware`` loads the user on every request through
+``backend.get_user``. :class:`CachedModelBackend` keeps a slimmed copy of
+the user (the fields views, role checks and session verification read) in
+``USER_CACHE_ALIAS`` for ``USER_CACHE_TIMEOUT`` seconds, so a logged-in
+request no longer needs a ``users_user`` query. The copy is dropped when the
+user is saved or deleted (see users/signals.py); other fields are loaded on
+first access like any deferred field.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+from .models import User
+
+USER_KEY = "auth:user:{}"
+
+# personal_email is left out: it is only read when sending mail
+CACHED_FIELDS = (
+    "id", "password", "last_login", "is_superuser", "matric_id", "email",
+    "first_name", "last_name", "role", "first_login", "is_active", "is_staff", "calendar_feed_secret",
+)
+
+
+def get_user_cache():
+    return caches[getattr(settings, "USER_CACHE_ALIAS", "default")]
+
+
+def invalidate_user(user_id):
+    """Forget the cached copy of a user once the current transaction commits."""
+    transaction.on_commit(lambda: get_user_cache().delete(USER_KEY.format(user_id)))
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose ``get_user`` reads through the cache."""
+
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        key = USER_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = User._default_manager.only(*CACHED_FIELDS).filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, user, timeout=getattr(settings, "USER_CACHE_TIMEOUT", 300))
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,33 @@
+"""System checks for cache-backed features that need a cache shared by every worker."""
+from django.conf import settings
+from django.core import checks
+
+PROCESS_LOCAL_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+def is_process_local(alias):
+    """Whether cache ``alias`` lives in each worker's own memory."""
+    return settings.CACHES.get(alias, {}).get("BACKEND") in PROCESS_LOCAL_CACHES
+
+
+@checks.register(checks.Tags.caches)
+def check_auth_caches(app_configs, **kwargs):
+    warnings = []
+    if settings.SESSION_ENGINE in (
+        "django.contrib.sessions.backends.cache", "django.contrib.sessions.backends.cached_db"
+    ) and is_process_local(settings.SESSION_CACHE_ALIAS):
+        warnings.append(checks.Warning(
+            "Sessions are cached in a per-process cache; a logout only reaches the worker that handled it.",
+            hint="Use a shared cache (Redis/Memcached) for SESSION_CACHE_ALIAS or the 'db' session engine.",
+            id="users.W001",
+        ))
+    if "users.backends.CachedModelBackend" in settings.AUTHENTICATION_BACKENDS and is_process_local(
+        getattr(settings, "USER_CACHE_ALIAS", "default")
+    ):
+        warnings.append(checks.Warning(
+            "CachedModelBackend uses a per-process cache; deactivations and password changes "
+            "only reach the worker that handled them.",
+            hint="Use a shared cache (Redis/Memcached) for USER_CACHE_ALIAS or ModelBackend.",
+            id="users.W002",
+        ))
+    return warnings
@@ -0,0 +1,77 @@
+"""Paginated user directory for manage_users.
+
+Pages use keyset pagination on ``matric_id`` (``?after=`` / ``?before=``)
+instead of OFFSET and a total COUNT, so every page costs one indexed range
+scan of ``page_size + 1`` rows no matter how many accounts exist or how
+deep the page is. Search is a prefix match on matric ID, first/last name
+and university email, served by the ``(role, matric_id)`` index and the
+case-insensitive expression indexes of migration
+``0006_user_directory_indexes``.
+"""
+from django.db.models import Q
+from .models import User
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+DIRECTORY_FIELDS = ("id", "matric_id", "first_name", "last_name", "email", "role")
+
+
+def visible_roles(viewer):
+    """Roles ``viewer`` may list (Admins do not see other Admins)."""
+    return ("Admin", "Lecturer", "Student") if viewer.role == "Superadmin" else ("Lecturer", "Student")
+
+
+def get_page_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def search_users(users, query):
+    """Prefix search: one word matches any field, two words match first and last name."""
+    words = query.split()
+    if not words:
+        return users
+    if len(words) == 1:
+        word = words[0]
+        return users.filter(
+            Q(matric_id__startswith=word.upper()) | Q(first_name__istartswith=word)
+            | Q(last_name__istartswith=word) | Q(email__istartswith=word)
+        )
+    first, last = words[0], " ".join(words[1:])
+    return users.filter(
+        Q(first_name__istartswith=first, last_name__istartswith=last)
+        | Q(first_name__istartswith=last, last_name__istartswith=first)
+    )
+
+
+def get_page(viewer, role="", query="", after="", before="", page_size=DEFAULT_PAGE_SIZE):
+    """One directory page as plain data, ordered by matric ID."""
+    roles = visible_roles(viewer)
+    users = User.objects.filter(role=role) if role in roles else User.objects.filter(role__in=roles)
+    users = search_users(users, query.strip()).values(*DIRECTORY_FIELDS)
+
+    if before:
+        # ✅ Walk backwards from the cursor, then restore ascending order
+        rows = list(users.filter(matric_id__lt=before).order_by("-matric_id")[:page_size + 1])
+        has_previous, has_next = len(rows) > page_size, True
+        rows = rows[:page_size][::-1]
+    else:
+        if after:
+            users = users.filter(matric_id__gt=after)
+        rows = list(users.order_by("matric_id")[:page_size + 1])
+        has_previous, has_next = bool(after), len(rows) > page_size
+        rows = rows[:page_size]
+
+    return {
+        "role": role if role in roles else "",
+        "roles": roles,
+        "query": query.strip(),
+        "page_size": page_size,
+        "results": rows,
+        "next": rows[-1]["matric_id"] if rows and has_next else None,
+        "previous": rows[0]["matric_id"] if rows and has_previous else None,
+    }
@@ -1,6 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import PasswordResetForm
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
 from .models import User
+from .outbox import enqueue
 
 class UserCreationForm(forms.ModelForm):
     personal_email = forms.EmailField()
@@ -36,15 +39,26 @@ class UserCreationForm(forms.ModelForm):
             return user, temp_password
 
 class CustomPasswordResetForm(PasswordResetForm):
-    """Custom password reset form that ensures emails are sent to personal_email."""
+    """Custom password reset form that sends to personal_email through the email outbox."""
 
     def get_users(self, email):
         """Override to filter by personal_email instead of email."""
-        active_users = User.objects.filter(personal_email=email, is_active=True)
-        
-        # ✅ Ensure the correct email is used when sending the reset email
-        for user in active_users:
-            user.email = user.personal_email  # Force Django to use personal_email
-            user.save()
-        
-        return active_users
\ No newline at end of file
+        # ✅ The users are left untouched: reset tokens hash the stored (university) email
+        return User.objects.filter(personal_email=email, is_active=True).iterator()
+
+    def send_mail(self, subject_template_name, email_template_name, context, from_email, to_email, html_email_template_name=None):
+        """Store the reset email, addressed to the personal email, in the outbox instead of connecting to the relay."""
+        subject = ''.join(loader.render_to_string(subject_template_name, context).splitlines())
+        message = EmailMultiAlternatives(
+            subject, loader.render_to_string(email_template_name, context), from_email, [context['user'].personal_email]
+        )
+        if html_email_template_name is not None:
+            message.attach_alternative(loader.render_to_string(html_email_template_name, context), 'text/html')
+        enqueue([message])
+
+
+class BulkUserUploadForm(forms.Form):
+    """CSV upload for bulk account provisioning."""
+    csv_file = forms.FileField(label="CSV file", widget=forms.ClearableFileInput(attrs={'accept': '.csv'}))
+    role = forms.ChoiceField(choices=[('Student', 'Student'), ('Lecturer', 'Lecturer')], initial='Student', label="Role for rows without one")
+    dry_run = forms.BooleanField(required=False, label="Only validate (don't create accounts)")
@@ -0,0 +1,30 @@
+"""Account emails.
+
+Messages are stored in the outbox (see users/outbox.py) in the same
+transaction as the account they belong to and sent by the ``send_outbox``
+worker, so neither the request nor a bulk import waits on the mail relay.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage
+from .outbox import enqueue
+
+
+def credentials_message(user, temp_password):
+    """Email with the login details of a new account, addressed to the personal email."""
+    body = (
+        f"Dear {user.first_name} {user.last_name},\n\n"
+        f"Your university account has been created.\n"
+        f"Matric ID: {user.matric_id}\n"
+        f"Login Email: {user.email}\n"
+        f"Temporary Password: {temp_password}\n\n"
+        f"Please log in and change your password immediately.\n\n"
+        f"Best Regards,\nUniversity Administration"
+    )
+    return EmailMessage(
+        "Your University System Account Credentials", body, settings.EMAIL_HOST_USER, [user.personal_email]
+    )
+
+
+def queue_credentials(credentials):
+    """Put credential emails for ``(user, temp_password)`` pairs in the outbox. Returns how many."""
+    return len(enqueue(credentials_message(user, temp_password) for user, temp_password in credentials))
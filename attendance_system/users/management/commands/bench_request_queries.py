@@ -0,0 +1,96 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from attendance.benchmarking import create_bench_section, cleanup_bench_data
+from users.models import User
+
+LABEL = "Q"
+
+BASELINE = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+}
+
+CACHED = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'AUTHENTICATION_BACKENDS': ['users.backends.CachedModelBackend'],
+}
+
+
+def bench_pages(section):
+    """(role, page label, URL) for the main views of each role."""
+    return [
+        ('Student', 'dashboard', reverse('dashboard')),
+        ('Student', 'student_schedule', reverse('student_schedule')),
+        ('Student', 'my_courses', reverse('my_courses')),
+        ('Student', 'select_course', reverse('select_course')),
+        ('Student', 'review_cart', reverse('review_cart')),
+        ('Lecturer', 'dashboard', reverse('dashboard')),
+        ('Lecturer', 'lecturer_attendance_dashboard', reverse('lecturer_attendance_dashboard')),
+        ('Admin', 'dashboard', reverse('dashboard')),
+        ('Admin', 'manage_users', reverse('manage_users')),
+        ('Admin', 'manage_courses', reverse('manage_courses')),
+        ('Admin', 'manage_sections', reverse('manage_sections')),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compare queries per request with database sessions/users against cached_db sessions and CachedModelBackend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Measured requests per page (after one warm-up request)')
+
+    def handle(self, *args, **kwargs):
+        cleanup_bench_data(LABEL)
+        try:
+            section, (student,) = create_bench_section(1, LABEL)
+            users = {'Student': student}
+            for role in ('Lecturer', 'Admin'):
+                users[role] = User.objects.create(
+                    matric_id=f"B{LABEL}{role[0]}000001", email=f"bench{LABEL}.{role.lower()}@university.com",
+                    personal_email=f"bench{LABEL}.{role.lower()}@example.com", role=role, first_login=False,
+                )
+            section.lecturer = users['Lecturer']
+            section.save()
+
+            pages = bench_pages(section)
+            before = self.measure(pages, users, BASELINE, kwargs['repeat'])
+            after = self.measure(pages, users, CACHED, kwargs['repeat'])
+        finally:
+            cleanup_bench_data(LABEL)
+
+        self.stdout.write(f"{'Role':<9} {'Page':<31} {'Queries before':>14} {'after':>6} {'ms before':>10} {'after':>7}")
+        for key in before:
+            (queries_before, ms_before), (queries_after, ms_after) = before[key], after[key]
+            self.stdout.write(f"{key[0]:<9} {key[1]:<31} {queries_before:>14.1f} {queries_after:>6.1f} {ms_before:>10.1f} {ms_after:>7.1f}")
+        total_before = sum(queries for queries, _ in before.values())
+        total_after = sum(queries for queries, _ in after.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_before:.0f} -> {total_after:.0f} queries for one request to each page "
+            f"({total_before - total_after:.0f} fewer)"
+        ))
+
+    def measure(self, pages, users, overrides, repeat):
+        """Average queries and milliseconds per request for each page under ``overrides``."""
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], **overrides):
+            clients = {}
+            for role, user in users.items():
+                clients[role] = Client()
+                clients[role].force_login(user)
+            for role, label, url in pages:
+                client = clients[role]
+                client.get(url)  # Warm-up: fills the session, user and page caches
+                queries, started = 0, time.perf_counter()
+                for _ in range(repeat):
+                    with CaptureQueriesContext(connection) as captured:
+                        response = client.get(url)
+                    if response.status_code >= 400:
+                        self.stderr.write(f"{role} {label}: HTTP {response.status_code}")
+                    queries += len(captured)
+                results[(role, label)] = (queries / repeat, (time.perf_counter() - started) * 1000 / repeat)
+        return results
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from users.outbox import send_batch, get_outbox_setting
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox in batches over one SMTP connection (runs until stopped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send everything that is due, then exit')
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages per connection (EMAIL_OUTBOX BATCH_SIZE)')
+        parser.add_argument('--rate', type=float, default=None, help='Messages per second, 0 for unlimited (EMAIL_OUTBOX RATE_LIMIT)')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds to sleep when nothing is due (EMAIL_OUTBOX POLL_INTERVAL)')
+
+    def handle(self, *args, **kwargs):
+        interval = kwargs['interval'] if kwargs['interval'] is not None else get_outbox_setting('POLL_INTERVAL')
+        totals = [0, 0, 0]
+        try:
+            while True:
+                close_old_connections()
+                stats = send_batch(kwargs['batch_size'], kwargs['rate'])
+                totals = [total + count for total, count in zip(totals, stats)]
+                if stats.sent or stats.retrying or stats.failed:
+                    self.stdout.write(f"Sent {stats.sent}, retrying {stats.retrying}, failed {stats.failed}")
+                    continue
+                if kwargs['once']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Sent {totals[0]} emails ({totals[1]} to retry, {totals[2]} failed)"))
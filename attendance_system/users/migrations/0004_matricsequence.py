@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_user_first_name_alter_user_last_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatricSequence',
+            fields=[
+                ('prefix', models.CharField(max_length=2, primary_key=True, serialize=False)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
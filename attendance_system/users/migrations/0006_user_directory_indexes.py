@@ -0,0 +1,45 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+# Case-insensitive prefix indexes for users.directory.search_users. On Postgres
+# they match Django's istartswith SQL, UPPER("col"::text) LIKE UPPER(...); the
+# matric_id prefix search uses the varchar_pattern_ops index Django already
+# creates for the unique field.
+SEARCH_COLUMNS = ['first_name', 'last_name', 'email']
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for column in SEARCH_COLUMNS:
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f"CREATE INDEX users_user_{column}_upper_idx ON users_user (UPPER({column}::text) text_pattern_ops)"
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute(f"CREATE INDEX users_user_{column}_nocase_idx ON users_user ({column} COLLATE NOCASE)")
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for column in SEARCH_COLUMNS:
+        if vendor == 'postgresql':
+            schema_editor.execute(f"DROP INDEX IF EXISTS users_user_{column}_upper_idx")
+        elif vendor == 'sqlite':
+            schema_editor.execute(f"DROP INDEX IF EXISTS users_user_{column}_nocase_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0005_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'matric_id'], name='user_role_matric_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='calendar_feed_secret',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 11:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_calendar_feed_secret'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='schedule_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
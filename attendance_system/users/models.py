@@ -1,7 +1,49 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
-import random
-import string
+from django.db import models, transaction, IntegrityError
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+MATRIC_PREFIXES = {'Admin': 'A', 'Lecturer': 'L', 'Student': 'S'}
+
+
+def temporary_password():
+    """Random first-login password (the user must change it on first login)."""
+    return get_random_string(10)
+
+
+class MatricSequence(models.Model):
+    """Last matric number handed out per prefix, so generated IDs never collide."""
+    prefix = models.CharField(max_length=2, primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}{self.last_value}"
+
+    @classmethod
+    def allocate(cls, role, count=1):
+        """Reserve ``count`` consecutive matric IDs for ``role`` (e.g. ``S0000042``)."""
+        prefix = MATRIC_PREFIXES.get(role, 'U')
+        with transaction.atomic():
+            sequence = cls.objects.select_for_update().filter(prefix=prefix).first()
+            if sequence is None:
+                # ✅ First use of the prefix: continue above the IDs generated randomly before
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(prefix=prefix, last_value=cls._highest_existing(prefix))
+                except IntegrityError:
+                    pass  # Created concurrently
+                sequence = cls.objects.select_for_update().get(prefix=prefix)
+            first = sequence.last_value + 1
+            sequence.last_value += count
+            sequence.save(update_fields=['last_value'])
+        return [f"{prefix}{number:07d}" for number in range(first, first + count)]
+
+    @staticmethod
+    def _highest_existing(prefix):
+        matric_ids = User.objects.filter(matric_id__startswith=prefix).values_list('matric_id', flat=True)
+        suffixes = (matric_id[len(prefix):] for matric_id in matric_ids)
+        # isdigit() would also accept characters such as '²' that int() rejects
+        return max((int(suffix) for suffix in suffixes if suffix.isascii() and suffix.isdecimal()), default=0)
 
 class UserManager(BaseUserManager):
     def create_user(self, first_name, last_name, personal_email, role, **extra_fields):
@@ -9,10 +51,8 @@ class UserManager(BaseUserManager):
         if not personal_email:
             raise ValueError('A personal email is required.')
 
-        # Generate Matric ID
-        prefix = {'Admin': 'A', 'Lecturer': 'L', 'Student': 'S'}.get(role, 'U')
-        random_id = ''.join(random.choices(string.digits, k=7))  # FIXED: Generating ID correctly
-        matric_id = f"{prefix}{random_id}"
+        # Generate Matric ID from the per-prefix sequence
+        matric_id = MatricSequence.allocate(role)[0]
 
         # Generate university email
         university_email = f"{matric_id}@university.com"
@@ -27,7 +67,7 @@ class UserManager(BaseUserManager):
             first_login=True,  # User must change password on first login
             **extra_fields
         )
-        temp_password = ''.join(random.choices(string.ascii_letters + string.digits, k=10))  # FIXED: Generate password
+        temp_password = temporary_password()
         user.set_password(temp_password)
         user.save(using=self._db)
         return user, temp_password
@@ -51,6 +91,8 @@ class User(AbstractBaseUser, PermissionsMixin):
         ('Student', 'Student')
     ])
     first_login = models.BooleanField(default=True)
+    calendar_feed_secret = models.CharField(max_length=32, blank=True, default="")  # ✅ Rotated to revoke calendar feed URLs
+    schedule_changed_at = models.DateTimeField(default=timezone.now)  # ✅ Moved by courses/student_schedule.py:touch_schedules
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -60,5 +102,31 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    class Meta:
+        indexes = [models.Index(fields=['role', 'matric_id'], name='user_role_matric_idx')]  # Directory pages
+
     def __str__(self):
         return self.matric_id
+
+
+class OutboxEmail(models.Model):
+    """Email waiting to be sent by the ``send_outbox`` worker (see users/outbox.py)."""
+    STATUSES = [('Pending', 'Pending'), ('Sent', 'Sent'), ('Failed', 'Failed')]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default="")
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUSES, default='Pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx')]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)} ({self.status})"
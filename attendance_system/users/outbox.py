@@ -0,0 +1,136 @@
+"""Transactional email outbox.
+
+Views never talk to the SMTP relay. They store messages with
+:func:`enqueue` in the same transaction as the data the email is about, so
+a rolled-back request sends nothing and a committed one cannot lose its
+email. The ``send_outbox`` worker command claims due messages in batches
+with a short lease (no row locks are held while talking to SMTP), sends
+them over one reused connection, rate-limited, and retries failures with
+exponential backoff until ``MAX_ATTEMPTS``.
+"""
+import time
+from datetime import timedelta
+from collections import namedtuple
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEmail
+
+DEFAULTS = {
+    "BATCH_SIZE": 100,        # Messages per connection/transaction
+    "RATE_LIMIT": 10,         # Messages per second (0 = unlimited)
+    "MAX_ATTEMPTS": 5,        # Then the message is marked Failed
+    "RETRY_BACKOFF": 60,      # Seconds before the first retry, doubled each attempt
+    "MAX_BACKOFF": 3600,
+    "POLL_INTERVAL": 5,       # Seconds the worker sleeps when nothing is due
+    "LEASE": 300,             # Seconds a claimed batch is hidden from other workers, on top of its rate-limited send time
+}
+
+DeliveryStats = namedtuple("DeliveryStats", ["sent", "retrying", "failed"])
+
+
+def get_outbox_setting(name):
+    """Read a value from ``settings.EMAIL_OUTBOX`` falling back to the defaults."""
+    return getattr(settings, "EMAIL_OUTBOX", {}).get(name, DEFAULTS[name])
+
+
+def enqueue(messages):
+    """Store ``EmailMessage`` objects for the worker; call inside the transaction that causes them."""
+    return OutboxEmail.objects.bulk_create([
+        OutboxEmail(
+            subject=message.subject,
+            body=message.body,
+            html_body=next(
+                (content for content, mimetype in getattr(message, "alternatives", []) if mimetype == "text/html"), ""
+            ),
+            from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+            to=list(message.to),
+        )
+        for message in messages
+    ], batch_size=500)
+
+
+def retry_delay(attempts):
+    return min(get_outbox_setting("RETRY_BACKOFF") * 2 ** (attempts - 1), get_outbox_setting("MAX_BACKOFF"))
+
+
+def _as_message(email, connection):
+    message = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to, connection=connection)
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def _record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"[:1000]
+    if email.attempts >= get_outbox_setting("MAX_ATTEMPTS"):
+        email.status = "Failed"
+    else:
+        email.next_attempt_at = now + timedelta(seconds=retry_delay(email.attempts))
+
+
+def claim_batch(batch_size, lease):
+    """Lease up to ``batch_size`` due messages to this worker; the row locks last only this short transaction."""
+    now = timezone.now()
+    with transaction.atomic():
+        # ✅ Concurrent workers skip each other's rows instead of sending them twice
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="Pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        # ✅ Pushing next_attempt_at past the lease hides the rows from other workers once we commit;
+        # if this worker dies, they come due again when the lease runs out
+        OutboxEmail.objects.filter(id__in=[email.id for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=lease)
+        )
+    return emails
+
+
+def _record(email):
+    email.save(update_fields=["status", "attempts", "next_attempt_at", "last_error", "sent_at", "body", "html_body"])
+
+
+def send_batch(batch_size=None, rate_limit=None, connection=None):
+    """Send up to ``batch_size`` due messages over one connection. Returns :class:`DeliveryStats`."""
+    batch_size = batch_size or get_outbox_setting("BATCH_SIZE")
+    rate_limit = get_outbox_setting("RATE_LIMIT") if rate_limit is None else rate_limit
+    interval = 1.0 / rate_limit if rate_limit else 0
+
+    # The lease outlasts the rate-limited batch, so no other worker picks a row up while we still send it
+    emails = claim_batch(batch_size, get_outbox_setting("LEASE") + batch_size * interval)
+    if not emails:
+        return DeliveryStats(0, 0, 0)
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Relay unreachable: the whole batch waits for its next attempt
+        now = timezone.now()
+        for email in emails:
+            _record_failure(email, e, now)
+            _record(email)
+    else:
+        try:
+            for email in emails:
+                started = time.monotonic()
+                try:
+                    connection.send_messages([_as_message(email, connection)])
+                except Exception as e:
+                    _record_failure(email, e, timezone.now())
+                else:
+                    email.status, email.sent_at, email.last_error = "Sent", timezone.now(), ""
+                    email.body = email.html_body = ""  # Credentials and reset links are not kept after sending
+                # ✅ Recorded one by one (autocommit), so a crash mid-batch never re-sends what already went out
+                _record(email)
+                wait = interval - (time.monotonic() - started)
+                if wait > 0:
+                    time.sleep(wait)
+        finally:
+            connection.close()
+
+    statuses = [email.status for email in emails]
+    return DeliveryStats(statuses.count("Sent"), statuses.count("Pending"), statuses.count("Failed"))
@@ -0,0 +1,130 @@
+"""Bulk account provisioning from CSV.
+
+One row per user::
+
+    first_name,last_name,personal_email,role
+
+``role`` may be left out to use the default role of the import. The whole
+file is validated before anything is written (duplicate personal emails are
+checked against the file and the database with one query). Matric IDs are
+reserved as one block from :class:`~users.models.MatricSequence`, temporary
+passwords are hashed across a process pool (PBKDF2 is CPU-bound, so threads
+would not help), users are inserted with ``bulk_create`` in batches and
+their credentials are put in the email outbox in the same transaction.
+"""
+import csv
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from .mail import queue_credentials
+from .models import User, MatricSequence, temporary_password
+
+REQUIRED_COLUMNS = {"first_name", "last_name", "personal_email"}
+ROLES = ("Student", "Lecturer", "Admin")
+HASH_CHUNK_SIZE = 50
+
+ProvisionResult = namedtuple("ProvisionResult", ["created", "errors", "seconds", "hash_seconds", "emails_queued"])
+
+
+def read_rows(csv_file):
+    """Parse a text-mode CSV file into ``(line number, row dict)`` pairs."""
+    reader = csv.DictReader(csv_file)
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}.")
+    return [
+        (line, {key.strip(): (value or "").strip() for key, value in row.items() if key})
+        for line, row in enumerate(reader, start=2)
+    ]
+
+
+def validate(rows, default_role="Student", allowed_roles=ROLES):
+    """Check every row; returns ``(people, errors)`` where people are ``(first, last, email, role)``."""
+    errors, people, seen = [], [], {}
+    taken = set(User.objects.filter(
+        personal_email__in={row.get("personal_email", "") for _, row in rows}
+    ).values_list("personal_email", flat=True))
+
+    for line, row in rows:
+        first_name, last_name = row.get("first_name", ""), row.get("last_name", "")
+        email, role = row.get("personal_email", ""), (row.get("role") or default_role).capitalize()
+        row_errors = []
+        if not first_name or not last_name:
+            row_errors.append("first_name and last_name are required.")
+        elif len(first_name) > 50 or len(last_name) > 50:
+            row_errors.append("Names must be at most 50 characters.")
+        try:
+            validate_email(email)
+        except ValidationError:
+            row_errors.append(f"\"{email}\" is not a valid email address.")
+        else:
+            if email in taken:
+                row_errors.append(f"{email} is already in use.")
+            elif email.lower() in seen:
+                row_errors.append(f"{email} is repeated (first on line {seen[email.lower()]}).")
+            seen.setdefault(email.lower(), line)
+        if role not in allowed_roles:
+            row_errors.append(f"role must be one of {', '.join(allowed_roles)}, not \"{role}\".")
+        if row_errors:
+            errors.extend((line, message) for message in row_errors)
+        else:
+            people.append((first_name, last_name, email, role))
+    return people, errors
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """``make_password`` for every password, spread over ``workers`` processes (1 hashes in-process)."""
+    workers = workers or os.cpu_count() or 1
+    size = max(1, min(HASH_CHUNK_SIZE, -(-len(passwords) // (workers * 4))))  # Several chunks per worker
+    chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    if workers == 1 or len(chunks) <= 1:
+        return [hashed for chunk in chunks for hashed in _hash_chunk(chunk)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        return [hashed for chunk in pool.map(_hash_chunk, chunks) for hashed in chunk]
+
+
+def provision_users(people, workers=None, batch_size=1000, send_email=True):
+    """Create users for validated ``(first, last, email, role)`` tuples and queue their credentials."""
+    started = time.perf_counter()
+    passwords = [temporary_password() for _ in people]
+    hash_started = time.perf_counter()
+    hashes = hash_passwords(passwords, workers)
+    hash_seconds = time.perf_counter() - hash_started
+
+    with transaction.atomic():
+        matric_ids = {}
+        for role in {person[3] for person in people}:
+            matric_ids[role] = iter(MatricSequence.allocate(role, sum(1 for person in people if person[3] == role)))
+        users = []
+        for (first_name, last_name, email, role), password_hash in zip(people, hashes):
+            matric_id = next(matric_ids[role])
+            users.append(User(
+                matric_id=matric_id, email=f"{matric_id}@university.com", personal_email=email,
+                first_name=first_name, last_name=last_name, role=role, first_login=True, password=password_hash,
+            ))
+        User.objects.bulk_create(users, batch_size=batch_size)
+        emails_queued = queue_credentials(zip(users, passwords)) if send_email else 0
+
+    return ProvisionResult(len(users), [], time.perf_counter() - started, hash_seconds, emails_queued)
+
+
+def import_users(csv_file, default_role="Student", allowed_roles=ROLES, dry_run=False, **options):
+    """Validate and import a CSV file. Nothing is written if any row has an error."""
+    try:
+        rows = read_rows(csv_file)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return ProvisionResult(0, [(1, str(e))], 0, 0, 0)
+
+    people, errors = validate(rows, default_role, allowed_roles)
+    if errors or dry_run:
+        return ProvisionResult(len(people) if not errors else 0, errors, 0, 0, 0)
+    return provision_users(people, **options)
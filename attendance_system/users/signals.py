@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .backends import invalidate_user
+from .models import User
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """request.user is served from the cache (see users/backends.py)"""
+    invalidate_user(instance.pk)
@@ -0,0 +1,35 @@
+/* Lazy options for <select data-autocomplete-url> (see users/autocomplete.py). */
+document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("select[data-autocomplete-url]").forEach(function (select) {
+        var search = document.createElement("input");
+        search.type = "search";
+        search.className = "form-control mb-1";
+        search.placeholder = "Type to search...";
+        select.parentNode.insertBefore(search, select);
+
+        var timer = null, latest = 0;
+        function load() {
+            var url = new URL(select.dataset.autocompleteUrl, window.location.href);
+            url.searchParams.set("q", search.value.trim());
+            var request = ++latest;
+            fetch(url, { headers: { "X-Requested-With": "XMLHttpRequest" }, credentials: "same-origin" })
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    if (request !== latest) return;  // A newer search is already on its way
+                    // ✅ Keep the empty choice and the current selection, replace the rest
+                    Array.from(select.options).forEach(function (option) {
+                        if (option.value && !option.selected) option.remove();
+                    });
+                    data.results.forEach(function (item) {
+                        if (String(item.id) !== select.value) select.add(new Option(item.text, item.id));
+                    });
+                });
+        }
+
+        search.addEventListener("input", function () {
+            clearTimeout(timer);
+            timer = setTimeout(load, 250);
+        });
+        select.addEventListener("focus", load, { once: true });
+    });
+});
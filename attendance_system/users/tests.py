@@ -1,3 +1,193 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core import checks
+from django.core.mail import EmailMessage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
+from .backends import CachedModelBackend
+from .directory import get_page
+from .models import MatricSequence, OutboxEmail
+from .outbox import claim_batch, enqueue, send_batch
 
-# Create your tests here.
+User = get_user_model()
+
+SHARED_CACHE = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_cache"}}
+CACHED_AUTH = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.cached_db",
+    "AUTHENTICATION_BACKENDS": ["users.backends.CachedModelBackend"],
+}
+
+
+def make_user(matric_id, role="Student", **fields):
+    user = User(matric_id=matric_id, email=f"{matric_id}@university.com", personal_email=f"{matric_id}@example.com",
+                role=role, first_login=False, **fields)
+    user.set_password("password")
+    user.save()
+    return user
+
+
+class AuthCacheCheckTests(TestCase):
+    def warning_ids(self):
+        return {message.id for message in checks.run_checks(tags=[checks.Tags.caches])}
+
+    def test_shipped_settings_do_not_cache_sessions_or_users(self):
+        self.assertFalse({"users.W001", "users.W002"} & self.warning_ids())
+
+    @override_settings(**CACHED_AUTH)
+    def test_cached_auth_on_locmem_is_flagged(self):
+        self.assertTrue({"users.W001", "users.W002"} <= self.warning_ids())
+
+    @override_settings(CACHES=SHARED_CACHE, **CACHED_AUTH)
+    def test_cached_auth_on_a_shared_cache_is_allowed(self):
+        self.assertFalse({"users.W001", "users.W002"} & self.warning_ids())
+
+
+class CachedModelBackendTests(TestCase):
+    def test_saved_changes_replace_the_cached_copy(self):
+        user = make_user("S0000001")
+        backend = CachedModelBackend()
+        self.assertEqual(backend.get_user(user.pk).role, "Student")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.is_active = False
+            user.save()
+        self.assertIsNone(backend.get_user(user.pk))
+
+
+class MatricSequenceTests(TestCase):
+    def test_allocation_continues_after_the_highest_numeric_id(self):
+        make_user("S0000041")
+        make_user("S²")
+        self.assertEqual(MatricSequence.allocate("Student", 2), ["S0000042", "S0000043"])
+
+
+class PasswordResetTests(TestCase):
+    def test_reset_link_is_sent_to_the_personal_email_and_works(self):
+        user = make_user("S0000001")
+        response = self.client.post(reverse("password_reset"), {"email": user.personal_email})
+        self.assertEqual(response.status_code, 302)
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, [user.personal_email])
+        uidb64, token = re.search(r"/reset-password-confirm/([^/]+)/([^/]+)/", email.body).groups()
+        self.assertEqual(force_str(urlsafe_base64_decode(uidb64)), str(user.pk))
+        self.assertTrue(default_token_generator.check_token(User.objects.get(pk=user.pk), token))
+        self.assertEqual(User.objects.get(pk=user.pk).email, user.email)
+
+
+class FakeConnection:
+    """SMTP stand-in that runs ``on_send`` for every message and fails the addresses in ``refuse``."""
+    def __init__(self, on_send=None, refuse=()):
+        self.on_send, self.refuse, self.sent = on_send, set(refuse), []
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if self.on_send:
+            self.on_send(messages[0])
+        if self.refuse & set(messages[0].to):
+            raise ConnectionError("refused")
+        self.sent.extend(messages)
+        return len(messages)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        enqueue([EmailMessage("Hello", "Body", to=[f"s{i}@example.com"]) for i in range(3)])
+
+    def test_claimed_rows_are_leased_before_sending(self):
+        seen = []
+
+        def other_worker(message):
+            # The claim is already committed: another worker finds nothing due while this one talks to SMTP
+            seen.append(claim_batch(10, 60))
+            self.assertGreater(OutboxEmail.objects.get(to=message.to).next_attempt_at, timezone.now())
+
+        stats = send_batch(rate_limit=0, connection=FakeConnection(other_worker))
+        self.assertEqual(stats, (3, 0, 0))
+        self.assertEqual(seen, [[], [], []])
+        self.assertEqual(OutboxEmail.objects.filter(status="Sent", body="").count(), 3)
+
+    def test_results_are_recorded_per_message(self):
+        def crash_on_third(message):
+            if message.to == ["s2@example.com"]:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            send_batch(rate_limit=0, connection=FakeConnection(crash_on_third))
+        # What went out stays sent; the interrupted message comes due again once its lease runs out
+        self.assertEqual(OutboxEmail.objects.filter(status="Sent").count(), 2)
+        pending = OutboxEmail.objects.get(status="Pending")
+        self.assertGreater(pending.next_attempt_at, timezone.now())
+        self.assertEqual(send_batch(rate_limit=0, connection=FakeConnection()), (0, 0, 0))
+
+        OutboxEmail.objects.filter(pk=pending.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(send_batch(rate_limit=0, connection=FakeConnection()), (1, 0, 0))
+
+    def test_failures_are_retried_with_backoff(self):
+        stats = send_batch(rate_limit=0, connection=FakeConnection(refuse=["s1@example.com"]))
+        self.assertEqual(stats, (2, 1, 0))
+        failed = OutboxEmail.objects.get(status="Pending")
+        self.assertEqual((failed.attempts, failed.last_error), (1, "ConnectionError: refused"))
+        self.assertGreater(failed.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+
+class DirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user("A0000001", role="Admin")
+        names = [("Ali", "Tan"), ("Siti", "Ali"), ("Wei", "Lim"), ("Tan", "Mei"), ("Anna", "Lee")]
+        for number, (first_name, last_name) in enumerate(names, start=1):
+            make_user(f"S{number:07d}", first_name=first_name, last_name=last_name)
+        make_user("L0000001", role="Lecturer", first_name="Alan", last_name="Wong")
+
+    def matric_ids(self, page):
+        return [row["matric_id"] for row in page["results"]]
+
+    def test_keyset_pages_walk_forwards_and_back(self):
+        pages, after = [], ""
+        while True:
+            page = get_page(self.admin, after=after, page_size=2)
+            pages.append(self.matric_ids(page))
+            if not page["next"]:
+                break
+            after = page["next"]
+        # Admins do not see other Admins
+        self.assertEqual(pages, [["L0000001", "S0000001"], ["S0000002", "S0000003"], ["S0000004", "S0000005"]])
+        self.assertIsNone(get_page(self.admin, page_size=2)["previous"])
+
+        page = get_page(self.admin, before=page["previous"], page_size=2)
+        self.assertEqual((self.matric_ids(page), page["previous"], page["next"]), (pages[1], "S0000002", "S0000003"))
+        page = get_page(self.admin, before=page["previous"], page_size=2)
+        self.assertEqual((self.matric_ids(page), page["previous"]), (pages[0], None))
+
+    def test_prefix_search(self):
+        for query, expected in (
+            ("ali", ["S0000001", "S0000002"]),          # First or last name
+            ("s000000", ["S0000001", "S0000002", "S0000003", "S0000004", "S0000005"]),
+            ("S0000004@uni", ["S0000004"]),             # University email
+            ("tan mei", ["S0000004"]),                  # First and last name
+            ("mei tan", ["S0000004"]),
+            ("  ", ["L0000001", "S0000001", "S0000002", "S0000003", "S0000004", "S0000005"]),
+            ("lee anna x", []),
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.matric_ids(get_page(self.admin, query=query)), expected)
+        page = get_page(self.admin, role="Lecturer", query="a")
+        self.assertEqual((self.matric_ids(page), page["role"]), (["L0000001"], "Lecturer"))
+
+    def test_json_view(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("user_directory"), {"q": "a", "page_size": "1", "after": "L0000001"})
+        self.assertEqual([row["matric_id"] for row in response.json()["results"]], ["S0000001"])
+        self.assertEqual((response.json()["previous"], response.json()["next"]), ("S0000001", "S0000001"))
+        self.client.force_login(User.objects.get(matric_id="S0000001"))
+        self.assertEqual(self.client.get(reverse("user_directory")).status_code, 403)
@@ -3,7 +3,7 @@ from django.urls import path
 from . import views
 from django.contrib.auth import views as auth_views
 from users.forms import CustomPasswordResetForm
-from .views import change_password_view, dashboard_view, manage_users_view, create_user_view, edit_user_view, delete_user_view
+from .views import change_password_view, dashboard_view, manage_users_view, user_directory_view, autocomplete_users_view, create_user_view, bulk_create_users_view, edit_user_view, delete_user_view
 
 urlpatterns = [
     path('login/', views.login_view, name='login'),
@@ -25,7 +25,11 @@ urlpatterns = [
     path('dashboard/', dashboard_view, name='dashboard'),
     
     path('manage-users/', manage_users_view, name='manage_users'),
+    path('directory/', user_directory_view, name='user_directory'),
+    path('autocomplete/students/', autocomplete_users_view, {'role': 'Student'}, name='autocomplete_students'),
+    path('autocomplete/lecturers/', autocomplete_users_view, {'role': 'Lecturer'}, name='autocomplete_lecturers'),
     path('create-user/', create_user_view, name='create_user'),
+    path('bulk-create-users/', bulk_create_users_view, name='bulk_create_users'),
     path('edit-user/<int:user_id>/', edit_user_view, name='edit_user'),
     path('delete-user/<int:user_id>/', delete_user_view, name='delete_user'),
 ]
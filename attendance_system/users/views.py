@@ -2,11 +2,16 @@ from django.contrib.auth import authenticate, login, logout, update_session_auth
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
 from .models import User
-from .forms import UserCreationForm
+from .forms import UserCreationForm, BulkUserUploadForm
+from .provisioning import import_users
+from .mail import queue_credentials
+from .directory import get_page as get_directory_page, get_page_size
+from .autocomplete import cached_results, user_results
+from django.http import JsonResponse
 from django.contrib.auth.forms import PasswordChangeForm
+import io
 
 def login_view(request):
     if request.method == 'POST':
@@ -53,23 +58,39 @@ def logout_view(request):
 def dashboard_view(request):
     return render(request, 'dashboard.html')
 
+def _directory_page(request):
+    return get_directory_page(
+        request.user,
+        role=request.GET.get('role', ''),
+        query=request.GET.get('q', ''),
+        after=request.GET.get('after', ''),
+        before=request.GET.get('before', ''),
+        page_size=get_page_size(request.GET.get('page_size')),
+    )
+
 @login_required(login_url='/users/login/')
 def manage_users_view(request):
     if request.user.role not in ['Superadmin', 'Admin']:
         return render(request, 'access_denied.html')  # Restrict access for non-superadmin/admin users
 
-    # Retrieve users categorized by role
-    students = User.objects.filter(role="Student")
-    lecturers = User.objects.filter(role="Lecturer")
-    admins = User.objects.filter(role="Admin") if request.user.role == "Superadmin" else None  # Hide Admins from Admin users
+    # ✅ One page of one query; Admins are only listed for the Superadmin
+    return render(request, 'users/manage_users.html', {'directory': _directory_page(request)})
 
-    context = {
-        'students': students,
-        'lecturers': lecturers,
-        'admins': admins,
-    }
+@login_required(login_url='/users/login/')
+def user_directory_view(request):
+    """JSON version of the manage_users table."""
+    if request.user.role not in ['Superadmin', 'Admin']:
+        return JsonResponse({'error': 'Access denied'}, status=403)
 
-    return render(request, 'users/manage_users.html', context)
+    directory = _directory_page(request)
+    return JsonResponse(dict(directory, roles=list(directory['roles'])))
+
+@login_required(login_url='/users/login/')
+def autocomplete_users_view(request, role):
+    """Students or lecturers matching ?q= for the autocomplete widgets."""
+    if request.user.role not in ['Superadmin', 'Admin']:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+    return JsonResponse({'results': cached_results(role, request.GET.get('q', ''), lambda query: user_results(role, query))})
 
 @login_required(login_url='/users/login/')
 def create_user_view(request):
@@ -79,23 +100,12 @@ def create_user_view(request):
     if request.method == 'POST':
         form = UserCreationForm(request.POST)
         if form.is_valid():
-            user, temp_password = form.save()
-
-            # Send credentials to the user's PERSONAL email
-            subject = "Your University System Account Credentials"
-            message = (
-                f"Dear {user.first_name} {user.last_name},\n\n"
-                f"Your university account has been created.\n"
-                f"Matric ID: {user.matric_id}\n"
-                f"Login Email: {user.email}\n"
-                f"Temporary Password: {temp_password}\n\n"
-                f"Please log in and change your password immediately.\n\n"
-                f"Best Regards,\nUniversity Administration"
-            )
+            # ✅ The credentials email is stored with the account and sent by the send_outbox worker
+            with transaction.atomic():
+                user, temp_password = form.save()
+                queue_credentials([(user, temp_password)])
 
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [user.personal_email])
-
-            messages.success(request, "User created successfully! Credentials have been sent to the personal email.")
+            messages.success(request, "User created successfully! Credentials will be sent to the personal email shortly.")
             return redirect('manage_users')
         else:
             messages.error(request, "Failed to create user. Please fix the errors below.")
@@ -105,6 +115,38 @@ def create_user_view(request):
 
     return render(request, 'users/create_user.html', {'form': form})
 
+@login_required(login_url='/users/login/')
+def bulk_create_users_view(request):
+    """Allows Admins to create many accounts from one CSV upload; credentials are emailed in the background."""
+    if request.user.role not in ['Superadmin', 'Admin']:
+        return render(request, 'access_denied.html')
+
+    # ✅ Admins cannot create other Admins
+    allowed_roles = ('Student', 'Lecturer', 'Admin') if request.user.role == 'Superadmin' else ('Student', 'Lecturer')
+    errors = []
+    if request.method == 'POST':
+        form = BulkUserUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            csv_file = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            result = import_users(
+                csv_file, default_role=form.cleaned_data['role'], allowed_roles=allowed_roles,
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            errors = result.errors
+            if not errors:
+                if form.cleaned_data['dry_run']:
+                    messages.success(request, f"File is valid: {result.created} users would be created.")
+                else:
+                    rate = result.created / result.seconds if result.seconds else 0
+                    messages.success(request, f"Created {result.created} users in {result.seconds:.1f}s ({rate:.0f} users/sec). Credentials are queued for email.")
+                    return redirect('manage_users')
+    else:
+        form = BulkUserUploadForm()
+
+    return render(request, 'users/bulk_create_users.html', {
+        'form': form, 'errors': errors, 'allowed_roles': allowed_roles,
+    })
+
 @login_required(login_url='/users/login/')
 def edit_user_view(request, user_id):
     if request.user.role not in ['Superadmin', 'Admin']: